@@ -1,8 +1,22 @@
 import multiprocessing
 # import setup_script
 import subprocess
+import tomllib
+from os import environ
+
+# Worker profile of the environment, see the gunicorn section in config.toml
+with open("config.toml", "rb") as file:
+    gunicorn_config = tomllib.load(file).get(environ.get("FLASK_ENV", "production"), {}).get("gunicorn", {})
+
 bind = "0.0.0.0:8000"
-workers = multiprocessing.cpu_count() * 2 + 1
+# Requests mostly wait for MySQL and Elasticsearch, threads or greenlets serve other requests meanwhile
+worker_class = gunicorn_config.get("worker_class", "gthread")
+if worker_class == "sync":
+    workers = gunicorn_config.get("workers", multiprocessing.cpu_count() * 2 + 1)
+else:
+    workers = gunicorn_config.get("workers", multiprocessing.cpu_count() + 1)
+threads = gunicorn_config.get("threads", 8)
+worker_connections = gunicorn_config.get("worker_connections", 100)
 accesslog = "-"
 errorlog = "-"
 
@@ -10,4 +24,3 @@ errorlog = "-"
 def on_starting(server):
     # Can't import and execute script because somehow the app started by gunicorn then can't find flask routes.
     subprocess.run(["python", "setup_script.py"])
-
@@ -0,0 +1,65 @@
+"""
+Load test of a running PIKA app. Every client thread requests the given paths in turn for the given duration and the
+throughput and latencies of all requests are reported, see "Workers and load test" in the README.
+
+    python loadtest.py http://localhost:8000 /api/v1/books/ /api/v1/authors/ --clients 32 --duration 30
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+
+def run_client(base_url: str, paths: list[str], headers: dict, deadline: float, results: list, errors: list):
+    """Request the paths in turn until the deadline, each client keeps its own connection open."""
+    session = requests.Session()
+    index = 0
+    while time.monotonic() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.monotonic()
+        try:
+            response = session.get(base_url + path, headers=headers, timeout=60)
+        except requests.RequestException as exception:
+            errors.append(str(exception))
+            continue
+        if response.status_code >= 400:
+            errors.append(f'{response.status_code} {path}')
+        else:
+            results.append(time.monotonic() - start)
+
+
+def main():
+    """Run the load test with the command line arguments and print the results."""
+    parser = argparse.ArgumentParser(description='Load test of a running PIKA app.')
+    parser.add_argument('base_url', help='URL of the app, e.g. http://localhost:8000')
+    parser.add_argument('paths', nargs='+', help='Paths requested in turn by every client.')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent clients.')
+    parser.add_argument('--duration', type=float, default=30, help='Duration of the test in seconds.')
+    parser.add_argument('--token', help='API token sent as bearer token.')
+    arguments = parser.parse_args()
+
+    headers = {'Authorization': f'Bearer {arguments.token}'} if arguments.token else {}
+    results, errors = [], []
+    deadline = time.monotonic() + arguments.duration
+    clients = [threading.Thread(target=run_client, args=(arguments.base_url.rstrip('/'), arguments.paths, headers,
+                                                          deadline, results, errors))
+               for _ in range(arguments.clients)]
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+
+    print(f'{len(results)} requests, {len(errors)} errors, {len(results) / arguments.duration:.1f} requests/s')
+    if len(results) > 1:
+        percentiles = statistics.quantiles(results, n=100)
+        print(f'latency p50 {percentiles[49] * 1000:.0f} ms, p95 {percentiles[94] * 1000:.0f} ms, '
+              f'p99 {percentiles[98] * 1000:.0f} ms')
+    for error in sorted(set(errors))[:10]:
+        print(f'error: {error}')
+
+
+if __name__ == '__main__':
+    main()
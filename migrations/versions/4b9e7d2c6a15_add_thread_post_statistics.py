@@ -0,0 +1,40 @@
+"""Add thread post statistics
+
+Revision ID: 4b9e7d2c6a15
+Revises: 8f3c2a1d9b7e
+Create Date: 2026-10-17 17:40:05.771204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b9e7d2c6a15'
+down_revision = '8f3c2a1d9b7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('threads', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('post_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_post_id', sa.Integer(), nullable=True))
+
+    # Fill the statistics of existing threads
+    threads = sa.table('threads', sa.column('thread_id'), sa.column('post_count'), sa.column('last_post_id'))
+    posts = sa.table('posts', sa.column('post_id'), sa.column('thread_id'))
+    op.execute(threads.update().values(
+        post_count=sa.select(sa.func.count(posts.c.post_id))
+        .where(posts.c.thread_id == threads.c.thread_id)
+        .scalar_subquery(),
+        last_post_id=sa.select(sa.func.max(posts.c.post_id))
+        .where(posts.c.thread_id == threads.c.thread_id)
+        .scalar_subquery(),
+    ))
+
+
+def downgrade():
+    with op.batch_alter_table('threads', schema=None) as batch_op:
+        batch_op.drop_column('last_post_id')
+        batch_op.drop_column('post_count')
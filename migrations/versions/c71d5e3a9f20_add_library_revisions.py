@@ -0,0 +1,28 @@
+"""Add library revisions
+
+Revision ID: c71d5e3a9f20
+Revises: 4b9e7d2c6a15
+Create Date: 2026-10-17 18:12:41.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c71d5e3a9f20'
+down_revision = '4b9e7d2c6a15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('library_books', 'library_series', 'library_authors'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('revision', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    for table in ('library_authors', 'library_series', 'library_books'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('revision')
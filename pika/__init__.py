@@ -10,7 +10,8 @@ from flask_mail import Mail
 from flask_sqlalchemy import SQLAlchemy
 
 from .config import DevelopmentConfig, ProductionConfig, Config
-from .setup import setup_db, setup_flask_login, setup_elasticsearch, setup_babel
+from .setup import setup_db, setup_flask_login, setup_elasticsearch, setup_search, setup_babel, \
+    setup_background_threads
 
 db = SQLAlchemy()
 login_manager = LoginManager()
@@ -49,6 +50,8 @@ def create_app(log_level=None):
 
     setup_elasticsearch(app)
 
+    setup_search(app)
+
     mail.init_app(app)
 
     setup_babel(app, babel)
@@ -73,4 +76,22 @@ def create_app(log_level=None):
         from pika.community.routes import bp as community_bp  # pylint: disable=import-outside-toplevel
         app.register_blueprint(community_bp, url_prefix='/community')
 
+        from pika import assets  # pylint: disable=import-outside-toplevel
+        assets.init_app(app)
+
+        from pika.search_outbox import search_cli  # pylint: disable=import-outside-toplevel
+        app.cli.add_command(search_cli)
+
+        setup_background_threads(app)
+
+        from pika.importer import import_cli  # pylint: disable=import-outside-toplevel
+        from pika.query_plans import check_query_plans_command  # pylint: disable=import-outside-toplevel
+        import_cli.add_command(check_query_plans_command)
+        # pylint: disable-next=import-outside-toplevel
+        from pika.covers import backfill_covers_command, collect_garbage_command
+        import_cli.add_command(backfill_covers_command)
+        import_cli.add_command(collect_garbage_command)
+        import_cli.add_command(assets.compress_static_command)
+        app.cli.add_command(import_cli)
+
     return app
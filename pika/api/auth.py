@@ -5,6 +5,7 @@ from flask_httpauth import HTTPTokenAuth
 
 from pika import db
 from pika.models import Users
+from . import token_cache
 
 basic_auth = HTTPBasicAuth()
 token_auth = HTTPTokenAuth()
@@ -21,8 +22,14 @@ def verify_password(username, password):
 
 @token_auth.verify_token
 def verify_token(token):
-    """Verify a token."""
-    return Users.check_token(token) if token else None
+    """Verify a token. Valid tokens are cached, see :mod:`pika.api.token_cache`."""
+    if not token:
+        return None
+    identity = token_cache.get(token)
+    if identity is not None:
+        return identity
+    user = Users.check_token(token)
+    return token_cache.put(token, user) if user else None
 
 
 @current_app.route('/token', methods=['POST'])
@@ -38,6 +45,6 @@ def get_token():
 @token_auth.login_required
 def revoke_token():
     """Revoke API token."""
-    token_auth.current_user().revoke_token()
+    db.session.get(Users, token_auth.current_user().user_id).revoke_token()
     db.session.commit()
     return '', 204
@@ -1,61 +1,70 @@
 """REST API for author data."""
-from flask import Blueprint, request
-from sqlalchemy import exc
+from flask import Blueprint, request, current_app
 
-from pika import db
-from pika.models import Authors
+from pika.services import authors as author_service, AuthorNotFound, BookNotFound, DeleteFailed, InvalidCursor
+from pika.services.util import library_version
 from .auth import token_auth
-from .data import ApiResponse, AuthorsPage, AuthorBase, AuthorData
-from .util import validate_dto, new_books_list, APIValidationError, BookNotFound
+from .data import ApiResponse
+from .util import validate_dto, ndjson_response, APIValidationError, conditional, not_found_details
 
 bp = Blueprint("authors", __name__)
 
 
 @bp.route('/', methods=['GET'])
 @token_auth.login_required
+@conditional(library_version)
 def get_authors():
-    """Endpoint to get a paginated list of authors"""
+    """
+    Endpoint to get a paginated list of authors.
+    Pass ``after`` (empty for the first page, then the ``next_cursor`` of the previous page) to use keyset pagination
+    instead of page numbers. Keyset pages do not count the total unless ``total=true`` is given.
+    """
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 20, type=int)
 
-    query = Authors.query.order_by(Authors.last_name).paginate(page=page, per_page=per_page)
-    authors = [AuthorData.from_orm(s).model_dump() for s in query]
-    page = AuthorsPage(
-        first=1,
-        last=query.pages,
-        has_previous=query.has_prev,
-        has_next=query.has_next,
-        authors=authors
-    )
-
+    if "after" in request.args:
+        after = request.args.get("after") or None
+        with_total = request.args.get("total", "").lower() in ("1", "true")
+        try:
+            page = author_service.list_authors_after(after, per_page, with_total=with_total)
+        except InvalidCursor as exception:
+            return ApiResponse(success=False, message="Invalid cursor", details=str(exception),
+                               status_code=400).model_dump(), 400
+    else:
+        page = author_service.list_authors(page, per_page)
     return ApiResponse(data=page).model_dump()
 
 
 @bp.route('/all', methods=['GET'])
 @token_auth.login_required
+@conditional(library_version)
 def get_authors_all():
     """
     Endpoint to get all authors data. Please use sparingly.
     Generally use the endpoint /authors to get a list of author data. Only use this endpoint if you specifically need
     to get *all* authors data.
+    Add ``?format=ndjson`` to stream the authors as newline delimited JSON instead, which keeps memory usage constant
+    regardless of the amount of authors.
     """
-    query = Authors.query.all()
-    authors = [AuthorData.from_orm(a).model_dump() for a in query]
+    if request.args.get("format") == "ndjson":
+        return ndjson_response(author_service.iter_authors(current_app.config.get("STREAM_CHUNK_SIZE")))
+    authors = [a.model_dump() for a in author_service.all_authors()]
     return ApiResponse(data=authors).model_dump()
 
 
 @bp.route('/<int:author_id>', methods=['GET'])
 @token_auth.login_required
+@conditional(author_service.author_version)
 def get_authors_author_id(author_id):
     """
     Endpoint for getting a specific author.
     :param author_id: ID of the author to return.
     :return:
     """
-    query = Authors.query.get(author_id)
-    if query is None:
+    try:
+        author = author_service.get_author(author_id)
+    except AuthorNotFound:
         return ApiResponse(success=False, message="Author not found.", status_code=404).model_dump(), 404
-    author = AuthorData.from_orm(query)
     return ApiResponse(data=author).model_dump()
 
 
@@ -70,21 +79,12 @@ def post_authors():
         return ApiResponse(success=False, message="Validation Error", details=exception.errors,
                            status_code=400).model_dump(), 400
 
-    new_author = Authors(**author.model_dump(exclude={"books"}))
-
-    if author.books:
-        try:
-            new_books = new_books_list(author.books)
-            new_author.books = new_books
-        except BookNotFound as exception:
-            return ApiResponse(success=False, message="Book not found",
-                               details=f"Book with ID {exception.book_id} does not exist",
-                               status_code=404).model_dump(), 404
-
-    db.session.add(new_author)
-    db.session.commit()
-
-    new_author = AuthorData.from_orm(new_author)
+    try:
+        new_author = author_service.create_author(author)
+    except BookNotFound as exception:
+        return ApiResponse(success=False, message="Book not found",
+                           details=not_found_details(exception),
+                           status_code=404).model_dump(), 404
 
     return ApiResponse(data=new_author).model_dump()
 
@@ -104,26 +104,15 @@ def put_authors(author_id):
         return ApiResponse(success=False, message="Validation Error", details=exception.errors,
                            status_code=400).model_dump(), 400
 
-    target_author: Authors = Authors.query.get(author_id)
-    if not target_author:
+    try:
+        updated_author = author_service.update_author(author_id, author)
+    except AuthorNotFound:
         return ApiResponse(success=False, message="Author not found", status_code=404).model_dump(), 404
+    except BookNotFound as exception:
+        return ApiResponse(success=False, message="Author update failed",
+                           details=f"Unable to assign book to author. {not_found_details(exception)}",
+                           status_code=404).model_dump(), 404
 
-    for key, value in author.model_dump(exclude={"books"}).items():
-        setattr(target_author, key, value)
-
-    if author.books:
-        try:
-            book_update = new_books_list(author.books)
-            target_author.books = book_update
-        except BookNotFound as exception:
-            return ApiResponse(success=False, message="Author update failed",
-                               details=f"Unable to assign book to author. "
-                                       f"Book with ID {exception.book_id} does not exist",
-                               status_code=404).model_dump(), 404
-
-    db.session.commit()
-
-    updated_author = AuthorData.from_orm(target_author)
     return ApiResponse(data=updated_author).model_dump()
 
 
@@ -135,23 +124,12 @@ def delete_authors(author_id):
     :param author_id: ID of the author to delete.
     :return:
     """
-    target_author: Authors = Authors.query.get(author_id)
-    if not target_author:
-        return ApiResponse(success=False, message="Author not found", status_code=404).model_dump(), 404
-
-    # Manually prevent deletion of authors with assigned books, SQLAlchemy does not handle it correctly. Possibly due
-    # to a bug. When trying to manually delete an author with SQL statement the deletion is correctly prevented.
-    if len(target_author.books) != 0:
-        msg = f"Failed to delete author '{author_id}'. Authors cannot be deleted when books are still assigned to them."
-        return ApiResponse(success=False, message="Delete failed", details=msg, status_code=400).model_dump(), 400
-
-    deleted_author = AuthorBase.from_orm(target_author)
-
     try:
-        db.session.delete(target_author)
-        db.session.commit()
-    except exc.SQLAlchemyError:
-        msg = f"Failed to delete author '{author_id}'. Authors cannot be deleted when books are still assigned to them."
-        return ApiResponse(success=False, message="Delete failed", details=msg, status_code=400).model_dump(), 400
+        deleted_author = author_service.delete_author(author_id)
+    except AuthorNotFound:
+        return ApiResponse(success=False, message="Author not found", status_code=404).model_dump(), 404
+    except DeleteFailed as exception:
+        return ApiResponse(success=False, message="Delete failed", details=str(exception),
+                           status_code=400).model_dump(), 400
 
     return ApiResponse(data=deleted_author.model_dump()).model_dump()
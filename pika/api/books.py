@@ -1,61 +1,71 @@
 """REST API for book data."""
-from flask import Blueprint, request
-from pydantic import ValidationError
-from sqlalchemy import exc
+from flask import Blueprint, request, current_app
 
-from pika import db
-from pika.models import Books, Series, Authors
+from pika.services import books as book_service, BookNotFound, SeriesNotFound, AuthorNotFound, DeleteFailed, \
+    BatchFailed, InvalidCursor
+from pika.services.util import library_version
 from .auth import token_auth
-from .data import ApiResponse, BookPage, BookBase, BookData, ApiBookDTO
+from .data import ApiResponse, BatchResult
+from .util import validate_dto, ndjson_response, APIValidationError, conditional, not_found_details
 
 bp = Blueprint("books", __name__)
 
 
 @bp.route('/', methods=['GET'])
 @token_auth.login_required
+@conditional(library_version)
 def get_books():
-    """Endpoint to get a paginated list of books."""
+    """
+    Endpoint to get a paginated list of books.
+    Pass ``after`` (empty for the first page, then the ``next_cursor`` of the previous page) to use keyset pagination
+    instead of page numbers. Keyset pages do not count the total unless ``total=true`` is given.
+    """
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 20, type=int)
 
-    query = Books.query.order_by(Books.title).paginate(page=page, per_page=per_page)
-    books = [BookData.from_orm(b).model_dump() for b in query]
-    page = BookPage(
-        first=1,
-        last=query.pages,
-        has_previous=query.has_prev,
-        has_next=query.has_next,
-        books=books
-    )
-
+    if "after" in request.args:
+        after = request.args.get("after") or None
+        with_total = request.args.get("total", "").lower() in ("1", "true")
+        try:
+            page = book_service.list_books_after(after, per_page, with_total=with_total)
+        except InvalidCursor as exception:
+            return ApiResponse(success=False, message="Invalid cursor", details=str(exception),
+                               status_code=400).model_dump(), 400
+    else:
+        page = book_service.list_books(page, per_page)
     return ApiResponse(data=page).model_dump(mode='json')
 
 
 @bp.route('/all', methods=['GET'])
 @token_auth.login_required
+@conditional(library_version)
 def get_books_all():
     """
     Endpoint to get all book data. Please use sparingly.
     Generally use the endpoint /books to get a list of book data. Only use this endpoint if you specifically need
     to get *all* book data.
+    Add ``?format=ndjson`` to stream the books as newline delimited JSON instead, which keeps memory usage constant
+    regardless of the amount of books.
     """
-    query = Books.query.all()
-    books = [BookData.from_orm(b).model_dump() for b in query]
+    if request.args.get("format") == "ndjson":
+        return ndjson_response(book_service.iter_books(current_app.config.get("STREAM_CHUNK_SIZE")))
+    books = [b.model_dump() for b in book_service.all_books()]
     return ApiResponse(data=books).model_dump()
 
 
 @bp.route("/<int:book_id>", methods=['GET'])
 @token_auth.login_required
+@conditional(book_service.book_version)
 def get_books_book_id(book_id):
     """
     Endpoint for getting book details.
     :param book_id: ID of book to return.
     :return:
     """
-    query = Books.query.get(book_id)
-    if not query:
+    try:
+        book = book_service.get_book(book_id)
+    except BookNotFound:
         return ApiResponse(success=False, message="Book not found.", status_code=404).model_dump(), 404
-    book = BookData.from_orm(query)
     return ApiResponse(data=book).model_dump(mode='json')
 
 
@@ -65,38 +75,66 @@ def post_books():
     """Endpoint to add a new book."""
     data = request.get_json()
     try:
-        book = ApiBookDTO.model_validate(data)
-    except ValidationError as exception:
-        error_data = []
-        for e in exception.errors():
-            error = {"type": e["type"], "location": "/".join(e["loc"]), "message": e["msg"]}
-            error_data.append(error)
-        return ApiResponse(success=False, message="Validation Error", details=error_data,
+        book = validate_dto(data, "book")
+    except APIValidationError as exception:
+        return ApiResponse(success=False, message="Validation Error", details=exception.errors,
                            status_code=400).model_dump(), 400
 
-    new_book = Books(**book.model_dump(exclude={"volume_nr_as_string", "series", "authors"}))
+    try:
+        new_book = book_service.create_book(book)
+    except SeriesNotFound as exception:
+        return ApiResponse(success=False, message="Series not found",
+                           details=not_found_details(exception),
+                           status_code=404).model_dump(), 404
+    except AuthorNotFound as exception:
+        return ApiResponse(success=False, message="Author not found",
+                           details=not_found_details(exception),
+                           status_code=404).model_dump(), 404
 
-    if book.series:
-        series_query = Series.query.get(book.series.series_id)
-        if not series_query:
-            return ApiResponse(success=False, message="Series not found",
-                               details=f"Series with ID {book.series.series_id} does not exist",
-                               status_code=404).model_dump(), 404
-        new_book.series = series_query
+    return ApiResponse(data=new_book).model_dump()
 
-    for author in book.authors:
-        author_query = Authors.query.get(author.author_id)
-        if not author_query:
-            return ApiResponse(success=False, message="Author not found",
-                               details=f"Author with ID {author.author_id} does not exist",
-                               status_code=404).model_dump(), 404
-        new_book.authors.append(author_query)
 
-    db.session.add(new_book)
-    db.session.commit()
+@bp.route('/batch', methods=['POST'])
+@token_auth.login_required
+def post_books_batch():
+    """
+    Endpoint to create, update and delete many books in one request and transaction.
+    Expects ``{"operations": [...]}`` with up to ``API_BATCH_MAX_OPERATIONS`` operations, each one of
+    ``{"operation": "create", "book": {...}}``, ``{"operation": "update", "book_id": 1, "book": {...}}`` or
+    ``{"operation": "delete", "book_id": 1}``. Invalid operations are skipped, the result of each operation is returned
+    in the same order.
+    """
+    data = request.get_json()
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list):
+        return ApiResponse(success=False, message="Validation Error", details="Expected a list of operations",
+                           status_code=400).model_dump(), 400
+    max_operations = current_app.config.get("API_BATCH_MAX_OPERATIONS")
+    if len(operations) > max_operations:
+        return ApiResponse(success=False, message="Too many operations",
+                           details=f"A batch may contain at most {max_operations} operations",
+                           status_code=413).model_dump(), 413
+
+    valid_operations, valid_indices, results = [], [], [None] * len(operations)
+    for index, operation in enumerate(operations):
+        try:
+            valid_operations.append(validate_dto(operation, "book_operation"))
+            valid_indices.append(index)
+        except APIValidationError as exception:
+            results[index] = BatchResult(index=index, success=False, status_code=400, message="Validation Error",
+                                         details=exception.errors)
 
-    new_book = BookData.from_orm(new_book)
-    return ApiResponse(data=new_book).model_dump()
+    try:
+        for index, result in zip(valid_indices, book_service.batch_books(valid_operations)):
+            result.index = index
+            results[index] = result
+    except BatchFailed as exception:
+        return ApiResponse(success=False, message="Batch failed", details=str(exception),
+                           status_code=409).model_dump(), 409
+
+    success = all(result.success for result in results)
+    return ApiResponse(success=success, message="Success" if success else "Some operations failed",
+                       data=[result.model_dump() for result in results]).model_dump()
 
 
 @bp.route('/<int:book_id>', methods=['PUT'])
@@ -108,45 +146,24 @@ def put_books(book_id):
     """
     data = request.get_json()
     try:
-        book = ApiBookDTO.model_validate(data)
-    except ValidationError as exception:
-        error_data = []
-        for e in exception.errors():
-            error = {"type": e["type"], "location": "/".join(e["loc"]), "message": e["msg"]}
-            error_data.append(error)
-        return ApiResponse(success=False, message="Validation Error", details=error_data,
+        book = validate_dto(data, "book")
+    except APIValidationError as exception:
+        return ApiResponse(success=False, message="Validation Error", details=exception.errors,
                            status_code=400).model_dump(), 400
 
-    target_book: Books = Books.query.get(book_id)
-    if not target_book:
+    try:
+        updated_book = book_service.update_book(book_id, book)
+    except BookNotFound:
         return ApiResponse(success=False, message="Book not found", status_code=404).model_dump(), 404
+    except SeriesNotFound as exception:
+        return ApiResponse(success=False, message="Series not found",
+                           details=not_found_details(exception),
+                           status_code=404).model_dump(), 404
+    except AuthorNotFound as exception:
+        return ApiResponse(success=False, message="Author not found",
+                           details=not_found_details(exception),
+                           status_code=404).model_dump(), 404
 
-    for key, value in book.model_dump(exclude={"authors", "series"}).items():
-        setattr(target_book, key, value)
-
-    if book.series:
-        series_query = Series.query.get(book.series.series_id)
-        if not series_query:
-            return ApiResponse(success=False, message="Series not found",
-                               details=f"Series with ID {book.series.series_id} does not exist",
-                               status_code=404).model_dump(), 404
-        target_book.series = series_query
-    elif book.series is None:
-        target_book.series = None
-
-    author_update = []
-    for author in book.authors:
-        author_query = Authors.query.get(author.author_id)
-        if not author_query:
-            return ApiResponse(success=False, message="Author not found",
-                               details=f"Author with ID {author.author_id} does not exist",
-                               status_code=404).model_dump(), 404
-        author_update.append(author_query)
-    target_book.authors = author_update
-
-    db.session.commit()
-
-    updated_book = BookData.from_orm(target_book)
     return ApiResponse(data=updated_book).model_dump()
 
 
@@ -157,19 +174,13 @@ def delete_books(book_id):
     Endpoint for deleting a book.
     :param book_id: ID of the book to delete.
     """
-    target_books: Books = Books.query.get(book_id)
-    if not target_books:
-        return ApiResponse(success=False, message="Book not found", status_code=404).model_dump(), 404
-
-    deleted_book = BookBase.from_orm(target_books)
-
     try:
-        db.session.delete(target_books)
-        db.session.commit()
-    except exc.SQLAlchemyError:
-        msg = f"Failed to delete series '{book_id}'. Series cannot be deleted when books are still assigned to it."
+        deleted_book = book_service.delete_book(book_id)
+    except BookNotFound:
+        return ApiResponse(success=False, message="Book not found", status_code=404).model_dump(), 404
+    except DeleteFailed as exception:
         return ApiResponse(success=False, message="Delete failed",
-                           details=msg,
+                           details=str(exception),
                            status_code=400).model_dump(), 400
 
     return ApiResponse(data=deleted_book.model_dump()).model_dump()
@@ -1,8 +1,8 @@
 """API data objects"""
-from .api_response import BookPage, SeriesPage, AuthorsPage, ApiResponse
+from .api_response import BookPage, SeriesPage, AuthorsPage, ApiResponse, BatchResult
 from .authors import ApiAuthorDTO
-from .books import BaseApiBookDTO, ApiBookDTO
+from .books import BaseApiBookDTO, ApiBookDTO, ApiBookOperationDTO
 from .series import ApiSeriesDTO
 
-__all__ = ['BaseApiBookDTO', 'ApiBookDTO', 'ApiSeriesDTO', 'ApiAuthorDTO', 'BookPage', 'SeriesPage', 'AuthorsPage',
-           'ApiResponse']
+__all__ = ['BaseApiBookDTO', 'ApiBookDTO', 'ApiBookOperationDTO', 'ApiSeriesDTO', 'ApiAuthorDTO', 'BookPage',
+           'SeriesPage', 'AuthorsPage', 'ApiResponse', 'BatchResult']
@@ -1,7 +1,7 @@
 """Data models used by Pika API."""
 from __future__ import annotations
 
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from pydantic import BaseModel, SerializeAsAny
 
@@ -11,9 +11,10 @@ from ..library import BookData, SeriesData, AuthorData
 class LibraryPage(BaseModel):
     """Default data for paginated library objects."""
     first: int
-    last: int
+    last: Optional[int]
     has_previous: bool
     has_next: bool
+    next_cursor: Optional[str] = None
 
 
 class BookPage(LibraryPage):
@@ -31,6 +32,16 @@ class AuthorsPage(LibraryPage):
     authors: List['AuthorData']
 
 
+class BatchResult(BaseModel):
+    """Result of a single operation of a batch request."""
+    index: int
+    success: bool = True
+    status_code: int = 200
+    message: str = "Success"
+    details: str | List = None
+    object_id: Optional[int] = None
+
+
 class ApiResponse(BaseModel):
     """Standard response for Pika API."""
     success: bool = True
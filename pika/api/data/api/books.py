@@ -1,8 +1,8 @@
 """Book data model for API"""
 import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class BaseApiBookDTO(BaseModel):
@@ -36,3 +36,19 @@ class ApiBookDTO(BaseModel):
     release_date: datetime.date = datetime.date.today()
     synopsis: Optional[str] = None
     cover: Optional[str] = None
+
+
+class ApiBookOperationDTO(BaseModel):
+    """Single operation of a book batch request."""
+    operation: Literal['create', 'update', 'delete']
+    book_id: Optional[int] = None
+    book: Optional[ApiBookDTO] = None
+
+    @model_validator(mode='after')
+    def check_operation(self) -> 'ApiBookOperationDTO':
+        """Check that the fields needed by the operation are given."""
+        if self.operation != 'create' and self.book_id is None:
+            raise ValueError(f"Operation '{self.operation}' requires a book_id")
+        if self.operation != 'delete' and self.book is None:
+            raise ValueError(f"Operation '{self.operation}' requires book data")
+        return self
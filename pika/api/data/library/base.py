@@ -5,6 +5,13 @@ from typing import Optional
 from pydantic import BaseModel, ConfigDict, computed_field
 
 
+class CoverVariant(BaseModel):
+    """Resized copy of a book cover, paths are relative to the static folder of the library."""
+    width: int
+    webp: str
+    jpeg: str
+
+
 class BookBase(BaseModel):
     """Base data model for books."""
     model_config = ConfigDict(from_attributes=True)
@@ -15,6 +22,7 @@ class BookBase(BaseModel):
     volume_nr: Optional[float | int]
     synopsis: Optional[str]
     cover: Optional[str]
+    cover_variants: Optional[dict[str, CoverVariant]] = None
 
     @computed_field
     def volume_nr_as_string(self) -> Optional[str]:
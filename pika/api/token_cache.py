@@ -0,0 +1,102 @@
+"""
+In-memory cache of valid API tokens, so authenticating an API request does not need a database query. Each worker
+process keeps up to ``TOKEN_CACHE_SIZE`` tokens (least recently used are dropped first) for at most
+``TOKEN_CACHE_TIMEOUT`` seconds. Tokens of users changed or deleted in a committed transaction are dropped from the
+cache of the committing process right away, other processes pick up a revocation when their entry expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import sqlalchemy as sa
+from flask import current_app
+
+from pika import db
+from pika.models import Users
+
+
+class TokenUser(NamedTuple):
+    """Identity of the user an API token belongs to."""
+    user_id: int
+    token_expiration: datetime
+
+
+_lock = threading.Lock()
+_cache: OrderedDict[str, tuple[TokenUser, float]] = OrderedDict()
+
+
+def get(token: str) -> TokenUser | None:
+    """
+    Get the cached identity of a token.
+    :param token: API authentication token
+    :type token: str
+    :return: Identity if the token is cached and not expired, else None
+    :rtype: TokenUser | None
+    """
+    now = time.monotonic()
+    with _lock:
+        cached = _cache.get(token)
+        if cached is None:
+            return None
+        identity, cached_at = cached
+        if now - cached_at >= current_app.config['TOKEN_CACHE_TIMEOUT'] or \
+                identity.token_expiration < datetime.now(timezone.utc):
+            del _cache[token]
+            return None
+        _cache.move_to_end(token)
+        return identity
+
+
+def put(token: str, user: Users) -> TokenUser:
+    """
+    Cache the identity of a valid token.
+    :param token: API authentication token
+    :type token: str
+    :param user: User the token belongs to
+    :type user: Users
+    :return: Cached identity
+    :rtype: TokenUser
+    """
+    identity = TokenUser(user.user_id, user.token_expiration.replace(tzinfo=timezone.utc))
+    with _lock:
+        _cache[token] = (identity, time.monotonic())
+        _cache.move_to_end(token)
+        while len(_cache) > current_app.config['TOKEN_CACHE_SIZE']:
+            _cache.popitem(last=False)
+    return identity
+
+
+def invalidate(*tokens: str):
+    """
+    Remove tokens from the cache.
+    :param tokens: API authentication tokens
+    """
+    with _lock:
+        for token in tokens:
+            _cache.pop(token, None)
+
+
+def _collect_changed_tokens(session, _flush_context):
+    """Remember the old and new tokens of all users changed in a flush until the transaction is committed."""
+    changed = session.info.setdefault('changed_tokens', set())
+    for user in (*session.dirty, *session.deleted):
+        if isinstance(user, Users):
+            history = sa.inspect(user).attrs.token.history
+            changed.update(token for token in (*history.deleted, *history.unchanged, *history.added) if token)
+
+
+def _invalidate_changed_tokens(session):
+    """Remove tokens of users changed in the committed transaction from the cache."""
+    invalidate(*session.info.pop('changed_tokens', ()))
+
+
+def _discard_changed_tokens(session):
+    """Forget changed tokens of a rolled back transaction."""
+    session.info.pop('changed_tokens', None)
+
+
+db.event.listen(db.session, 'after_flush', _collect_changed_tokens)
+db.event.listen(db.session, 'after_commit', _invalidate_changed_tokens)
+db.event.listen(db.session, 'after_rollback', _discard_changed_tokens)
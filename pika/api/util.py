@@ -1,15 +1,19 @@
 """Utility functions for Pika API."""
-from typing import Literal
+import hashlib
+from functools import wraps
+from typing import Literal, Iterable, Callable
 
-from pydantic import ValidationError
+from flask import Response, stream_with_context, request, current_app, make_response
+from pydantic import BaseModel, ValidationError
 
-from pika.models import Books
-from .data import BaseApiBookDTO, ApiBookDTO, ApiSeriesDTO, ApiAuthorDTO
+from pika.services.exceptions import ObjectNotFound
+from .data import ApiBookDTO, ApiBookOperationDTO, ApiSeriesDTO, ApiAuthorDTO
 
 DTO = {
     "book": ApiBookDTO,
     "series": ApiSeriesDTO,
     "author": ApiAuthorDTO,
+    "book_operation": ApiBookOperationDTO,
 }
 
 
@@ -21,8 +25,8 @@ class APIValidationError(Exception):
         self.errors = errors
 
 
-def validate_dto(request_data: dict,
-                 dto: Literal['book', 'series', 'author']) -> ApiBookDTO | ApiSeriesDTO | ApiAuthorDTO:
+def validate_dto(request_data: dict, dto: Literal['book', 'series', 'author', 'book_operation']
+                 ) -> ApiBookDTO | ApiSeriesDTO | ApiAuthorDTO | ApiBookOperationDTO:
     """
     Validate input data against DTO.
 
@@ -38,33 +42,65 @@ def validate_dto(request_data: dict,
     except ValidationError as exc:
         error_data = []
         for _error in exc.errors():
-            error = {"type": _error["type"], "location": "/".join(_error["loc"]), "message": _error["msg"]}
+            error = {"type": _error["type"], "location": "/".join(str(part) for part in _error["loc"]),
+                     "message": _error["msg"]}
             error_data.append(error)
         raise APIValidationError(errors=error_data) from exc
 
 
-class BookNotFound(Exception):
-    """Raised when a book is not found in the database."""
-    def __init__(self, book_id, book_title) -> None:
-        super().__init__(f"Book {book_id} not found.")
-        self.book_id = book_id
-        self.book_title = book_title
+def not_found_details(exception: ObjectNotFound) -> str:
+    """
+    Describe all missing objects of a not found exception for the ``details`` of an API response.
+    :param exception: Raised not found exception.
+    :return: Details message.
+    """
+    if len(exception.missing_ids) == 1:
+        return f"{exception.object_type} with ID {exception.missing_ids[0]} does not exist"
+    missing_ids = ", ".join(str(missing) for missing in exception.missing_ids)
+    return f"{exception.object_type} with IDs {missing_ids} do not exist"
 
 
-def new_books_list(books: list[BaseApiBookDTO]) -> list[Books]:
+def ndjson_response(items: Iterable[BaseModel]) -> Response:
+    """
+    Generate a streamed response with one JSON document per line (NDJSON). Each item is serialized when it is sent, so
+    the response never holds the whole result in memory.
+
+    :param items: Iterable of pydantic models, usually a generator.
+    :return: Chunked flask response.
     """
-    Generate a list of ORM book objects from the API input data. Queries the database for books and raises an
-    exception if an error occurs.
+    def generate():
+        for item in items:
+            yield item.model_dump_json() + "\n"
 
-    :raises BookNotFound: When *any* book in the list is not found in the database.
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def conditional(version: Callable[..., str | None]):
+    """
+    Decorator adding a strong ETag to successful responses of a GET endpoint and answering ``If-None-Match`` requests
+    with ``304 Not Modified`` without calling the endpoint if the data did not change.
 
-    :param books: A list of DTO book objects.
-    :return: A list of ORM book objects.
+    :param version: Function returning the current version of the requested data, called with the keyword arguments
+        of the endpoint. If it returns None (e.g. the object does not exist) the endpoint is called without ETag.
     """
-    new_books = []
-    for book in books:
-        response = Books.query.get(book.book_id)
-        if response is None:
-            raise BookNotFound(book.book_id, book.title)
-        new_books.append(response)
-    return new_books
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            current_version = version(**kwargs)
+            if current_version is None:
+                return view(*args, **kwargs)
+
+            # Different query arguments (page, format, ...) are different representations of the data
+            etag = hashlib.sha1(f"{request.full_path}:{current_version}".encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            return response
+
+        return wrapper
+
+    return decorator
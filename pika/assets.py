@@ -0,0 +1,246 @@
+"""
+Delivery of static files and covers. URLs built with ``url_for`` for static endpoints get a fingerprint of the file
+content (``?v=<hash>``) and responses to fingerprinted URLs are cached by browsers and proxies for a year with
+``Cache-Control: immutable``. Covers are content addressed, their names are fingerprints already.
+
+Behind a proxy the workers do not have to stream the files themselves. With ``STATIC_OFFLOAD = "x-sendfile"`` the path
+of the file is sent in the ``X-Sendfile`` header (Apache, lighttpd), with ``"x-accel-redirect"`` the response contains
+an ``X-Accel-Redirect`` to ``STATIC_ACCEL_PREFIX`` followed by the path relative to the ``pika`` package (nginx).
+
+Files of ``pika/static`` are precompressed with ``python -m pika.assets`` (``.gz`` and, if the ``brotli`` package is
+installed, ``.br``). They are sent to clients accepting the encoding, so nothing is compressed per request.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+import click
+from flask import Flask, Response, abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FINGERPRINT_ARG = 'v'
+CONTENT_ADDRESSED = re.compile(r'^covers/(variants/)?[0-9a-f]{32,64}\.\w+$')
+# File extension of precompressed files by content coding, in order of preference
+ENCODINGS = {'br': '.br', 'gzip': '.gz'}
+COMPRESSIBLE = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.ttf', '.eot')
+OFFLOAD_MODES = (None, 'x-sendfile', 'x-accel-redirect')
+CHUNK_SIZE = 64 * 1024
+
+# Fingerprints by path, with the modification time and size they were computed for
+_fingerprints: dict[str, tuple[int, int, str]] = {}
+
+
+def fingerprint(path: str) -> str | None:
+    """
+    Get the fingerprint of a file. Fingerprints are cached until the file is modified.
+    :param path: Path of the file.
+    :return: Hash of the file content or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    cached = _fingerprints.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            digest.update(chunk)
+    value = digest.hexdigest()[:16]
+    _fingerprints[path] = (stat.st_mtime_ns, stat.st_size, value)
+    return value
+
+
+def _static_folder(endpoint: str) -> str | None:
+    """Get the static folder of the app or blueprint a static endpoint belongs to."""
+    if endpoint == 'static':
+        return current_app.static_folder
+    blueprint = current_app.blueprints.get(endpoint.rpartition('.')[0])
+    return blueprint and blueprint.static_folder
+
+
+def _add_fingerprint(endpoint: str, values: dict):
+    """URL defaults callback adding the fingerprint to URLs of static files."""
+    if not current_app.config['STATIC_FINGERPRINT'] or endpoint.rpartition('.')[2] != 'static':
+        return
+    filename = values.get('filename')
+    if not filename or FINGERPRINT_ARG in values or CONTENT_ADDRESSED.match(filename):
+        return
+    folder = _static_folder(endpoint)
+    path = folder and safe_join(folder, filename)
+    value = path and fingerprint(path)
+    if value:
+        values[FINGERPRINT_ARG] = value
+
+
+def _precompressed(path: str) -> tuple[str, str | None, bool]:
+    """
+    Choose the precompressed file to send.
+    :param path: Path of the requested file.
+    :return: Path of the file to send, its content coding and whether precompressed files exist.
+    """
+    if not path.endswith(COMPRESSIBLE):
+        return path, None, False
+    available = [(encoding, path + extension) for encoding, extension in ENCODINGS.items()
+                 if os.path.isfile(path + extension)]
+    for encoding, compressed_path in available:
+        if request.accept_encodings.quality(encoding) > 0:
+            return compressed_path, encoding, True
+    return path, None, bool(available)
+
+
+def _accel_redirect(response: Response, path: str) -> Response:
+    """Replace the body of a file response by an ``X-Accel-Redirect`` to the file."""
+    response.close()
+    response.response = []
+    response.direct_passthrough = False
+    # nginx answers range requests of the redirect itself
+    response.status_code = 200
+    for header in ('Content-Length', 'Content-Range'):
+        response.headers.pop(header, None)
+    relative_path = os.path.relpath(path, current_app.root_path).replace(os.sep, '/')
+    response.headers['X-Accel-Redirect'] = current_app.config['STATIC_ACCEL_PREFIX'].rstrip('/') + '/' + quote(
+        relative_path)
+    return response
+
+
+def send_static(folder: str, filename: str, immutable: bool = False, **kwargs) -> Response:
+    """
+    Send a file of a static folder, precompressed if possible and offloaded to the proxy if configured.
+
+    :raises NotFound: When the file does not exist or is outside the folder.
+
+    :param folder: Static folder.
+    :param filename: Path of the file in the folder.
+    :param immutable: The URL refers to this content only, so it may be cached forever.
+    :param kwargs: Further arguments of :func:`flask.send_file`, e.g. ``as_attachment``.
+    :return: File response.
+    """
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    offload = current_app.config['STATIC_OFFLOAD']
+    sent_path, encoding, vary = path, None, False
+    # nginx picks precompressed files with gzip_static/brotli_static itself
+    if offload != 'x-accel-redirect' and not kwargs.get('as_attachment'):
+        sent_path, encoding, vary = _precompressed(path)
+    if encoding:
+        kwargs.setdefault('mimetype', mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+
+    max_age = current_app.config['STATIC_MAX_AGE'] if immutable else current_app.get_send_file_max_age(filename)
+    response = send_file(sent_path, max_age=max_age, conditional=True, **kwargs)
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    if encoding:
+        response.content_encoding = encoding
+    if vary:
+        response.vary.add('Accept-Encoding')
+    if offload == 'x-accel-redirect' and response.status_code in (200, 206):
+        response = _accel_redirect(response, path)
+    return response
+
+
+def _static_view(endpoint: str):
+    """Create the view function of a static endpoint."""
+    def send_static_file(filename: str) -> Response:
+        folder = _static_folder(endpoint)
+        if folder is None:
+            abort(404)
+        version = request.args.get(FINGERPRINT_ARG)
+        path = safe_join(folder, filename)
+        immutable = bool(CONTENT_ADDRESSED.match(filename)
+                         or (version and path and version == fingerprint(path)))
+        return send_static(folder, filename, immutable)
+    return send_static_file
+
+
+def init_app(app: Flask):
+    """
+    Serve the static files of the app and its blueprints with :func:`send_static` and add fingerprints to their URLs.
+    Call after all blueprints are registered.
+
+    :raises ValueError: When ``STATIC_OFFLOAD`` is invalid.
+
+    :param app: Flask app.
+    """
+    if app.config['STATIC_OFFLOAD'] not in OFFLOAD_MODES:
+        raise ValueError(f'STATIC_OFFLOAD must be one of {OFFLOAD_MODES}')
+    # Flask adds the X-Sendfile header to all file responses
+    app.config['USE_X_SENDFILE'] = app.config['STATIC_OFFLOAD'] == 'x-sendfile'
+
+    for endpoint in app.view_functions:
+        if endpoint.rpartition('.')[2] == 'static':
+            app.view_functions[endpoint] = _static_view(endpoint)
+    app.url_defaults(_add_fingerprint)
+
+
+def _write_if_smaller(path: str, data: bytes, original_size: int) -> bool:
+    """Write a compressed file if it saves space, otherwise remove an outdated one."""
+    if len(data) >= original_size:
+        if os.path.exists(path):
+            os.remove(path)
+        return False
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+    return True
+
+
+def compress_static(folder: str, minimum_size: int = 1024) -> int:
+    """
+    Precompress the text files of a static folder. Files whose compressed versions are newer are skipped.
+    :param folder: Static folder.
+    :param minimum_size: Smaller files are not compressed.
+    :return: Number of written compressed files.
+    """
+    compressors = {'.gz': lambda data: gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        compressors['.br'] = lambda data: brotli.compress(data, quality=11)
+
+    written = 0
+    for root, _directories, files in os.walk(folder):
+        for name in files:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            if not name.endswith(COMPRESSIBLE) or stat.st_size < minimum_size:
+                continue
+            data = None
+            for extension, compress in compressors.items():
+                compressed_path = path + extension
+                if os.path.exists(compressed_path) and os.stat(compressed_path).st_mtime_ns >= stat.st_mtime_ns:
+                    continue
+                if data is None:
+                    with open(path, 'rb') as file:
+                        data = file.read()
+                written += _write_if_smaller(compressed_path, compress(data), stat.st_size)
+    return written
+
+
+@click.command('compress-static')
+@click.argument('folder', type=click.Path(exists=True, file_okay=False),
+                default=os.path.join(os.path.dirname(__file__), 'static'))
+@click.option('--minimum-size', type=click.IntRange(min=0), default=1024, show_default=True,
+              help='Smaller files are not compressed.')
+def compress_static_command(folder, minimum_size):
+    """Write .gz and .br versions of the CSS, JS and font files of the static folder."""
+    if brotli is None:
+        click.echo('brotli is not installed, only gzip files are written.', err=True)
+    written = compress_static(folder, minimum_size)
+    click.echo(f'{written} compressed files written.')
+
+
+if __name__ == '__main__':
+    compress_static_command()  # pylint: disable=no-value-for-parameter
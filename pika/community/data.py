@@ -45,6 +45,7 @@ class ThreadBase(BaseModel):
     created: datetime
     last_updated: datetime
     views: int
+    post_count: int
 
     def get_created_at(self):
         """Return datetime of thread creation with local timezone."""
@@ -55,16 +56,16 @@ class ThreadBase(BaseModel):
         return self.last_updated.replace(tzinfo=timezone.utc).astimezone()
 
 
+class ThreadSummary(ThreadBase):
+    """Thread information without posts."""
+    author: Optional["UserBase"]
+
+
 class Thread(ThreadBase):
     """Standard object to store thread information."""
     posts: List["ThreadPost"]
     author: Optional["UserBase"]
 
-    @computed_field
-    def post_count(self) -> int:
-        """Computed pydantic field for a count of posts in this thread."""
-        return len(self.posts)
-
 
 class PostBase(BaseModel):
     """Base data model for posts."""
@@ -1,16 +1,18 @@
 """Global routes"""
 import json
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
 from flask import render_template, redirect, url_for, flash, current_app, session, abort, request
 from flask_login import current_user, login_required
+from sqlalchemy import orm as so
 
 from pika import db
 from pika.community import bp
 from pika.models import Users, Posts, Threads
-from .data import Thread, User
+from pika.services import InvalidCursor
+from .data import ThreadSummary, User
 from .forms import PostForm, EditPostForm, ContactForm
-from .util import increment_thread_view
+from .util import increment_thread_view, pending_thread_views, thread_posts, landing_page
 
 
 @bp.before_request
@@ -32,64 +34,48 @@ def index():
     """
     Main community page
     """
-    users = Users.query.order_by(Users.last_login.desc()).limit(5).all()
-    users = [user.username for user in users]
-
-    new_threads = (Threads.query
-                   .order_by(Threads.created.desc())
-                   .limit(5)
-                   .all()
-                   )
-    new_threads = [Thread.from_orm(thread) for thread in new_threads]
-
-    active_threads = (Threads.query
-                      .order_by(Threads.last_updated.desc())
-                      .where(Threads.last_updated < datetime.now(timezone.utc),
-                             Threads.last_updated > datetime.now(timezone.utc) - timedelta(days=1))
-                      .limit(5)
-                      .all()
-                      )
-    active_threads = [Thread.from_orm(thread) for thread in active_threads]
-
-    popular_threads = (Threads.query
-                       .where(Threads.views >= 100)
-                       .where(Threads.last_updated < datetime.now(timezone.utc),
-                              Threads.last_updated > datetime.now(timezone.utc) - timedelta(days=1))
-                       .order_by(Threads.last_updated.desc())
-                       .limit(5)
-                       .all()
-                       )
-    popular_threads = [Thread.from_orm(thread) for thread in popular_threads]
-
-    return render_template("community/index.html", all_users=users, new_threads=new_threads,
-                           active_threads=active_threads, popular_threads=popular_threads)
+    return render_template("community/index.html", **landing_page())
 
 
 @bp.route('/thread/<int:thread_id>', methods=['GET'])
 def thread_page(thread_id):
     """
-    Page to display a thread
+    Page to display a thread with the first page of posts, more posts are loaded by :func:`thread_posts_page`.
     :param thread_id: ID of the thread to display
     """
     form = PostForm()
-    thread_query = Threads.query.get(thread_id)
+    thread_query = db.session.get(Threads, thread_id, options=(so.joinedload(Threads.author),))
     if thread_query is None:
         abort(404, "<i class=\"bi bi-threads me-2\"></i>This thread does not exist")
 
     increment_thread_view(thread_id)
 
-    thread = Thread.from_orm(thread_query)
-    thread.posts.sort(key=lambda _post: _post.created)
-
-    author_posts = []
-    for post in thread.posts:
-        if post.author.user_id == getattr(current_user, "user_id", None):
-            author_posts.append({**post.model_dump(exclude={'author', "created"}), "author_id": post.author.user_id})
+    thread = ThreadSummary.from_orm(thread_query)
+    thread.views += pending_thread_views(thread_id)
+    posts, next_cursor = thread_posts(thread_id, None, current_app.config.get('PER_PAGE_ITEMS'))
 
     edit_form = EditPostForm()
 
-    return render_template("community/thread.html", thread=thread, form=form, author_posts=author_posts,
-                           edit_form=edit_form)
+    return render_template("community/thread.html", thread=thread, posts=posts, next_cursor=next_cursor,
+                           start=0, form=form, edit_form=edit_form)
+
+
+@bp.route('/thread/<int:thread_id>/posts', methods=['GET'])
+def thread_posts_page(thread_id):
+    """
+    Endpoint returning the next page of posts of a thread as HTML fragment for incremental loading.
+    Pass the ``next_cursor`` of the previous page as ``after`` and the number of posts already shown as ``start``.
+    :param thread_id: ID of the thread
+    """
+    if db.session.get(Threads, thread_id) is None:
+        abort(404, "This thread does not exist")
+    try:
+        posts, next_cursor = thread_posts(thread_id, request.args.get('after') or None,
+                                          current_app.config.get('PER_PAGE_ITEMS'))
+    except InvalidCursor:
+        abort(400)
+    start = request.args.get('start', 0, type=int)
+    return {'html': render_template("community/posts.html", posts=posts, start=start), 'next_cursor': next_cursor}
 
 
 @bp.route('/thread/<int:thread_id>/post', methods=['POST'])
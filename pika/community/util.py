@@ -1,18 +1,184 @@
 """Utility functions for community blueprint"""
-from flask import session
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from flask import Flask, session, current_app
+from sqlalchemy import orm as so
+from sqlalchemy.exc import SQLAlchemyError
 
 from pika import db
-from pika.models import Threads
+from pika.models import Users, Threads, Posts
+from pika.services.generations import generation
+from pika.services.util import keyset_page
+from .data import ThreadBase, ThreadPost
+
+# Thread views counted by this worker process which are not yet written to the database
+_pending_views: dict[int, int] = defaultdict(int)
+_pending_lock = threading.Lock()
+
+# Landing page data with the table generations and the time it was built
+_landing_page: tuple[tuple[int, ...], float, dict] | None = None
+_LANDING_PAGE_TABLES = (Users.__tablename__, Threads.__tablename__, Posts.__tablename__)
 
 
 def increment_thread_view(thread_id):
     """
     Increment a thread view counter. Checks in session if page has already been viewed or not.
+    Views are buffered in memory and written by :func:`flush_thread_views`, if ``VIEW_COUNT_FLUSH_INTERVAL`` is 0 they
+    are written right away.
     :param thread_id: ID of the thread to increment view counter
     """
     if not session["threads_visited"].get(str(thread_id)):
-        thread = Threads.query.get(thread_id)
-        thread.views += 1
-        db.session.commit()
+        with _pending_lock:
+            _pending_views[thread_id] += 1
+        if current_app.config['VIEW_COUNT_FLUSH_INTERVAL'] <= 0:
+            flush_thread_views()
         session["threads_visited"].setdefault(str(thread_id), True)
         session.modified = True
+
+
+def pending_thread_views(thread_id) -> int:
+    """
+    Get the number of views of a thread which are not yet written to the database by this worker process.
+    :param thread_id: ID of the thread
+    :return: Number of buffered views
+    """
+    with _pending_lock:
+        return _pending_views.get(thread_id, 0)
+
+
+def flush_thread_views() -> int:
+    """
+    Write buffered thread views to the database with one ``UPDATE threads SET views = views + n`` per thread in a
+    separate transaction. If writing fails the views are kept in the buffer for the next flush.
+    :return: Number of updated threads
+    """
+    with _pending_lock:
+        pending = dict(_pending_views)
+        _pending_views.clear()
+    if not pending:
+        return 0
+
+    threads = Threads.__table__
+    statement = (sa.update(threads)
+                 .where(threads.c.thread_id == sa.bindparam('pending_thread_id'))
+                 .values(views=threads.c.views + sa.bindparam('pending_views')))
+    try:
+        with db.engine.begin() as connection:
+            connection.execute(statement, [{'pending_thread_id': thread_id, 'pending_views': views}
+                                           for thread_id, views in pending.items()])
+    except SQLAlchemyError as exception:
+        with _pending_lock:
+            for thread_id, views in pending.items():
+                _pending_views[thread_id] += views
+        current_app.logger.warning('Unable to write thread views: %s', exception)
+        return 0
+    return len(pending)
+
+
+def thread_posts(thread_id: int, after: str | None, per_page: int) -> tuple[list[ThreadPost], str | None]:
+    """
+    Get a page of posts of a thread in order of creation, authors are loaded in the same query.
+
+    :raises InvalidCursor: When the ``after`` cursor is malformed.
+
+    :param thread_id: ID of the thread
+    :param after: Cursor of the last post of the previous page or None for the first page
+    :param per_page: Number of posts per page
+    :return: Posts of the page and the cursor of the next page (None if this is the last page)
+    """
+    posts, next_cursor = keyset_page(Posts, Posts.created, after, per_page,
+                                     options=(so.joinedload(Posts.author),),
+                                     criteria=(Posts.thread_id == thread_id,))
+    return [ThreadPost.from_orm(post) for post in posts], next_cursor
+
+
+def _build_landing_page() -> dict:
+    """
+    Query the data of the community landing page.
+    :return: Template variables of the landing page
+    """
+    users = Users.query.order_by(Users.last_login.desc()).limit(5).all()
+    users = [user.username for user in users]
+
+    new_threads = (Threads.query
+                   .order_by(Threads.created.desc())
+                   .limit(5)
+                   .all()
+                   )
+    new_threads = [ThreadBase.from_orm(thread) for thread in new_threads]
+
+    active_threads = (Threads.query
+                      .order_by(Threads.last_updated.desc())
+                      .where(Threads.last_updated < datetime.now(timezone.utc),
+                             Threads.last_updated > datetime.now(timezone.utc) - timedelta(days=1))
+                      .limit(5)
+                      .all()
+                      )
+    active_threads = [ThreadBase.from_orm(thread) for thread in active_threads]
+
+    popular_threads = (Threads.query
+                       .where(Threads.views >= 100)
+                       .where(Threads.last_updated < datetime.now(timezone.utc),
+                              Threads.last_updated > datetime.now(timezone.utc) - timedelta(days=1))
+                       .order_by(Threads.last_updated.desc())
+                       .limit(5)
+                       .all()
+                       )
+    popular_threads = [ThreadBase.from_orm(thread) for thread in popular_threads]
+
+    return {'all_users': users, 'new_threads': new_threads, 'active_threads': active_threads,
+            'popular_threads': popular_threads}
+
+
+def landing_page() -> dict:
+    """
+    Get the data of the community landing page from a snapshot kept in memory. The snapshot is rebuilt after a commit
+    of this worker process changed users, threads or posts, or when it is older than ``COMMUNITY_SNAPSHOT_TIMEOUT``
+    seconds.
+    :return: Template variables of the landing page
+    """
+    global _landing_page  # pylint: disable=global-statement
+    generations = tuple(generation(table) for table in _LANDING_PAGE_TABLES)
+    now = time.monotonic()
+    if _landing_page is not None:
+        snapshot_generations, built_at, data = _landing_page
+        if snapshot_generations == generations and now - built_at < current_app.config['COMMUNITY_SNAPSHOT_TIMEOUT']:
+            return data
+
+    data = _build_landing_page()
+    _landing_page = (generations, now, data)
+    return data
+
+
+def _run_view_flusher(app: Flask):
+    """Flush buffered thread views every ``VIEW_COUNT_FLUSH_INTERVAL`` seconds."""
+    while True:
+        time.sleep(app.config['VIEW_COUNT_FLUSH_INTERVAL'])
+        # An error must not end the thread, the views would pile up until the process exits
+        try:
+            with app.app_context():
+                flush_thread_views()
+        except Exception:  # pylint: disable=broad-exception-caught
+            app.logger.exception('Unable to flush thread views')
+
+
+def _flush_at_exit(app: Flask):
+    """Write remaining buffered thread views when the worker process exits."""
+    with app.app_context():
+        flush_thread_views()
+
+
+def start_view_flusher(app: Flask):
+    """
+    Start writing buffered thread views periodically in a daemon thread and when the process exits.
+    :param app: Flask app
+    """
+    if app.config['VIEW_COUNT_FLUSH_INTERVAL'] <= 0:
+        return
+    threading.Thread(target=_run_view_flusher, args=(app,), name='thread-view-flusher', daemon=True).start()
+    atexit.register(_flush_at_exit, app)
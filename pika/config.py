@@ -10,6 +10,18 @@ with open(path.join(base_dir, "config.toml"), "rb") as file:
     toml_config = tomllib.load(file)
 
 
+ENGINE_OPTIONS = ("pool_size", "max_overflow", "pool_pre_ping", "pool_recycle", "pool_timeout")
+
+
+def engine_options(sqlalchemy_config: dict) -> dict:
+    """
+    Get the SQLAlchemy engine options of the ``sqlalchemy`` section of an environment in ``config.toml``.
+    :param sqlalchemy_config: ``sqlalchemy`` section of the environment.
+    :return: Connection pool options which are set.
+    """
+    return {key: value for key, value in sqlalchemy_config.items() if key in ENGINE_OPTIONS}
+
+
 class DefaultConfig:  # pylint: disable=too-few-public-methods
     """Default configuration"""
     FLASK_ENV = environ.get("FLASK_ENV", "development")
@@ -17,6 +29,38 @@ class DefaultConfig:  # pylint: disable=too-few-public-methods
     LOG_LEVEL = "INFO"
     REQUEST_TIMEOUT = 60
     PER_PAGE_ITEMS = 20
+    STREAM_CHUNK_SIZE = 1000
+    API_BATCH_MAX_OPERATIONS = 1000
+    IMPORT_CHUNK_SIZE = 1000
+    IMPORT_MAX_URLS = 20
+    IMPORT_JOB_TIMEOUT = 300
+    IMPORT_JOB_RETENTION = 86400
+    JOB_WORKERS = 4
+    IMPORT_CACHE_TIMEOUT = 86400
+    GOODREADS_PARSER = None
+    GOODREADS_PARSE_CACHE_SIZE = 256
+    COVER_VARIANTS = {'thumb': 160, 'card': 400, 'full': 1200}
+    COVER_GC_GRACE = 3600
+    STATIC_FINGERPRINT = True
+    STATIC_MAX_AGE = 31536000
+    STATIC_OFFLOAD = None
+    STATIC_ACCEL_PREFIX = "/_internal"
+    CHOICES_CACHE_TIMEOUT = 60
+    TOKEN_CACHE_TIMEOUT = 60
+    TOKEN_CACHE_SIZE = 1024
+    VIEW_COUNT_FLUSH_INTERVAL = 5
+    COMMUNITY_SNAPSHOT_TIMEOUT = 30
+    FRAGMENT_CACHE_TIMEOUT = 300
+    SEARCH_BACKEND = None
+    SEARCH_LOCAL_PATH = path.join(base_dir, "search.db")
+    SEARCH_LOCAL_MIN_SIMILARITY = 0.5
+    ELASTICSEARCH_BULK_CHUNK_SIZE = 500
+    ELASTICSEARCH_BULK_WORKERS = 4
+    ELASTICSEARCH_CONNECTIONS_PER_NODE = 10
+    SEARCH_OUTBOX_WORKER = True
+    SEARCH_OUTBOX_BATCH_SIZE = 500
+    SEARCH_OUTBOX_INTERVAL = 2
+    SEARCH_OUTBOX_MAX_ATTEMPTS = 5
     LANGUAGES = ["de_CH", 'en_CH', 'en']
 
 
@@ -33,6 +77,7 @@ class DevelopmentConfig(DefaultConfig):  # pylint: disable=too-few-public-method
     BASE_URI = env_config["sqlalchemy"]["uri"]
     PIKA_COMMUNITY_DEFAULT_DATA = env_config["sqlalchemy"]["create_default_records"]
     SQLALCHEMY_DATABASE_URI = f"{env_config["sqlalchemy"]["uri"]}/{env_config["sqlalchemy"]["database"]}"
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(env_config["sqlalchemy"])
 
     # Elastic
     ELASTICSEARCH_URL = env_config["elastic"]["url"]
@@ -49,6 +94,8 @@ class DevelopmentConfig(DefaultConfig):  # pylint: disable=too-few-public-method
 
 class ProductionConfig(DefaultConfig):  # pylint: disable=too-few-public-methods
     """Production configuration"""
+    # The outbox is drained by the search-outbox service of the compose app, not by every gunicorn worker
+    SEARCH_OUTBOX_WORKER = False
     env_config = toml_config["production"]
     LOG_LEVEL = env_config["log_level"].upper()
 
@@ -60,6 +107,7 @@ class ProductionConfig(DefaultConfig):  # pylint: disable=too-few-public-methods
     BASE_URI = env_config["sqlalchemy"]["uri"]
     PIKA_COMMUNITY_DEFAULT_DATA = env_config["sqlalchemy"]["create_default_records"]
     SQLALCHEMY_DATABASE_URI = f"{env_config["sqlalchemy"]["uri"]}/{env_config["sqlalchemy"]["database"]}"
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(env_config["sqlalchemy"])
 
     # Elastic
     ELASTICSEARCH_URL = env_config["elastic"]["url"]
@@ -90,6 +138,7 @@ class Config(DefaultConfig):  # pylint: disable=too-few-public-methods,too-many-
         self.BASE_URI = env_config["sqlalchemy"]["uri"]
         self.PIKA_COMMUNITY_DEFAULT_DATA = env_config["sqlalchemy"]["create_default_records"]
         self.SQLALCHEMY_DATABASE_URI = f"{env_config["sqlalchemy"]["uri"]}/{env_config["sqlalchemy"]["database"]}"
+        self.SQLALCHEMY_ENGINE_OPTIONS = engine_options(env_config["sqlalchemy"])
 
         # Elastic
         self.ELASTICSEARCH_URL = env_config["elastic"]["url"]
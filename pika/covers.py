@@ -0,0 +1,213 @@
+"""
+Resized variants of book covers. Every cover is scaled to the widths of ``COVER_VARIANTS`` (thumb, card and full) and
+encoded as WebP and JPEG without metadata. The variant files are named by the hash of their content, so a URL always
+refers to the same bytes and browsers may cache them forever. The paths of the variants are stored with the book,
+templates build ``srcset`` attributes from them with :func:`cover_srcset`.
+
+Variants are created when a cover is uploaded, variants of existing covers are created by
+``flask pika backfill-covers`` in a process pool. Image processing needs Pillow (install the ``images`` extra), without
+it the original covers are shown.
+
+Uploaded covers are content addressed as well: they are streamed to disk in chunks while hashing and named by the hash,
+so identical covers of several books are stored once. Files are never deleted when a book or cover is removed, because
+other books may still use them. ``flask pika gc-covers`` removes the files no book refers to (mark and sweep).
+"""
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator
+
+import click
+import sqlalchemy as sa
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
+
+from pika import db
+from pika.api.data.library.base import CoverVariant
+from pika.models import Books
+from pika.services import books as book_service
+from .images import VARIANT_FOLDER, build_variants, images_supported
+
+COVER_FOLDER = 'covers'
+CHUNK_SIZE = 64 * 1024
+
+
+def static_folder() -> str:
+    """Return the static folder of the library blueprint, which contains the covers."""
+    return current_app.blueprints['library'].static_folder
+
+
+def store_cover(file: FileStorage) -> str:
+    """
+    Store an uploaded cover under the hash of its content. The upload is streamed to a temporary file in chunks, it is
+    never read into memory as a whole. If the same cover is already stored, the temporary file is discarded.
+    :param file: Uploaded cover.
+    :return: Path of the cover in the static folder of the library.
+    """
+    folder = os.path.join(static_folder(), COVER_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    extension = os.path.splitext(secure_filename(file.filename or ''))[1].lower()
+
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile('wb', dir=folder, prefix='.upload-', suffix='.tmp', delete=False) as temporary:
+        try:
+            while chunk := file.stream.read(CHUNK_SIZE):
+                digest.update(chunk)
+                temporary.write(chunk)
+        except BaseException:
+            temporary.close()
+            os.remove(temporary.name)
+            raise
+
+    cover = f'{COVER_FOLDER}/{digest.hexdigest()}{extension}'
+    path = os.path.join(static_folder(), cover)
+    if os.path.exists(path):
+        os.remove(temporary.name)
+        # Protect the file from a garbage collection running before the book is saved
+        os.utime(path)
+    else:
+        os.chmod(temporary.name, 0o644)
+        os.replace(temporary.name, path)
+    return cover
+
+
+def create_variants(cover: str) -> dict[str, dict] | None:
+    """
+    Create the variants of an uploaded cover.
+    :param cover: Path of the cover in the static folder of the library.
+    :return: Variants or None if Pillow is not installed or the file is not a readable image.
+    """
+    if not images_supported():
+        return None
+    try:
+        return build_variants(static_folder(), cover, current_app.config['COVER_VARIANTS'])
+    except OSError as exception:
+        current_app.logger.warning('Covers: Unable to create variants of %s: %s', cover, exception)
+        return None
+
+
+def cover_srcset(variants: dict[str, CoverVariant], variant_format: str) -> str:
+    """
+    Build the ``srcset`` attribute of a cover image.
+    :param variants: Cover variants of a book.
+    :param variant_format: ``webp`` or ``jpeg``.
+    :return: URLs of the variants with their width descriptors.
+    """
+    candidates = {}
+    for variant in variants.values():
+        # Small covers are not scaled up, so several variants may have the same width
+        candidates.setdefault(variant.width, getattr(variant, variant_format))
+    return ', '.join(f"{url_for('library.static', filename=path)} {width}w"
+                     for width, path in sorted(candidates.items()))
+
+
+def backfill_covers(workers: int | None = None, rebuild: bool = False, chunk_size: int = 100,
+                    progress: Callable[[int, int], None] | None = None) -> tuple[int, int]:
+    """
+    Create the variants of existing covers in a process pool.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param rebuild: Also recreate variants of covers which already have them, e.g. after ``COVER_VARIANTS`` changed.
+    :param chunk_size: Number of books updated per transaction.
+    :param progress: Called with the number of processed and total covers after every chunk.
+    :return: Number of processed and failed covers.
+    """
+    query = sa.select(Books.book_id, Books.cover).where(Books.cover.is_not(None))
+    if not rebuild:
+        query = query.where(Books.cover_variants.is_(None))
+    covers = db.session.execute(query).all()
+    db.session.rollback()
+
+    processed, failed, pending = 0, 0, {}
+    # Worker processes are spawned, forking would copy the threads and database connections of the app
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(build_variants, static_folder(), cover, current_app.config['COVER_VARIANTS']):
+                   (book_id, cover) for book_id, cover in covers}
+        for future in as_completed(futures):
+            book_id, cover = futures[future]
+            processed += 1
+            try:
+                pending[book_id] = (cover, future.result())
+            except OSError as exception:
+                failed += 1
+                current_app.logger.warning('Covers: Unable to create variants of %s: %s', cover, exception)
+            if len(pending) >= chunk_size or processed == len(covers):
+                book_service.set_cover_variants(pending)
+                pending = {}
+                if progress:
+                    progress(processed, len(covers))
+    return processed, failed
+
+
+@click.command('backfill-covers')
+@click.option('--workers', type=click.IntRange(min=1), default=None, help='Worker processes, defaults to the CPUs.')
+@click.option('--rebuild', is_flag=True, help='Recreate existing variants too.')
+@with_appcontext
+def backfill_covers_command(workers, rebuild):
+    """Create the resized variants of existing covers."""
+    if not images_supported():
+        raise click.ClickException('Pillow is not installed, install the images extra.')
+
+    processed, failed = backfill_covers(workers, rebuild,
+                                        progress=lambda done, total: click.echo(f'{done}/{total} covers processed'))
+    click.echo(f'Created variants of {processed - failed} covers, {failed} failed.')
+
+
+def referenced_covers(chunk_size: int = 1000) -> Iterator[str]:
+    """
+    Iterate over the paths of all covers and cover variants used by books.
+    :param chunk_size: Number of books fetched per chunk.
+    :return: Iterator of paths relative to the static folder of the library.
+    """
+    query = (sa.select(Books.cover, Books.cover_variants)
+             .where(Books.cover.is_not(None))
+             .execution_options(yield_per=chunk_size))
+    for cover, variants in db.session.execute(query):
+        yield cover
+        for variant in (variants or {}).values():
+            yield from (path for key, path in variant.items() if key != 'width')
+
+
+def collect_garbage(grace: int, dry_run: bool = False) -> list[str]:
+    """
+    Delete cover files which no book refers to. Files modified less than ``grace`` seconds ago are kept, they may
+    belong to an upload whose book is not saved yet.
+    :param grace: Minimum age of deleted files in seconds.
+    :param dry_run: Only return the files, do not delete them.
+    :return: Paths of the (deleted) files relative to the static folder of the library.
+    """
+    # Mark first, files stored while marking are younger than the grace period
+    referenced = set(referenced_covers())
+    db.session.rollback()
+
+    deadline = time.time() - grace
+    garbage = []
+    for folder in (COVER_FOLDER, VARIANT_FOLDER):
+        path = os.path.join(static_folder(), folder)
+        if not os.path.isdir(path):
+            continue
+        for entry in os.scandir(path):
+            cover = f'{folder}/{entry.name}'
+            if not entry.is_file() or cover in referenced or entry.stat().st_mtime > deadline:
+                continue
+            garbage.append(cover)
+            if not dry_run:
+                os.remove(entry.path)
+    return garbage
+
+
+@click.command('gc-covers')
+@click.option('--grace', type=click.IntRange(min=0), default=None,
+              help='Keep files younger than this many seconds, defaults to COVER_GC_GRACE.')
+@click.option('--dry-run', is_flag=True, help='Only list the unused files.')
+@with_appcontext
+def collect_garbage_command(grace, dry_run):
+    """Delete cover files which no book uses."""
+    garbage = collect_garbage(current_app.config['COVER_GC_GRACE'] if grace is None else grace, dry_run)
+    for cover in garbage:
+        click.echo(cover)
+    click.echo(f'{len(garbage)} unused files {"found" if dry_run else "deleted"}.')
@@ -0,0 +1,51 @@
+"""
+Cache for rendered template fragments. A fragment is cached per locale and tied to the generations of the tables it is
+built from (see :mod:`pika.services.generations`), so it is rendered again after a commit of this worker process
+changed one of them or after ``FRAGMENT_CACHE_TIMEOUT`` seconds.
+"""
+import time
+from datetime import datetime, timezone
+from hashlib import md5
+from typing import Callable, NamedTuple
+
+from flask import current_app
+from flask_babel import get_locale
+from markupsafe import Markup
+
+from pika.services.generations import generation
+
+
+class Fragment(NamedTuple):
+    """Rendered template fragment."""
+    html: Markup
+    etag: str
+    last_modified: datetime
+
+
+_cache: dict[tuple[str, str], tuple[tuple[int, ...], float, Fragment]] = {}
+
+
+def cached_fragment(name: str, tables: tuple[str, ...], render: Callable[[], str]) -> Fragment:
+    """
+    Get a rendered fragment from the cache, render it if it is missing or outdated.
+    :param name: Name of the fragment.
+    :param tables: Names of the tables the fragment is built from.
+    :param render: Function rendering the fragment.
+    :return: Rendered fragment with an ETag of its content and the time it was rendered.
+    """
+    key = (name, str(get_locale()))
+    generations = tuple(generation(table) for table in tables)
+    now = time.monotonic()
+    cached = _cache.get(key)
+    if cached:
+        cached_generations, rendered_at, fragment = cached
+        if cached_generations == generations and now - rendered_at < current_app.config['FRAGMENT_CACHE_TIMEOUT']:
+            return fragment
+
+    html = render()
+    # Keep the modification time if the content did not change, e.g. when the fragment expired
+    last_modified = cached[2].last_modified if cached and cached[2].html == html else \
+        datetime.now(timezone.utc).replace(microsecond=0)
+    fragment = Fragment(Markup(html), md5(html.encode()).hexdigest(), last_modified)
+    _cache[key] = (generations, now, fragment)
+    return fragment
@@ -0,0 +1,79 @@
+"""
+Image processing of book covers, see :mod:`pika.covers`. This module needs no application context and imports no
+blueprints, so its functions can run in spawned worker processes.
+"""
+import hashlib
+import io
+import os
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+VARIANT_FOLDER = 'covers/variants'
+# Pillow format name, file extension and encoder options by variant format
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def images_supported() -> bool:
+    """Return True if Pillow is installed."""
+    return Image is not None
+
+
+def _write_once(path: str, data: bytes):
+    """Write a content addressed file, existing files already have the same content."""
+    if os.path.exists(path):
+        # Protect the file from a garbage collection running before the book is saved
+        os.utime(path)
+        return
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+
+
+def _opaque(image: 'Image.Image') -> 'Image.Image':
+    """Convert an image to RGB, transparent areas become white."""
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def build_variants(folder: str, cover: str, widths: dict[str, int]) -> dict[str, dict]:
+    """
+    Create the variants of a cover. Needs no application context, so it can run in a worker process.
+
+    :raises OSError: When the cover cannot be read or is not an image.
+
+    :param folder: Static folder of the library the cover path is relative to.
+    :param cover: Path of the original cover.
+    :param widths: Width of every variant by name. Covers are never scaled up.
+    :return: Width and paths of the WebP and JPEG file by variant name.
+    """
+    os.makedirs(os.path.join(folder, VARIANT_FOLDER), exist_ok=True)
+    variants = {}
+    with Image.open(os.path.join(folder, cover)) as original:
+        # Apply the EXIF orientation, the metadata itself is not copied to the variants
+        image = _opaque(ImageOps.exif_transpose(original))
+
+    for name, width in widths.items():
+        width = min(width, image.width)
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.Resampling.LANCZOS) if width < image.width else image
+        variant = {'width': width}
+        for variant_format, (pillow_format, extension, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pillow_format, **options)
+            data = buffer.getvalue()
+            file_name = f'{hashlib.sha256(data).hexdigest()[:32]}.{extension}'
+            _write_once(os.path.join(folder, VARIANT_FOLDER, file_name), data)
+            variant[variant_format] = f'{VARIANT_FOLDER}/{file_name}'
+        variants[name] = variant
+    return variants
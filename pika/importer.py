@@ -0,0 +1,355 @@
+"""
+Bulk import of library catalogues from CSV or JSON lines files (``flask pika import``). Rows are streamed from the file
+and validated with the API DTOs. Authors and series are matched by name with existing ones or created once, books are
+inserted in chunked transactions. Search index updates are collected during the import and sent to the search backend
+in one bulk pass at the end.
+
+Each row describes one book with the fields of :class:`pika.api.data.ApiBookDTO`, but references its series by title
+and its authors by name. In CSV files authors are separated by ``;``, names are given as ``First Last`` or
+``Last, First``. In JSON lines files ``authors`` may also be a list of ``{"first_name": ..., "last_name": ...}``
+objects and ``series`` a ``{"title": ...}`` object.
+"""
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional
+
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import AppGroup
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from pika import db
+from pika.api.data import ApiBookDTO, ApiSeriesDTO, ApiAuthorDTO
+from pika.library import goodreads
+from pika.models import Books, Series, Authors, BooksAuthors, SearchableMixin, SearchIndexOutbox
+from pika.search import index_action, bulk_index, SearchBackendError
+from pika.services.util import objects_by_id
+
+import_cli = AppGroup('pika', help='Manage the library.')
+
+BOOK_FIELDS = ('title', 'volume_nr', 'read_status', 'release_date', 'synopsis', 'cover')
+FORMATS = {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+class ImportRow(NamedTuple):
+    """Validated row of an import file."""
+    line: int
+    book: ApiBookDTO
+    series: Optional[ApiSeriesDTO]
+    authors: list[ApiAuthorDTO]
+
+
+class ImportReport(BaseModel):
+    """Progress and result of an import."""
+    rows: int = 0
+    books: int = 0
+    authors: int = 0
+    series: int = 0
+    invalid: int = 0
+    failed: int = 0
+    indexed: int = 0
+    seconds: float = 0
+    errors: list[str] = []
+
+    @property
+    def books_per_second(self) -> float:
+        """Throughput of the import."""
+        return self.books / self.seconds if self.seconds else 0
+
+
+def _records(file, file_format: str) -> Iterator[tuple[int, dict | str]]:
+    """
+    Read the records of an import file.
+    :param file: Opened import file.
+    :param file_format: ``csv`` or ``jsonl``.
+    :return: Line number and record, a dict for CSV rows and the unparsed line for JSON lines.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(file)
+        for record in reader:
+            # Empty cells use the defaults of the DTO
+            yield reader.line_num, {key: value for key, value in record.items() if key and value not in (None, '')}
+    else:
+        for line_number, line in enumerate(file, start=1):
+            if line.strip():
+                yield line_number, line
+
+
+def _author_record(author: str | dict) -> dict | str:
+    """
+    Convert an author name (``First Last`` or ``Last, First``) to author data.
+    :param author: Author name or author data.
+    :return: Author data.
+    """
+    if not isinstance(author, str):
+        return author
+    if ',' in author:
+        last_name, _, first_name = author.partition(',')
+    else:
+        first_name, _, last_name = author.strip().rpartition(' ')
+    return {'first_name': first_name.strip() or None, 'last_name': last_name.strip()}
+
+
+def _validate(line: int, record: dict | str) -> ImportRow:
+    """
+    Validate a record of an import file.
+
+    :raises ValueError: When the record is malformed or fails the validation.
+
+    :param line: Line number of the record.
+    :param record: Record read by :func:`_records`.
+    :return: Validated row.
+    """
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError("Expected an object")
+
+    series = record.get('series')
+    if isinstance(series, str):
+        series = {'title': series}
+    authors = record.get('authors') or []
+    if isinstance(authors, str):
+        authors = [author for author in authors.split(';') if author.strip()]
+
+    series = ApiSeriesDTO.model_validate(series) if series else None
+    authors = [ApiAuthorDTO.model_validate(_author_record(author)) for author in authors]
+    # Series and authors are resolved by name later, the placeholder IDs only satisfy the DTO
+    book = ApiBookDTO.model_validate({**{field: record[field] for field in BOOK_FIELDS if field in record},
+                                      'series': {'series_id': 0} if series else None,
+                                      'authors': [{'author_id': 0} for _ in authors]})
+    return ImportRow(line, book, series, authors)
+
+
+def _error_message(line: int, exception: ValueError) -> str:
+    """Describe an invalid row."""
+    if isinstance(exception, ValidationError):
+        errors = "; ".join(f"{'/'.join(str(part) for part in error['loc'])}: {error['msg']}"
+                           for error in exception.errors())
+        return f"Line {line}: {errors}"
+    return f"Line {line}: {exception}"
+
+
+def _resolve_authors(rows: list[ImportRow], known: dict[tuple[str | None, str], int]) -> int:
+    """
+    Find the authors of the rows by name and create the missing ones. IDs are added to ``known``.
+    :param rows: Validated rows.
+    :param known: Author IDs by first and last name.
+    :return: Number of created authors.
+    """
+    names = {(author.first_name, author.last_name) for row in rows for author in row.authors} - known.keys()
+    if not names:
+        return 0
+    query = (sa.select(Authors.author_id, Authors.first_name, Authors.last_name)
+             .where(Authors.last_name.in_({last_name for _, last_name in names}))
+             .order_by(Authors.author_id))
+    for author_id, first_name, last_name in db.session.execute(query):
+        if (first_name, last_name) in names:
+            known.setdefault((first_name, last_name), author_id)
+
+    new_authors = [Authors(first_name=first_name, last_name=last_name)
+                   for first_name, last_name in names if (first_name, last_name) not in known]
+    db.session.add_all(new_authors)
+    db.session.flush()
+    known.update({(author.first_name, author.last_name): author.author_id for author in new_authors})
+    return len(new_authors)
+
+
+def _resolve_series(rows: list[ImportRow], known: dict[str, int]) -> int:
+    """
+    Find the series of the rows by title and create the missing ones. IDs are added to ``known``.
+    :param rows: Validated rows.
+    :param known: Series IDs by title.
+    :return: Number of created series.
+    """
+    titles = {row.series.title for row in rows if row.series} - known.keys()
+    if not titles:
+        return 0
+    query = sa.select(Series.series_id, Series.title).where(Series.title.in_(titles)).order_by(Series.series_id)
+    for series_id, title in db.session.execute(query):
+        if title in titles:
+            known.setdefault(title, series_id)
+
+    new_series = [Series(title=title) for title in titles if title not in known]
+    db.session.add_all(new_series)
+    db.session.flush()
+    known.update({series.title: series.series_id for series in new_series})
+    return len(new_series)
+
+
+def _import_chunk(rows: list[ImportRow], authors: dict, series: dict, report: ImportReport):
+    """
+    Insert the books of a chunk of rows in one transaction.
+
+    :raises SQLAlchemyError: When the database refuses the chunk, nothing of the chunk is imported then.
+
+    :param rows: Validated rows.
+    :param authors: Known author IDs by name.
+    :param series: Known series IDs by title.
+    :param report: Report to update.
+    """
+    new_authors = _resolve_authors(rows, authors)
+    new_series = _resolve_series(rows, series)
+
+    books = [Books(**row.book.model_dump(exclude={"series", "authors"}),
+                   series_id=series[row.series.title] if row.series else None) for row in rows]
+    db.session.add_all(books)
+    db.session.flush()
+    db.session.execute(sa.insert(BooksAuthors), [
+        {'book_id': book.book_id, 'author_id': author_id}
+        for row, book in zip(rows, books)
+        for author_id in dict.fromkeys(authors[(author.first_name, author.last_name)] for author in row.authors)
+    ])
+    db.session.commit()
+    # Keep memory usage constant, the imported objects are not needed anymore
+    db.session.expunge_all()
+
+    report.books += len(books)
+    report.authors += new_authors
+    report.series += new_series
+
+
+def _import_rows(rows: list[ImportRow], authors: dict, series: dict, report: ImportReport):
+    """Import a chunk of rows, see :func:`_import_chunk`. A failed chunk is rolled back and reported."""
+    try:
+        _import_chunk(rows, authors, series, report)
+    except SQLAlchemyError as exception:
+        db.session.rollback()
+        # Authors and series created in the failed chunk do not exist anymore
+        authors.clear()
+        series.clear()
+        report.failed += len(rows)
+        report.errors.append(f"Lines {rows[0].line}-{rows[-1].line}: {exception}")
+
+
+def _index_actions(object_ids: dict[str, list[int]]) -> Iterator[dict]:
+    """
+    Generate bulk index actions for imported objects, loaded in chunks of ``ELASTICSEARCH_BULK_CHUNK_SIZE``.
+    :param object_ids: Object IDs by index name.
+    :return: Iterator of bulk actions.
+    """
+    models = {model.__tablename__: model for model in SearchableMixin.__subclasses__()}
+    chunk_size = current_app.config['ELASTICSEARCH_BULK_CHUNK_SIZE']
+    for index_name, ids in object_ids.items():
+        for start in range(0, len(ids), chunk_size):
+            # Objects of rolled back chunks are not found and skipped
+            for obj in objects_by_id(models[index_name], ids[start:start + chunk_size]).values():
+                yield index_action(index_name, obj)
+            db.session.expunge_all()
+
+
+def _index_imported(pending: dict[tuple[str, int], str]) -> int:
+    """
+    Send the collected index updates of an import to the search backend in one bulk pass. If the search backend is
+    unavailable the updates are written to the search index outbox instead.
+    :param pending: Operation per index name and object ID.
+    :return: Number of indexed objects.
+    """
+    object_ids: dict[str, list[int]] = {}
+    for index_name, object_id in pending:
+        object_ids.setdefault(index_name, []).append(object_id)
+    try:
+        indexed, _failed = bulk_index(_index_actions(object_ids))
+        for index_name in object_ids:
+            current_app.search_backend.refresh(index_name)
+        return indexed
+    except SearchBackendError as exception:
+        current_app.logger.warning('Search: Index updates of import queued in outbox: %s', exception)
+        db.session.execute(sa.insert(SearchIndexOutbox), [
+            {'index_name': index_name, 'object_id': object_id, 'operation': operation}
+            for (index_name, object_id), operation in pending.items()
+        ])
+        db.session.info['search_outbox_changed'] = True
+        db.session.commit()
+        return 0
+
+
+def import_library(path: str | Path, file_format: str | None = None, chunk_size: int | None = None,
+                   progress: Callable[[ImportReport], None] | None = None) -> ImportReport:
+    """
+    Import books from a CSV or JSON lines file. Invalid rows are skipped and reported, chunks which the database
+    refuses are rolled back and counted as failed.
+
+    :raises ValueError: When the file format is unknown.
+
+    :param path: Path of the import file.
+    :param file_format: ``csv`` or ``jsonl``, detected from the file extension by default.
+    :param chunk_size: Number of rows per transaction, defaults to ``IMPORT_CHUNK_SIZE``.
+    :param progress: Called with the report after every chunk.
+    :return: Report of the import.
+    """
+    path = Path(path)
+    file_format = file_format or FORMATS.get(path.suffix.lower())
+    if file_format not in FORMATS.values():
+        raise ValueError(f"Unknown import format of '{path.name}', use csv or jsonl")
+    chunk_size = chunk_size or current_app.config['IMPORT_CHUNK_SIZE']
+
+    report = ImportReport()
+    authors, series = {}, {}
+    started = time.monotonic()
+    pending = db.session.info['deferred_search_index'] = {}
+    try:
+        with path.open(encoding='utf-8', newline='') as file:
+            rows = []
+            for line, record in _records(file, file_format):
+                report.rows += 1
+                try:
+                    rows.append(_validate(line, record))
+                except ValueError as exception:
+                    report.invalid += 1
+                    report.errors.append(_error_message(line, exception))
+                if len(rows) < chunk_size:
+                    continue
+                _import_rows(rows, authors, series, report)
+                report.seconds = time.monotonic() - started
+                if progress:
+                    progress(report)
+                rows = []
+            if rows:
+                _import_rows(rows, authors, series, report)
+    finally:
+        db.session.info.pop('deferred_search_index', None)
+
+    if pending:
+        report.indexed = _index_imported(pending)
+    report.seconds = time.monotonic() - started
+    return report
+
+
+@import_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'jsonl']), default=None,
+              help='File format, detected from the file extension by default.')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=None,
+              help='Rows per transaction, defaults to IMPORT_CHUNK_SIZE.')
+def import_command(path, file_format, chunk_size):
+    """Import books from a CSV or JSON lines file."""
+    def echo_progress(report: ImportReport):
+        click.echo(f'{report.rows} rows read, {report.books} books imported '
+                   f'({report.books_per_second:.0f} books/s)')
+
+    try:
+        report = import_library(path, file_format, chunk_size, progress=echo_progress)
+    except ValueError as exception:
+        raise click.BadParameter(str(exception), param_hint='PATH') from exception
+
+    for error in report.errors:
+        click.echo(error, err=True)
+    click.echo(f'Imported {report.books} books, {report.authors} new authors and {report.series} new series '
+               f'in {report.seconds:.1f}s ({report.books_per_second:.0f} books/s). '
+               f'{report.invalid} invalid and {report.failed} failed rows skipped, {report.indexed} objects indexed.')
+
+
+@import_cli.command('benchmark-parser')
+@click.argument('pages', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--repeat', type=click.IntRange(min=1), default=20, help='Number of times every page is parsed.')
+def benchmark_parser_command(pages, repeat):
+    """Measure the Goodreads parser backends with saved book PAGES."""
+    html = [Path(page).read_text(encoding='utf-8') for page in pages]
+    for backend, milliseconds in goodreads.benchmark(html, repeat).items():
+        click.echo(f'{backend}: {milliseconds:.2f} ms per page')
+    click.echo(f'Default backend: {goodreads.default_backend()}')
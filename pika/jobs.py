@@ -0,0 +1,38 @@
+"""
+Local pool of background threads for slow work which must not block web requests, e.g. fetching remote pages. Each
+worker process starts its own pool on first use, so no pool threads are lost when gunicorn forks the workers. The pool
+does not persist jobs, callers keep track of the job state themselves, e.g. in the database.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from flask import Flask
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _run(app: Flask, function: Callable, args: tuple):
+    """Run a job in an app context and log errors, nobody waits for the result of the future."""
+    with app.app_context():
+        try:
+            function(*args)
+        except Exception:  # pylint: disable=broad-exception-caught
+            app.logger.exception('Job %s failed', function.__name__)
+
+
+def submit(app: Flask, function: Callable, *args) -> Future:
+    """
+    Run a function in the background thread pool of this process. At most ``JOB_WORKERS`` jobs run at the same time,
+    further jobs wait in the queue of the pool.
+    :param app: Flask app, the function runs in an app context.
+    :param function: Function to run.
+    :param args: Arguments of the function.
+    :return: Future of the job.
+    """
+    global _executor  # pylint: disable=global-statement
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='pika-job')
+    return _executor.submit(_run, app, function, args)
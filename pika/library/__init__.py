@@ -1,13 +1,9 @@
 """Library module of the flask app"""
 # pylint: disable=wrong-import-position,cyclic-import
-import requests
 from flask import Blueprint
 
 bp = Blueprint('library', __name__, template_folder="templates", static_folder="static")
 
-session = requests.Session()
-session.headers = {"Content-Type": "application/json"}
-
 from . import routes
 
 from .books import bp as books_bp
@@ -1,16 +1,16 @@
 """Endpoints and pages for books."""
-import json
 import os.path
-from datetime import date
 
-from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, send_from_directory, \
-    current_app
+from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, current_app
 from flask_babel import gettext as _
 from flask_login import login_required
 from werkzeug.datastructures import FileStorage
+from werkzeug.utils import secure_filename
 
-from pika.api import BookData
-from . import session
+from pika.api.util import validate_dto, APIValidationError
+from pika.assets import send_static
+from pika.covers import create_variants, static_folder, store_cover
+from pika.services import books as book_service, BookNotFound, ObjectNotFound, DeleteFailed
 from .forms import AddBookForm, DeleteBookForm, DeleteCoverForm, DownloadCoverForm, EditBookForm
 from .util import generate_pages, put_book_payload
 
@@ -22,19 +22,12 @@ bp = Blueprint('books', __name__)
 def index():
     """Page wit a paginated list of all books."""
     page = request.args.get('page', 1, type=int)
-    response = session.get(
-        url_for("api.books.get_books", page=page, per_page=current_app.config.get('PER_PAGE'), _external=True),
-        timeout=current_app.config.get('REQUEST_TIMEOUT'))
-    if response.status_code != 200:
-        abort(response.status_code)
-    data = response.json()["data"]
+    book_page = book_service.list_books(page, current_app.config.get('PER_PAGE_ITEMS'))
 
-    pages = generate_pages(page, 1, data["last"])
-    books = [BookData.model_validate(book) for book in data["books"]]
-    last_page = data.get("last")
+    pages = generate_pages(page, 1, book_page.last)
 
-    return render_template("library/books/index.html", books=books, pages=pages, current_page=page,
-                           last_page=last_page)
+    return render_template("library/books/index.html", books=book_page.books, pages=pages, current_page=page,
+                           last_page=book_page.last)
 
 
 @bp.route('/books/<int:book_id>', methods=['GET'])
@@ -45,12 +38,11 @@ def details(book_id):
     :param book_id: ID of the book to display.
     :return:
     """
-    response = session.get(url_for("api.books.get_books_book_id", book_id=book_id, _external=True),
-                           timeout=current_app.config.get('REQUEST_TIMEOUT'))
-    if response.status_code != 200:
-        abort(response.status_code, _("This book does not exist."))
+    try:
+        book_data = book_service.get_book(book_id)
+    except BookNotFound:
+        abort(404, _("This book does not exist."))
 
-    book_data = BookData.model_validate(response.json()['data'])
     return render_template("library/books/details.html", book=book_data, delete_cover_form=DeleteCoverForm(),
                            download_cover_form=DownloadCoverForm(), delete_book_form=DeleteBookForm())
 
@@ -73,18 +65,19 @@ def add_form():
         payload = form.api_payload()
         payload.update({"cover": None})
 
-        response = session.post(url_for("api.books.post_books", _external=True), data=json.dumps(payload),
-                                timeout=current_app.config.get('REQUEST_TIMEOUT'))
-
-        if response.status_code != 200:
+        try:
+            new_book = book_service.create_book(validate_dto(payload, "book"))
+        except APIValidationError as exception:
+            flash(_("Server Error"))
+            abort(400, exception.errors)
+        except ObjectNotFound as exception:
             flash(_("Server Error"))
-            abort(response.status_code, response.text)
+            abort(404, str(exception))
 
         if form.add_next.data is True:
             return redirect(url_for("library.books.add_page"))
 
-        response = response.json()
-        return redirect(url_for("library.books.details", book_id=response["data"]["book_id"]))
+        return redirect(url_for("library.books.details", book_id=new_book.book_id))
 
     for field, message in form.errors.items():
         flash(f"{''.join(message)} ({field})")
@@ -100,19 +93,20 @@ def edit_page(book_id):
     :param book_id:
     :return:
     """
-    response = session.get(url_for("api.books.get_books_book_id", book_id=book_id, _external=True),
-                           timeout=current_app.config.get('REQUEST_TIMEOUT')).json()
-    data = response["data"]
+    try:
+        data = book_service.get_book(book_id)
+    except BookNotFound:
+        abort(404, _("This book does not exist."))
 
     default_data = {
         "book_id": book_id,
-        "title": data["title"],
-        "series": data["series"] and data["series"]["series_id"],  # Returns series_id if key 'series' is *not* None
-        "volume_nr": data["volume_nr"],
-        "authors": (author["author_id"] for author in data["authors"]),
-        "synopsis": data["synopsis"],
-        "release_date": date.fromisoformat(data["release_date"]),
-        "read_status": data["read_status"],
+        "title": data.title,
+        "series": data.series and data.series.series_id,  # Returns series_id if series is *not* None
+        "volume_nr": data.volume_nr,
+        "authors": (author.author_id for author in data.authors),
+        "synopsis": data.synopsis,
+        "release_date": data.release_date,
+        "read_status": data.read_status,
     }
 
     form = EditBookForm(data=default_data)
@@ -129,24 +123,23 @@ def edit_form(book_id):
 
     form = EditBookForm()
     if form.validate_on_submit():
-        response = session.get(url_for("api.books.get_books_book_id", book_id=book_id, _external=True),
-                               timeout=current_app.config.get('REQUEST_TIMEOUT')).json()
-        book_data = BookData.model_validate(response["data"])
-        payload = put_book_payload(form, book_data)
-
-        response = session.put(url_for("api.books.put_books", book_id=book_id, _external=True),
-                               data=json.dumps(payload), timeout=current_app.config.get('REQUEST_TIMEOUT'))
-        if response.status_code != 200:
-            abort(response.status_code)
-
-        if isinstance(form.cover.data, FileStorage):
-            file_name = payload.get("cover")
-            form.cover.data.save(os.path.join(bp.static_folder, file_name))
-            if book_data.cover:
-                os.remove(os.path.join(bp.static_folder, book_data.cover))
-
-        response = response.json()
-        return redirect(url_for("library.books.details", book_id=response["data"]["book_id"]))
+        try:
+            book_data = book_service.get_book(book_id)
+            cover = store_cover(form.cover.data) if isinstance(form.cover.data, FileStorage) else None
+            payload = put_book_payload(form, book_data, cover)
+            updated_book = book_service.update_book(book_id, validate_dto(payload, "book"))
+        except APIValidationError as exception:
+            abort(400, exception.errors)
+        except ObjectNotFound as exception:
+            abort(404, str(exception))
+
+        # Replaced covers are left to the garbage collection, other books may use the same file
+        if cover and not updated_book.cover_variants:
+            variants = create_variants(cover)
+            if variants:
+                book_service.set_cover_variants({book_id: (cover, variants)})
+
+        return redirect(url_for("library.books.details", book_id=updated_book.book_id))
 
     for field, message in form.errors.items():
         flash(f"{''.join(message)} ({field.title()})", "danger")
@@ -163,13 +156,12 @@ def delete_form(book_id: int):
     """
     form = DeleteBookForm()
     if form.validate_on_submit():
-        response = session.delete(url_for("api.books.delete_books", book_id=book_id, _external=True))
-        if response.status_code != 200:
-            abort(response.status_code)
-
-        deleted_book = response.json().get("data")
-        if deleted_book["cover"]:
-            os.remove(os.path.join(bp.static_folder, deleted_book["cover"]))
+        try:
+            book_service.delete_book(book_id)
+        except BookNotFound:
+            abort(404, _("This book does not exist."))
+        except DeleteFailed as exception:
+            abort(400, str(exception))
 
         return redirect(url_for("library.books.index"))
 
@@ -184,21 +176,24 @@ def cover_delete(book_id: int):
     """Endpoint to delete a book cover."""
     form = DeleteCoverForm()
     if form.validate_on_submit():
-        response = session.get(url_for("api.books.get_books_book_id", book_id=book_id, _external=True),
-                               timeout=current_app.config.get('REQUEST_TIMEOUT')).json()
-        book_data = BookData.model_validate(response["data"])
+        try:
+            book_data = book_service.get_book(book_id)
+        except BookNotFound:
+            abort(404, _("This book does not exist."))
+
         if book_data.cover is None:
             flash(_("This book does not have a cover image."), "warning")
             return redirect(url_for("library.books.details", book_id=book_id))
         payload = book_data.api_payload()
         payload.update({"cover": None})
-        response = session.put(url_for("api.books.put_books", book_id=book_id, _external=True),
-                               data=json.dumps(payload), timeout=current_app.config.get('REQUEST_TIMEOUT'))
 
-        if response.status_code != 200:
-            abort(response.status_code)
+        try:
+            book_service.update_book(book_id, validate_dto(payload, "book"))
+        except APIValidationError as exception:
+            abort(400, exception.errors)
+        except ObjectNotFound as exception:
+            abort(404, str(exception))
 
-        os.remove(os.path.join(bp.static_folder, book_data.cover))
         return redirect(url_for("library.books.details", book_id=book_id))
 
     for field, message in form.errors.items():
@@ -213,15 +208,18 @@ def cover_download(book_id: int):
     """Endpoint to send book cover image for downloading."""
     form = DownloadCoverForm()
     if form.validate_on_submit():
-        response = session.get(url_for("api.books.get_books_book_id", book_id=book_id, _external=True),
-                               timeout=current_app.config.get('REQUEST_TIMEOUT')).json()
-        book_data = response["data"]
+        try:
+            book_data = book_service.get_book(book_id)
+        except BookNotFound:
+            abort(404, _("This book does not exist."))
 
-        if book_data.get("cover") is None:
+        if book_data.cover is None:
             flash(_("This book does not have a cover image."), "warning")
             return redirect(url_for("library.books.details", book_id=book_id))
 
-        return send_from_directory(bp.static_folder, book_data.get("cover"), as_attachment=True)
+        # Stored covers are named by their hash, name the download after the book
+        download_name = secure_filename(book_data.title) + os.path.splitext(book_data.cover)[1]
+        return send_static(static_folder(), book_data.cover, as_attachment=True, download_name=download_name)
 
     for field, message in form.errors.items():
         flash(f"{''.join(message)} ({field.title()})", "danger")
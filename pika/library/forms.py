@@ -1,15 +1,17 @@
 """Forms for editing and adding books in the library blueprint."""
-import requests
-from flask import url_for, g, current_app
-from flask_babel import lazy_gettext as _l, lazy_ngettext as _ln
+from urllib.parse import urlsplit
+
+from flask import current_app
+from flask_babel import gettext as _, lazy_gettext as _l, lazy_ngettext as _ln
 from flask_wtf import FlaskForm
 from flask_wtf.file import FileAllowed, FileField
 from wtforms.fields.choices import SelectField, SelectMultipleField
 from wtforms.fields.datetime import DateField
 from wtforms.fields.numeric import DecimalField
-from wtforms.fields.simple import StringField, BooleanField, TextAreaField, SubmitField, HiddenField, URLField
-from wtforms.validators import InputRequired, Optional
+from wtforms.fields.simple import StringField, BooleanField, TextAreaField, SubmitField, HiddenField
+from wtforms.validators import InputRequired, Optional, ValidationError
 
+from pika.services import choices
 from .widgets import SubmitButton
 
 ICON_ADD_NEXT = """
@@ -23,25 +25,12 @@ DEFAULT_INPUT_CLASS = "form-control"
 
 def populate_series_choices():
     """Populates choices for series select field."""
-    headers = {'Authorization': f'Bearer {g.token}'}
-    response = requests.get(url_for("api.series.get_series_all", _external=True),
-                            timeout=current_app.config.get('REQUEST_TIMEOUT'), headers=headers).json()
-    data = response["data"]
-    data.sort(key=lambda _series: _series["title"])
-    choices = (('', _l('Choose...')), *((series["series_id"], series["title"]) for series in data))
-    return choices
+    return ('', _l('Choose...')), *choices.series_choices()
 
 
 def populate_author_choices():
     """Populates choices for authors select field."""
-    headers = {'Authorization': f'Bearer {g.token}'}
-    response = requests.get(url_for("api.authors.get_authors_all", _external=True),
-                            timeout=current_app.config.get('REQUEST_TIMEOUT'), headers=headers).json()
-    data = response["data"]
-    data.sort(key=lambda _author: _author["last_name"])
-    choices = (('', _l('Choose...')),
-               *((author["author_id"], f"{author["last_name"]}, {author["first_name"] or ""}") for author in data))
-    return choices
+    return ('', _l('Choose...')), *choices.author_choices()
 
 
 class BookForm(FlaskForm):
@@ -143,6 +132,22 @@ class DownloadCoverForm(FlaskForm):
 
 
 class ImportFromURLForm(FlaskForm):
-    """Form to import from books from URL."""
-    import_url = URLField(_l('Import URL*'), validators=[InputRequired()], render_kw={"class_": "form-control"})
+    """Form to import books from URLs, one URL per line."""
+    import_urls = TextAreaField(_l('Import URLs*'), validators=[InputRequired()], description=_l('One URL per line'),
+                                render_kw={"class_": "form-control", "rows": 5})
     import_submit = SubmitField(_l('Import'), render_kw={"class_": "btn btn-primary"})
+
+    def urls(self) -> list[str]:
+        """Return the entered URLs without duplicates."""
+        return list(dict.fromkeys(line.strip() for line in (self.import_urls.data or "").splitlines() if line.strip()))
+
+    def validate_import_urls(self, _field):
+        """Check that all lines are HTTP URLs and that there are not too many."""
+        urls = self.urls()
+        for url in urls:
+            parts = urlsplit(url)
+            if parts.scheme not in ('http', 'https') or not parts.netloc:
+                raise ValidationError(_('Invalid URL: %(url)s', url=url))
+        max_urls = current_app.config['IMPORT_MAX_URLS']
+        if len(urls) > max_urls:
+            raise ValidationError(_('At most %(max_urls)s URLs can be imported at once.', max_urls=max_urls))
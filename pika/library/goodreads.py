@@ -0,0 +1,168 @@
+"""
+Parser for book pages of goodreads.com. Only the nodes holding the book data are looked up with CSS selectors. The HTML
+is parsed by the fastest available backend, ``selectolax`` (C parser, install the ``parsers`` extra) or BeautifulSoup,
+configured with ``GOODREADS_PARSER``. Parsed pages are cached by the hash of their content.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable
+
+from bs4 import BeautifulSoup, FeatureNotFound
+from flask import current_app
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+TITLE = 'div.BookPageTitleSection h1[data-testid="bookTitle"]'
+SERIES = 'div.BookPageTitleSection h3'
+AUTHOR = 'main span[data-testid="name"]'
+PUBLICATION = 'main p[data-testid="publicationInfo"]'
+SYNOPSIS = 'main div[data-testid="contentContainer"]'
+COVER = 'main img'
+
+_cache: OrderedDict[str, dict] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+class SelectolaxDocument:
+    """HTML document parsed with the lexbor backend of selectolax."""
+
+    def __init__(self, html: str):
+        self._tree = LexborHTMLParser(html)
+
+    def text(self, selector: str, separator: str = '') -> str | None:
+        """Return the text of the first node matching the selector or None."""
+        node = self._tree.css_first(selector)
+        return node.text(separator=separator) if node is not None else None
+
+    def attribute(self, selector: str, name: str) -> str | None:
+        """Return an attribute of the first node matching the selector or None."""
+        node = self._tree.css_first(selector)
+        return node.attributes.get(name) if node is not None else None
+
+
+class SoupDocument:
+    """HTML document parsed with BeautifulSoup, using the lxml tree builder if it is installed."""
+
+    def __init__(self, html: str):
+        try:
+            self._soup = BeautifulSoup(html, 'lxml')
+        except FeatureNotFound:
+            self._soup = BeautifulSoup(html, 'html.parser')
+
+    def text(self, selector: str, separator: str = '') -> str | None:
+        """Return the text of the first node matching the selector or None."""
+        node = self._soup.select_one(selector)
+        return separator.join(node.strings) if node is not None else None
+
+    def attribute(self, selector: str, name: str) -> str | None:
+        """Return an attribute of the first node matching the selector or None."""
+        node = self._soup.select_one(selector)
+        return node.attrs.get(name) if node is not None else None
+
+
+BACKENDS = {'soup': SoupDocument}
+if LexborHTMLParser is not None:
+    BACKENDS['selectolax'] = SelectolaxDocument
+
+
+def default_backend() -> str:
+    """Return the configured parser backend, the fastest installed one by default."""
+    return current_app.config.get('GOODREADS_PARSER') or ('selectolax' if 'selectolax' in BACKENDS else 'soup')
+
+
+def _release_date(publication: str) -> datetime:
+    """Parse the release date of a publication info like ``First published March 3, 2001``."""
+    return datetime.strptime(publication.partition('ublished')[2].strip(), "%B %d, %Y")
+
+
+def _series(series: str | None) -> tuple[str | None, float | None]:
+    """Split a series heading like ``Series#2`` into title and volume number."""
+    if not series:
+        return None, None
+    series_title, _, volume_nr = series.partition("#")
+    try:
+        return series_title.strip(), float(volume_nr)
+    except ValueError:
+        return series_title.strip(), None
+
+
+def parse_page(html: str, backend: str | None = None) -> dict:
+    """
+    Parse a book page of goodreads.com.
+
+    :raises ValueError: When the page does not contain the book data.
+
+    :param html: HTML of the page.
+    :param backend: Name of the parser backend, see ``BACKENDS``. Defaults to :func:`default_backend`.
+    :return: Dictionary of Goodreads book data.
+    """
+    document = BACKENDS[backend or default_backend()](html)
+
+    title = document.text(TITLE)
+    author_name = document.text(AUTHOR)
+    publication = document.text(PUBLICATION)
+    if not title or not author_name or not publication:
+        raise ValueError("Page does not contain book data")
+
+    series_title, volume_nr = _series(document.text(SERIES))
+    return {
+        "title": title.strip(),
+        "series_title": series_title,
+        "volume_nr": volume_nr,
+        "author_name": author_name.strip(),
+        "release_date": _release_date(publication),
+        "synopsis": document.text(SYNOPSIS, separator="\n"),
+        "cover": document.attribute(COVER, "src"),
+    }
+
+
+def cached_parse_page(content: bytes, encoding: str | None = None) -> dict:
+    """
+    Parse a book page, see :func:`parse_page`. The result is cached by the hash of the page content, so importing the
+    same page again skips the parser. The cache keeps the ``GOODREADS_PARSE_CACHE_SIZE`` most recently used pages.
+
+    :raises ValueError: When the page does not contain the book data.
+
+    :param content: Raw content of the page.
+    :param encoding: Encoding of the content, UTF-8 by default.
+    :return: Dictionary of Goodreads book data.
+    """
+    key = hashlib.sha256(content).hexdigest()
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return dict(_cache[key])
+
+    book = parse_page(content.decode(encoding or 'utf-8', errors='replace'))
+    with _cache_lock:
+        _cache[key] = book
+        while len(_cache) > current_app.config['GOODREADS_PARSE_CACHE_SIZE']:
+            _cache.popitem(last=False)
+    return dict(book)
+
+
+def benchmark(pages: Iterable[str], repeat: int) -> dict[str, float]:
+    """
+    Measure the parse time of every installed backend.
+    :param pages: HTML of the pages to parse.
+    :param repeat: Number of times every page is parsed per backend.
+    :return: Mean parse time per page in milliseconds by backend name.
+    """
+    pages = list(pages)
+    timings = {}
+    for backend in BACKENDS:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                try:
+                    parse_page(html, backend)
+                except ValueError:
+                    pass
+        timings[backend] = (time.perf_counter() - started) * 1000 / (repeat * len(pages))
+    return timings
@@ -0,0 +1,168 @@
+"""
+Background imports of books from remote pages (currently goodreads.com). Every URL is fetched and parsed by a job in
+the thread pool of :mod:`pika.jobs`, so a slow remote site does not block web workers. The job state is stored in the
+database, so any worker process can report it.
+"""
+import threading
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+import requests
+import sqlalchemy as sa
+from flask import current_app
+from pydantic import BaseModel, ConfigDict
+
+from pika import db
+from pika.jobs import submit
+from pika.models import ImportJobs, Authors, Series
+from pika.search import query_index
+from .goodreads import cached_parse_page
+
+_http = threading.local()
+
+
+class ImportJob(BaseModel):
+    """State of an import job."""
+    model_config = ConfigDict(from_attributes=True)
+    job_id: str
+    url: str
+    status: str
+    error: Optional[str]
+
+
+def _http_session() -> requests.Session:
+    """HTTP session of the current job thread, keeps connections to the remote site open between jobs."""
+    if not hasattr(_http, 'session'):
+        _http.session = requests.Session()
+    return _http.session
+
+
+def create_import_jobs(urls: list[str], user_id: int) -> str:
+    """
+    Queue an import job for every URL. Finished jobs older than ``IMPORT_JOB_RETENTION`` seconds are removed.
+    :param urls: URLs of the book pages.
+    :param user_id: ID of the user importing the books.
+    :return: ID of the batch of jobs.
+    """
+    batch_id = uuid.uuid4().hex
+    job_ids = [uuid.uuid4().hex for _ in urls]
+    retention = timedelta(seconds=current_app.config['IMPORT_JOB_RETENTION'])
+    db.session.execute(sa.delete(ImportJobs).where(ImportJobs.created_at < datetime.now(timezone.utc) - retention))
+    db.session.add_all(ImportJobs(job_id=job_id, batch_id=batch_id, user_id=user_id, url=url)
+                       for job_id, url in zip(job_ids, urls))
+    db.session.commit()
+
+    app = current_app._get_current_object()  # pylint: disable=protected-access
+    for job_id in job_ids:
+        submit(app, run_import_job, job_id)
+    return batch_id
+
+
+def _search_id(index: str, expression: str) -> int | None:
+    """Get the ID of the best search hit or None if nothing matches."""
+    if not expression:
+        return None
+    ids, _total = query_index(index, expression, 1, 1)
+    return ids[0] if ids else None
+
+
+def _recent_result(url: str) -> dict | None:
+    """Get the result of a job which imported the same URL in the last ``IMPORT_CACHE_TIMEOUT`` seconds."""
+    timeout = timedelta(seconds=current_app.config['IMPORT_CACHE_TIMEOUT'])
+    query = (sa.select(ImportJobs.result)
+             .where(ImportJobs.url == url, ImportJobs.status == 'done',
+                    ImportJobs.finished_at >= datetime.now(timezone.utc) - timeout)
+             .order_by(ImportJobs.finished_at.desc())
+             .limit(1))
+    result = db.session.scalar(query)
+    # Results of older versions do not contain the names
+    return result if result and "author_name" in result else None
+
+
+def _fetch_book(url: str) -> dict:
+    """
+    Fetch and parse a book page.
+
+    :raises requests.RequestException: When the page cannot be fetched.
+    :raises ValueError: When the page does not contain book data.
+
+    :param url: URL of the page.
+    :return: Book data.
+    """
+    response = _http_session().get(url, timeout=current_app.config['REQUEST_TIMEOUT'])
+    response.raise_for_status()
+    book = cached_parse_page(response.content, response.encoding)
+    return {
+        "title": book["title"],
+        "release_date": book["release_date"].date().isoformat(),
+        "synopsis": book["synopsis"],
+        "volume_nr": book["volume_nr"],
+        "author_name": book["author_name"],
+        "series_title": book["series_title"],
+    }
+
+
+def run_import_job(job_id: str):
+    """
+    Fetch and parse the page of an import job and look up its author and series. The book data is stored as result of
+    the job and shown as preview of a new book. Pages imported recently are not fetched again.
+    :param job_id: ID of the job.
+    """
+    job = db.session.get(ImportJobs, job_id)
+    if job is None:
+        return
+    job.status = 'running'
+    db.session.commit()
+
+    try:
+        book = _recent_result(job.url) or _fetch_book(job.url)
+    except requests.RequestException as exception:
+        job.status, job.error = 'failed', f"Unable to fetch page: {exception}"
+    except ValueError as exception:
+        current_app.logger.info('Import: Unable to parse %s: %s', job.url, exception)
+        job.status, job.error = 'failed', "Unable to read book data from page"
+    else:
+        # Look up the IDs again, the author or series may have been added since the page was parsed
+        job.result = {**book,
+                      "author_id": _search_id(Authors.__tablename__, book["author_name"]),
+                      "series_id": _search_id(Series.__tablename__, book["series_title"])}
+        job.status = 'done'
+    job.finished_at = datetime.now(timezone.utc)
+    db.session.commit()
+
+
+def _job_state(job: ImportJobs) -> ImportJob:
+    """Get the state of a job, jobs which did not finish in ``IMPORT_JOB_TIMEOUT`` seconds count as failed."""
+    state = ImportJob.from_orm(job)
+    timeout = timedelta(seconds=current_app.config['IMPORT_JOB_TIMEOUT'])
+    if job.status in ('queued', 'running') and \
+            job.created_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc) - timeout:
+        state.status, state.error = 'failed', "Import was interrupted"
+    return state
+
+
+def batch_jobs(batch_id: str, user_id: int) -> list[ImportJob]:
+    """
+    Get the state of the jobs of a batch.
+    :param batch_id: ID of the batch.
+    :param user_id: ID of the user, jobs of other users are not returned.
+    :return: Jobs of the batch in order of the URLs, empty if the batch does not exist.
+    """
+    query = (sa.select(ImportJobs)
+             .where(ImportJobs.batch_id == batch_id, ImportJobs.user_id == user_id)
+             .order_by(ImportJobs.created_at, ImportJobs.url))
+    return [_job_state(job) for job in db.session.scalars(query)]
+
+
+def job_result(job_id: str, user_id: int) -> dict | None:
+    """
+    Get the book data imported by a finished job.
+    :param job_id: ID of the job.
+    :param user_id: ID of the user, jobs of other users are not returned.
+    :return: Book data or None if the job does not exist or did not finish successfully.
+    """
+    job = db.session.get(ImportJobs, job_id)
+    if job is None or job.user_id != user_id or job.status != 'done':
+        return None
+    return job.result
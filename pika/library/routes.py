@@ -1,18 +1,14 @@
 """General pages and endpoints for the library blueprint."""
+from datetime import date
 
-import requests
-from bs4 import BeautifulSoup
-from flask import render_template, url_for, redirect, abort, current_app, g
+from flask import render_template, url_for, redirect, abort, current_app, flash
+from flask_babel import gettext as _
 from flask_login import login_required, current_user
 
-from pika import db
-from pika.models import Series, Authors
-from . import bp, session
+from . import bp, imports
 from .forms import AddBookForm, ImportFromURLForm
-from .util import parse_goodreads_soup
 
 PER_PAGE = current_app.config.get('PER_PAGE_ITEMS')
-REQUEST_TIMEOUT = current_app.config.get('REQUEST_TIMEOUT')
 
 
 @bp.errorhandler(404)
@@ -22,20 +18,6 @@ def page_not_found(error):
     return render_template("errors/404.html", title=title, description=error.description), 404
 
 
-@bp.before_request
-def before_request():
-    """Check API token and load if missing"""
-    if current_user.is_authenticated:
-        current_app.logger.debug('API token: user is authenticated')
-        current_app.logger.debug('API token: %s', current_user.token)
-        g.token = current_user.token
-        if not current_user.check_token(g.token):
-            g.token = current_user.get_token()
-            db.session.commit()
-            current_app.logger.debug('API token new: %s', g.token)
-        session.headers.update({"Authorization": f"Bearer {g.token}"})
-
-
 @bp.route("/import/goodreads", methods=["GET"])
 @login_required
 def import_from_goodreads_page():
@@ -49,35 +31,58 @@ def import_from_goodreads_page():
 def import_from_goodreads_form():
     """
     Endpoint to handle import book form. Currently only works for goodreads.com.
+    Queues a background job for every URL and redirects to the page showing their progress.
     """
     form = ImportFromURLForm()
     if form.validate_on_submit():
-        response = requests.get(form.import_url.data, timeout=REQUEST_TIMEOUT)
+        batch_id = imports.create_import_jobs(form.urls(), current_user.user_id)
+        return redirect(url_for("library.import_jobs_page", batch_id=batch_id))
 
-        if response.status_code != 200:
-            abort(response.status_code, response.text)
+    for error in form.import_urls.errors:
+        flash(error)
+    return redirect(url_for("library.import_from_goodreads_page"))
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        goodreads_data = parse_goodreads_soup(soup)
 
-        default_data = {
-            "title": goodreads_data["title"],
-            "release_date": goodreads_data["release_date"],
-            "synopsis": goodreads_data["synopsis"],
-            "volume_nr": goodreads_data["volume_nr"],
-        }
+@bp.route("/import/batches/<batch_id>", methods=["GET"])
+@login_required
+def import_jobs_page(batch_id):
+    """Page showing the progress of the import jobs of a batch."""
+    jobs = imports.batch_jobs(batch_id, current_user.user_id)
+    if not jobs:
+        abort(404, _("This import does not exist."))
+    return render_template("library/import_jobs.html", jobs=jobs, batch_id=batch_id)
 
-        authors_result, total = Authors.search(goodreads_data["author_name"], 1, 10)
-        if total != 0:
-            author = authors_result.first()
-            default_data["authors"] = (_author for _author in [author.author_id])
 
-        series_result, total = Series.search(goodreads_data["series_title"], 1, 10)
-        if total != 0:
-            series = series_result.first()
-            default_data.update({"series": series.series_id})
+@bp.route("/import/batches/<batch_id>/status", methods=["GET"])
+@login_required
+def import_jobs_status(batch_id):
+    """Return the state of the import jobs of a batch as JSON, polled by the progress page."""
+    jobs = imports.batch_jobs(batch_id, current_user.user_id)
+    if not jobs:
+        return {"jobs": []}, 404
+    return {"jobs": [{**job.model_dump(),
+                      "preview_url": url_for("library.import_job_preview", job_id=job.job_id)
+                      if job.status == "done" else None} for job in jobs]}
 
-        book_form = AddBookForm(data=default_data, formdata=None)
-        return render_template("library/books/add.html", form=book_form)
 
-    return redirect(url_for("library.import_from_goodreads_page"))
+@bp.route("/import/jobs/<job_id>", methods=["GET"])
+@login_required
+def import_job_preview(job_id):
+    """Preview of a book imported by a finished job, in the form to add a new book."""
+    result = imports.job_result(job_id, current_user.user_id)
+    if result is None:
+        abort(404, _("This import does not exist or is not finished."))
+
+    default_data = {
+        "title": result["title"],
+        "release_date": date.fromisoformat(result["release_date"]),
+        "synopsis": result["synopsis"],
+        "volume_nr": result["volume_nr"],
+    }
+    if result["author_id"] is not None:
+        default_data["authors"] = [result["author_id"]]
+    if result["series_id"] is not None:
+        default_data["series"] = result["series_id"]
+
+    book_form = AddBookForm(data=default_data, formdata=None)
+    return render_template("library/books/add.html", form=book_form)
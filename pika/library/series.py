@@ -1,11 +1,10 @@
 """Endpoints and pages for series."""
-import json
-
 from flask import Blueprint, render_template, url_for, flash, redirect, request, abort, current_app
 from flask_babel import gettext as _
 from flask_login import login_required
 
-from . import session
+from pika.api.data import ApiSeriesDTO
+from pika.services import series as series_service, SeriesNotFound, ObjectNotFound, DeleteFailed
 from .forms import AddSeriesForm, DeleteSeriesForm, EditSeriesForm
 from .util import generate_pages
 
@@ -17,12 +16,7 @@ bp = Blueprint('series', __name__)
 def index():
     """Page to display a paginated list of series."""
     page = request.args.get('page', 1, type=int)
-    response = session.get(
-        url_for("api.series.get_series", page=page, per_page=current_app.config.get('PER_PAGE'), _external=True),
-        timeout=current_app.config.get('REQUEST_TIMEOUT'))
-    if response.status_code != 200:
-        abort(response.status_code)
-    data = response.json()["data"]
+    data = series_service.list_series(page, current_app.config.get('PER_PAGE_ITEMS')).model_dump(mode='json')
     data["series"].sort(key=lambda x: x["title"])
     pages = generate_pages(page, 2, data["last"])
     return render_template("library/series/index.html", series_page=data, pages=pages, current_page=page)
@@ -35,12 +29,10 @@ def details(series_id):
     Page to display details of a single series.
     :param series_id: ID of the series to display.
     """
-    response = session.get(url_for("api.series.get_series_series_id", series_id=series_id, _external=True),
-                           timeout=current_app.config.get('REQUEST_TIMEOUT'))
-    if response.status_code != 200:
-        abort(response.status_code, _("This series does not exist."))
-    data = response.json()
-    series_data = data["data"]
+    try:
+        series_data = series_service.get_series(series_id).model_dump(mode='json')
+    except SeriesNotFound:
+        abort(404, _("This series does not exist."))
     series_data["books"].sort(key=lambda x: x["volume_nr"])
     return render_template("library/series/details.html", series=series_data, delete_series_form=DeleteSeriesForm())
 
@@ -60,19 +52,16 @@ def add_form():
     form = AddSeriesForm()
 
     if form.validate_on_submit():
-        payload = json.dumps({"title": form.title.data})
-        response = session.post(url_for("api.series.post_series", _external=True), data=payload,
-                                timeout=current_app.config.get('REQUEST_TIMEOUT'))
-
-        if response.status_code != 200:
+        try:
+            new_series = series_service.create_series(ApiSeriesDTO(title=form.title.data))
+        except ObjectNotFound as exception:
             flash(_('Failed to add new series.'), 'danger')
-            abort(response.status_code)
+            abort(404, str(exception))
 
         if form.add_next.data is True:
             return redirect(url_for("library.series.add_page"))
 
-        response = response.json()
-        return redirect(url_for("library.series.details", series_id=response["data"]["series_id"]))
+        return redirect(url_for("library.series.details", series_id=new_series.series_id))
 
     for field, message in form.errors.items():
         flash(f"{''.join(message)} ({field.title()})", "danger")
@@ -87,12 +76,13 @@ def edit_page(series_id):
     Page for editing a series.
     :param series_id: ID of the series to edit.
     """
-    response = session.get(url_for("api.series.get_series_series_id", series_id=series_id, _external=True),
-                           timeout=current_app.config.get('REQUEST_TIMEOUT')).json()
-    data = response["data"]
+    try:
+        data = series_service.get_series(series_id)
+    except SeriesNotFound:
+        abort(404, _("This series does not exist."))
 
     default_data = {
-        "title": data["title"],
+        "title": data.title,
     }
 
     form = EditSeriesForm(data=default_data)
@@ -106,17 +96,13 @@ def edit_form(series_id):
     """Endpoint to handle edit series form."""
     form = EditSeriesForm()
     if form.validate_on_submit():
-        payload = json.dumps({
-            "title": form.title.data,
-        })
-        response = session.put(url_for("api.series.put_series", series_id=series_id, _external=True), data=payload,
-                               timeout=current_app.config.get('REQUEST_TIMEOUT'))
-        if response.status_code != 200:
+        try:
+            updated_series = series_service.update_series(series_id, ApiSeriesDTO(title=form.title.data))
+        except ObjectNotFound as exception:
             flash(_("Server Error"))
-            abort(response.status_code)
+            abort(404, str(exception))
 
-        response = response.json()
-        return redirect(url_for("library.series.details", series_id=response["data"]["series_id"]))
+        return redirect(url_for("library.series.details", series_id=updated_series.series_id))
 
     for field, message in form.errors.items():
         flash(f"{''.join(message)} ({field.title()})", "danger")
@@ -131,14 +117,13 @@ def delete_form(series_id):
     form = DeleteSeriesForm()
 
     if form.validate_on_submit():
-        response = session.delete(url_for("api.series.delete_series", series_id=series_id, _external=True))
-
-        if response.status_code != 200:
-            error = response.json()
-            if response.status_code == 400 and error["message"].lower() == "delete failed":
-                flash(_("Series cannot be deleted when books are still assigned to it."), "danger")
-                return redirect(url_for("library.series.details", series_id=series_id))
-            abort(response.status_code, response.text)
+        try:
+            series_service.delete_series(series_id)
+        except SeriesNotFound:
+            abort(404, _("This series does not exist."))
+        except DeleteFailed:
+            flash(_("Series cannot be deleted when books are still assigned to it."), "danger")
+            return redirect(url_for("library.series.details", series_id=series_id))
 
         flash(_("Series was deleted successfully."), "success")
         return redirect(url_for("library.series.index"))
@@ -1,14 +1,8 @@
 """Utility functions used in the library blueprint"""
-import os.path
-import random
-import string
 import warnings
 from datetime import datetime, date
 from typing import List
 
-from bs4 import BeautifulSoup
-from werkzeug.utils import secure_filename
-
 from pika.api import BookData
 from .forms import AddBookForm, EditBookForm
 
@@ -48,43 +42,24 @@ def generate_pages(page: int, offset: int, last_page: int) -> List[int | str]:
     return pages
 
 
-def generate_filename(book_id: int, filename: str):
-    """
-    Generate a filename based on a book id and the original filename.
-    :param book_id: Book ID
-    :type book_id: int
-    :param filename: Original filename
-    :type filename: str
-    :return: Filename which includes timestamp, book ID, a random string and the original filename.
-    :rtype: str
-    """
-    random_string = "".join([random.choice(string.ascii_letters + string.digits) for _ in range(8)])
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    s_filename = secure_filename(filename)
-    s_filename = s_filename.replace("-", "")
-    return f"{timestamp}-{book_id}-{random_string}-{s_filename}"
-
-
-def put_book_payload(form: AddBookForm | EditBookForm, book_data: BookData) -> dict[str, str]:
+def put_book_payload(form: AddBookForm | EditBookForm, book_data: BookData, cover: str | None = None
+                     ) -> dict[str, str]:
     """
     Get, compare payloads and prepare book payload for PUT API request.
     :param form: Form with updated book data.
     :type form: AddBookForm | EditBookForm
     :param book_data: Original book data.
     :type book_data: BookData
+    :param cover: Path of the uploaded cover (see :func:`pika.covers.store_cover`) or None to keep the cover.
+    :type cover: str | None
     :return: Book payload for PUT API request.
     :rtype: dict[str, str]
     """
     form_payload = form.api_payload()
     book_payload = book_data.api_payload()
 
-    # If file is provided always replace, if none is provided never update, identical files get replaced
-    if form_payload["cover"]:
-        form_payload.update({
-            "cover": os.path.join("covers", generate_filename(book_data.book_id, form_payload["cover"].filename))
-        })
-    else:
-        form_payload.update({"cover": book_payload["cover"]})
+    # Covers are named by their content, uploading the same file again keeps the cover
+    form_payload.update({"cover": cover or book_payload["cover"]})
 
     if form_payload == book_payload:
         return book_payload
@@ -92,44 +67,6 @@ def put_book_payload(form: AddBookForm | EditBookForm, book_data: BookData) -> d
     return form_payload
 
 
-def parse_goodreads_soup(page_soup: BeautifulSoup) -> dict[str, str]:
-    """
-    Parse HTML page soup from goodreads.com
-    :param page_soup: HTML page soup
-    :type page_soup: BeautifulSoup
-    :return: Dictionary of Goodreads book data
-    :rtype: dict[str, str]
-    """
-    main = page_soup.find(name="main")
-    title_section = page_soup.find(name="div", attrs={"class": "BookPageTitleSection"})
-
-    goodreads_data = {}
-
-    title = title_section.find(name="h1", attrs={"data-testid": "bookTitle"}).get_text()
-    goodreads_data.update({"title": title})
-
-    series = title_section.find(name="h3").get_text()
-    series_title, _, volume_nr = series.partition("#")
-    volume_nr = float(volume_nr)
-    goodreads_data.update({"series_title": series_title, "volume_nr": volume_nr})
-
-    author_name = main.find(name="span", attrs={"data-testid": "name"}).get_text()
-    goodreads_data.update({"author_name": author_name})
-
-    release_date = main.find(name="p", attrs={"data-testid": "publicationInfo"}).get_text()
-    release_date_datetime = datetime.strptime(release_date, "First published %B %d, %Y")
-    goodreads_data.update({"release_date": release_date_datetime})
-
-    synopsis = main.find(name="div", attrs={"data-testid": "contentContainer"})
-    synopsis = "\n".join(synopsis.strings)
-    goodreads_data.update({"synopsis": synopsis})
-
-    cover = main.find(name="img").attrs["src"]
-    goodreads_data.update({"cover": cover})
-
-    return goodreads_data
-
-
 def parse_release_date(iso_string: str) -> datetime:
     """Parse book release date from ISO string returned by pika app API."""
     warnings.warn("This function is deprecated, use `date` instead", DeprecationWarning)
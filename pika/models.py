@@ -6,12 +6,13 @@ from datetime import datetime, timezone, timedelta, date
 from typing import Optional, List, Protocol
 
 import sqlalchemy as sa
+from flask import current_app
 from flask_login import UserMixin
 from sqlalchemy import orm as so
 from werkzeug.security import check_password_hash
 
 from pika import db
-from .search import query_index, add_to_index, remove_from_index
+from .search import query_index, query_indices, index_action, bulk_index
 
 
 class Role(db.Model):  # pylint: disable=too-few-public-methods
@@ -40,7 +41,7 @@ class Users(db.Model, UserMixin):
     first_name: so.Mapped[Optional[str]] = so.mapped_column(sa.String(255))
     last_name: so.Mapped[Optional[str]] = so.mapped_column(sa.String(255))
 
-    last_login: so.Mapped[datetime] = so.mapped_column(default=datetime.now(timezone.utc))
+    last_login: so.Mapped[datetime] = so.mapped_column(default=datetime.now(timezone.utc), index=True)
     created_at: so.Mapped[datetime] = so.mapped_column(default=datetime.now(timezone.utc))
 
     active: so.Mapped[bool] = so.mapped_column(default=True)
@@ -118,9 +119,9 @@ class Users(db.Model, UserMixin):
         :rtype: User | None
         """
         user = db.session.scalar(sa.select(Users).where(Users.token == token))
-        if user.token is None or user.token_expiration is None:
+        if user is None or user.token_expiration is None:
             return None
-        if user is None or user.token_expiration.replace(
+        if user.token_expiration.replace(
                 tzinfo=timezone.utc) < datetime.now(timezone.utc):
             return None
         return user
@@ -129,6 +130,8 @@ class Users(db.Model, UserMixin):
 class Posts(db.Model):  # pylint: disable=too-few-public-methods
     """ORM model for community thread posts."""
     __tablename__ = 'posts'
+    # Posts of a thread are paged in order of creation
+    __table_args__ = (sa.Index('ix_posts_thread_id_created_post_id', 'thread_id', 'created', 'post_id'),)
     post_id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text)
     thread_id = db.Column(db.Integer, db.ForeignKey('threads.thread_id'), nullable=False)
@@ -140,14 +143,38 @@ class Posts(db.Model):  # pylint: disable=too-few-public-methods
         return self.created.replace(tzinfo=timezone.utc).astimezone()
 
 
+def _count_inserted_post(_mapper, connection, post: Posts):
+    """Update the post statistics of the thread after a post is inserted."""
+    threads = Threads.__table__
+    connection.execute(sa.update(threads)
+                       .where(threads.c.thread_id == post.thread_id)
+                       .values(post_count=threads.c.post_count + 1, last_post_id=post.post_id))
+
+
+def _count_deleted_post(_mapper, connection, post: Posts):
+    """Update the post statistics of the thread after a post is deleted."""
+    threads, posts = Threads.__table__, Posts.__table__
+    connection.execute(sa.update(threads)
+                       .where(threads.c.thread_id == post.thread_id)
+                       .values(post_count=threads.c.post_count - 1,
+                               last_post_id=sa.select(sa.func.max(posts.c.post_id))
+                               .where(posts.c.thread_id == post.thread_id)
+                               .scalar_subquery()))
+
+
 class Threads(db.Model):
     """ORM models for community threads."""
     __tablename__ = 'threads'
+    # Active and popular threads of the landing page filter by last update and views
+    __table_args__ = (sa.Index('ix_threads_last_updated_views', 'last_updated', 'views'),)
     thread_id: so.Mapped[int] = so.mapped_column(primary_key=True)
     title: so.Mapped[str] = so.mapped_column(sa.String(255))
-    created: so.Mapped[datetime] = so.mapped_column(default=datetime.now(timezone.utc))
+    created: so.Mapped[datetime] = so.mapped_column(default=datetime.now(timezone.utc), index=True)
     last_updated: so.Mapped[datetime] = so.mapped_column(default=datetime.now(timezone.utc))
     views: so.Mapped[int] = so.mapped_column(default=0)
+    # Denormalized post statistics, maintained by the Posts insert and delete events
+    post_count: so.Mapped[int] = so.mapped_column(default=0, server_default='0')
+    last_post_id: so.Mapped[Optional[int]]
     posts: so.Mapped[List[Posts]] = so.relationship(backref='thread')
     author_id: so.Mapped[Optional[int]] = so.mapped_column(sa.ForeignKey('users.user_id', ondelete='SET NULL'))
 
@@ -170,65 +197,154 @@ class SearchableMixin:
     """Mixin for SQLAlchemy ORM objects."""
 
     @classmethod
-    def search(cls: Searchable, expression: str, page: int, per_page: int) -> tuple[List | sa.ScalarResult, int]:
+    def search(cls: Searchable, expression: str, page: int, per_page: int,
+               options: tuple = ()) -> tuple[List | sa.ScalarResult, int]:
         """
-        Search the elasticsearch index.
+        Search the search index.
         :param expression: Search expression.
         :type expression: str
         :param page: Page number of results to return.
         :type page: int
         :param per_page: Number of results per page.
         :type per_page: int
+        :param options: Loader options applied to the query of the result objects.
+        :type options: tuple
         :return: List of search results.
         :rtype: tuple[List | sa.ScalarResult, int]
         """
         ids, total = query_index(cls.__tablename__, expression, page, per_page)
         if total == 0:
             return [], 0
+        return cls.from_ids(ids, options), total
+
+    @classmethod
+    def from_ids(cls: Searchable, ids: list[int], options: tuple = ()) -> List | sa.ScalarResult:
+        """
+        Load objects by ID in the order of the given IDs, e.g. ordered by search score.
+        :param ids: Object IDs.
+        :type ids: list[int]
+        :param options: Loader options applied to the query.
+        :type options: tuple
+        :return: Objects in order of the IDs.
+        :rtype: List | sa.ScalarResult
+        """
+        if not ids:
+            return []
         when = []
         for index, _id in enumerate(ids):
             when.append((_id, index))
-        query = sa.select(cls).where(cls.id.in_(ids)).order_by(
+        query = sa.select(cls).options(*options).where(cls.id.in_(ids)).order_by(
             db.case(*when, value=cls.id))
-        return db.session.scalars(query), total
+        return db.session.scalars(query)
 
-    # pylint: disable=protected-access
-    @classmethod
-    def before_commit(cls: Searchable, session):
-        """Make session data available for after commiting changes."""
-        session._changes = {
-            'add': list(session.new),
-            'update': list(session.dirty),
-            'delete': list(session.deleted)
-        }
+    @staticmethod
+    def search_many(models: dict[type[Searchable], tuple], expression: str, page: int,
+                    per_page: int) -> dict[type[Searchable], tuple[List, int]]:
+        """
+        Search the search indices of several models with one request.
+        :param models: Model classes to search mapped to the loader options applied to their results.
+        :type models: dict[type, tuple]
+        :param expression: Search expression.
+        :type expression: str
+        :param page: Page number of results to return.
+        :type page: int
+        :param per_page: Number of results per page and model.
+        :type per_page: int
+        :return: List of search results and total number of hits per model.
+        :rtype: dict[type, tuple[List, int]]
+        """
+        hits = query_indices([model.__tablename__ for model in models], expression, page, per_page)
+        results = {}
+        for model, options in models.items():
+            ids, total = hits[model.__tablename__]
+            results[model] = (list(model.from_ids(ids, options)), total)
+        return results
 
     @classmethod
-    def after_commit(cls: Searchable, session):
-        """Add data to elasticsearch index after commit."""
-        for obj in session._changes['add']:
-            if isinstance(obj, SearchableMixin):
-                obj: Searchable
-                add_to_index(obj.__tablename__, obj)
-        for obj in session._changes['update']:
+    def after_flush(cls, session, _flush_context):
+        """
+        Queue index updates for all searchable objects changed in a flush. The updates are written to the search index
+        outbox in the same transaction as the changes and sent to the search backend by the outbox worker.
+        If the session info contains a ``deferred_search_index`` dict, the updates are collected there instead and
+        sent by the caller, e.g. in one bulk pass after an import.
+        """
+        operations = {}
+        for obj in (*session.new, *session.dirty):
             if isinstance(obj, SearchableMixin):
                 obj: Searchable
-                add_to_index(obj.__tablename__, obj)
-        for obj in session._changes['delete']:
+                operations[(obj.__tablename__, obj.id)] = 'index'
+        for obj in session.deleted:
             if isinstance(obj, SearchableMixin):
                 obj: Searchable
-                remove_from_index(obj.__tablename__, obj)
-        session._changes = None
+                operations[(obj.__tablename__, obj.id)] = 'delete'
+        if not operations:
+            return
+        deferred = session.info.get('deferred_search_index')
+        if deferred is not None:
+            deferred.update(operations)
+            return
+        session.execute(sa.insert(SearchIndexOutbox), [
+            {'index_name': index_name, 'object_id': object_id, 'operation': operation}
+            for (index_name, object_id), operation in operations.items()
+        ])
+        session.info['search_outbox_changed'] = True
 
     @classmethod
-    def reindex(cls: Searchable):
-        """Add all model objects to elasticsearch index"""
-        for obj in db.session.scalars(sa.select(cls)):
-            add_to_index(cls.__tablename__, obj)
+    def reindex(cls: Searchable) -> tuple[int, int]:
+        """
+        Add all model objects to the search index. Objects are loaded in chunks of
+        ``ELASTICSEARCH_BULK_CHUNK_SIZE`` and sent to the search backend in bulk.
+        :return: Number of indexed and failed objects.
+        :rtype: tuple[int, int]
+        """
+        query = sa.select(cls).execution_options(yield_per=current_app.config['ELASTICSEARCH_BULK_CHUNK_SIZE'])
+        result = bulk_index(index_action(cls.__tablename__, obj) for obj in db.session.scalars(query))
+        current_app.search_backend.refresh(cls.__tablename__)
+        return result
+
+
+class CollectionVersions(db.Model):  # pylint: disable=too-few-public-methods
+    """ORM model for version counters of collections, incremented by every flush changing objects of a collection"""
+    __tablename__ = 'collection_versions'
+    name: so.Mapped[str] = so.mapped_column(sa.String(50), primary_key=True)
+    version: so.Mapped[int] = so.mapped_column(default=0, server_default='0')
 
 
-class Authors(db.Model, SearchableMixin):
+class RevisionMixin:
+    """Mixin for SQLAlchemy ORM objects with a revision counter, incremented whenever the object is changed."""
+    __collection__ = 'library'
+    revision: so.Mapped[int] = so.mapped_column(default=1, server_default='1')
+
+    @classmethod
+    def before_flush(cls, session, _flush_context, _instances):
+        """Increment the revision of changed objects, including changes of their relationship collections."""
+        for obj in session.dirty:
+            if isinstance(obj, RevisionMixin) and session.is_modified(obj):
+                # Increment in SQL, so concurrent changes are not lost
+                obj.revision = type(obj).revision + 1
+
+    @classmethod
+    def after_flush(cls, session, _flush_context):
+        """
+        Increment the version of the collections of all added, changed and deleted objects, so the version of a whole
+        collection is read from a single row instead of aggregating its tables.
+        """
+        collections = {obj.__collection__ for obj in (*session.new, *session.deleted) if isinstance(obj, RevisionMixin)}
+        collections.update(obj.__collection__ for obj in session.dirty
+                           if isinstance(obj, RevisionMixin) and session.is_modified(obj))
+        versions = CollectionVersions.__table__
+        for name in collections:
+            # Increment in SQL, so concurrent changes are not lost
+            result = session.execute(sa.update(versions).where(versions.c.name == name)
+                                     .values(version=versions.c.version + 1))
+            if result.rowcount == 0:
+                session.execute(sa.insert(versions).values(name=name, version=1))
+
+
+class Authors(db.Model, SearchableMixin, RevisionMixin):
     """ORM model for authors of books"""
     __tablename__ = 'library_authors'
+    __table_args__ = (sa.Index('ix_library_authors_last_name_author_id', 'last_name', 'author_id'),)
     __searchable__ = ['first_name', 'last_name']
     author_id: so.Mapped[int] = so.mapped_column(primary_key=True)
     id = so.synonym("author_id")
@@ -250,6 +366,8 @@ class Authors(db.Model, SearchableMixin):
 class BooksAuthors(db.Model):  # pylint: disable=too-few-public-methods
     """ORM model for relationship between books and authors"""
     __tablename__ = 'library_books_authors'
+    # The primary key covers the authors of a book, this index the books of an author
+    __table_args__ = (sa.Index('ix_library_books_authors_author_id_book_id', 'author_id', 'book_id'),)
     book_id: so.Mapped[int] = so.mapped_column(
         sa.ForeignKey('library_books.book_id', ondelete='CASCADE', onupdate='CASCADE'), primary_key=True
     )
@@ -270,22 +388,32 @@ class BooksAuthors(db.Model):  # pylint: disable=too-few-public-methods
         return all_authors
 
 
-class Books(db.Model, SearchableMixin):
+class Books(db.Model, SearchableMixin, RevisionMixin):
     """ORM model for book data."""
     __tablename__ = 'library_books'
+    __table_args__ = (sa.Index('ix_library_books_title_book_id', 'title', 'book_id'),)
     __searchable__ = ['title']
     book_id: so.Mapped[int] = so.mapped_column(primary_key=True)
     id = so.synonym("book_id")
     title: so.Mapped[str] = so.mapped_column(sa.String(255))
-    release_date: so.Mapped[date]
+    release_date: so.Mapped[date] = so.mapped_column(index=True)
     read_status: so.Mapped[bool]
     authors: so.Mapped[List[Authors]] = so.relationship(secondary='library_books_authors', backref='books',
                                                         passive_deletes=True)
     series_id: so.Mapped[Optional[int]] = so.mapped_column(
-        sa.ForeignKey('library_series.series_id', ondelete="RESTRICT", onupdate='CASCADE'))
+        sa.ForeignKey('library_series.series_id', ondelete="RESTRICT", onupdate='CASCADE'), index=True)
     volume_nr: so.Mapped[Optional[float]]
     synopsis: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)
     cover: so.Mapped[Optional[str]] = so.mapped_column(sa.String(255))
+    # Resized copies of the cover by variant name, see pika.covers
+    cover_variants: so.Mapped[Optional[dict]] = so.mapped_column(sa.JSON)
+
+    @so.validates('cover')
+    def _reset_cover_variants(self, _key, cover):
+        """Drop the variants of a replaced or removed cover."""
+        if cover != self.cover:
+            self.cover_variants = None
+        return cover
 
     def __str__(self):
         return self.title
@@ -294,9 +422,10 @@ class Books(db.Model, SearchableMixin):
         return f'<Book {repr(self.title)}>'
 
 
-class Series(db.Model, SearchableMixin):
+class Series(db.Model, SearchableMixin, RevisionMixin):
     """ORM Model for book series"""
     __tablename__ = 'library_series'
+    __table_args__ = (sa.Index('ix_library_series_title_series_id', 'title', 'series_id'),)
     __searchable__ = ['title']
     series_id: so.Mapped[int] = so.mapped_column(primary_key=True)
     id = so.synonym("series_id")
@@ -310,5 +439,43 @@ class Series(db.Model, SearchableMixin):
         return f'<Series {repr(self.title)}>'
 
 
-db.event.listen(db.session, 'before_commit', SearchableMixin.before_commit)
-db.event.listen(db.session, 'after_commit', SearchableMixin.after_commit)
+class SearchIndexOutbox(db.Model):  # pylint: disable=too-few-public-methods
+    """ORM model for pending search index updates."""
+    __tablename__ = 'search_index_outbox'
+    id: so.Mapped[int] = so.mapped_column(primary_key=True, autoincrement=True)
+    index_name: so.Mapped[str] = so.mapped_column(sa.String(64))
+    object_id: so.Mapped[int]
+    operation: so.Mapped[str] = so.mapped_column(sa.String(10))
+    attempts: so.Mapped[int] = so.mapped_column(default=0)
+    created_at: so.Mapped[datetime] = so.mapped_column(default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<SearchIndexOutbox {self.operation} {self.index_name}/{self.object_id}>'
+
+
+class ImportJobs(db.Model):  # pylint: disable=too-few-public-methods
+    """ORM model for background imports of books from remote pages."""
+    __tablename__ = 'import_jobs'
+    job_id: so.Mapped[str] = so.mapped_column(sa.String(32), primary_key=True)
+    batch_id: so.Mapped[str] = so.mapped_column(sa.String(32), index=True)
+    user_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey('users.user_id', ondelete='CASCADE', onupdate='CASCADE'))
+    url: so.Mapped[str] = so.mapped_column(sa.String(2048))
+    status: so.Mapped[str] = so.mapped_column(sa.String(10), default='queued')
+    result: so.Mapped[Optional[dict]] = so.mapped_column(sa.JSON)
+    error: so.Mapped[Optional[str]] = so.mapped_column(sa.Text)
+    created_at: so.Mapped[datetime] = so.mapped_column(default=lambda: datetime.now(timezone.utc))
+    finished_at: so.Mapped[Optional[datetime]]
+
+    def __repr__(self):
+        return f'<ImportJob {self.job_id} {self.status}>'
+
+
+db.event.listen(db.session, 'before_flush', RevisionMixin.before_flush)
+db.event.listen(db.session, 'after_flush', SearchableMixin.after_flush)
+db.event.listen(db.session, 'after_flush', RevisionMixin.after_flush)
+db.event.listen(Posts, 'after_insert', _count_inserted_post)
+db.event.listen(Posts, 'after_delete', _count_deleted_post)
+
+# Create the backref attributes (e.g. ``Threads.author``) now, not on the first query, so loader options can use them
+so.configure_mappers()
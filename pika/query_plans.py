@@ -0,0 +1,225 @@
+"""
+Query plan check of the hot queries (``flask pika check-query-plans``). The queries of the list pages, the home page and
+the community landing page are run against the database and every executed ``SELECT`` is explained. A query is
+reported if the database has to sort its rows (filesort / temporary B-tree) or reads a whole table to answer a query
+with a ``WHERE`` or ``LIMIT`` clause. Queries without both, e.g. counts or exports of whole tables, may scan.
+
+The check runs in a transaction which is rolled back, optionally after seeding generated rows, so it can run against a
+test database in the test suite or in CI. Only SQLite and MySQL plans are understood.
+"""
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta, date
+from typing import Callable, Iterator, NamedTuple
+
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import with_appcontext
+
+from pika import db
+from pika.models import Users, Threads, Posts, Books, Series, Authors, BooksAuthors
+from pika.services import books as book_service, series as series_service, authors as author_service
+from pika.services.choices import series_choices, author_choices
+from pika.services.util import library_version
+
+BOUNDED = re.compile(r'\b(WHERE|LIMIT)\b', re.IGNORECASE)
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+class PlanProblem(NamedTuple):
+    """Problem found in the plan of a query."""
+    query: str
+    statement: str
+    detail: str
+
+
+def _first_thread_id() -> int | None:
+    return db.session.scalar(sa.select(sa.func.min(Threads.thread_id)))
+
+
+def _landing_page():
+    from pika.community.util import _build_landing_page  # pylint: disable=import-outside-toplevel,protected-access
+    return _build_landing_page()
+
+
+def _recent_releases():
+    from pika.routes import _render_recent_releases  # pylint: disable=import-outside-toplevel,protected-access
+    return _render_recent_releases()
+
+
+def _thread_posts():
+    from pika.community.util import thread_posts  # pylint: disable=import-outside-toplevel
+    thread_id = _first_thread_id()
+    if thread_id is not None:
+        _posts, next_cursor = thread_posts(thread_id, None, current_app.config['PER_PAGE_ITEMS'])
+        thread_posts(thread_id, next_cursor, current_app.config['PER_PAGE_ITEMS'])
+
+
+def _keyset_pages(list_after: Callable) -> Callable[[], None]:
+    """Query the first two pages of a keyset paginated list."""
+    def query():
+        first_page = list_after(None, current_app.config['PER_PAGE_ITEMS'])
+        list_after(first_page.next_cursor, current_app.config['PER_PAGE_ITEMS'])
+    return query
+
+
+def _latest_object(model, version: Callable[[int], str | None]) -> Callable[[], None]:
+    """Query the version of the object with the highest ID, as done for the ETag of a single object."""
+    def query():
+        object_id = db.session.scalar(sa.select(sa.func.max(sa.inspect(model).primary_key[0])))
+        if object_id is not None:
+            version(object_id)
+    return query
+
+
+HOT_QUERIES: dict[str, Callable[[], object]] = {
+    'home page': _recent_releases,
+    'library version': library_version,
+    'books list': lambda: book_service.list_books(1, current_app.config['PER_PAGE_ITEMS']),
+    'books keyset pages': _keyset_pages(book_service.list_books_after),
+    'book version': _latest_object(Books, book_service.book_version),
+    'series list': lambda: series_service.list_series(1, current_app.config['PER_PAGE_ITEMS']),
+    'series keyset pages': _keyset_pages(series_service.list_series_after),
+    'series version': _latest_object(Series, series_service.series_version),
+    'series choices': series_choices,
+    'authors list': lambda: author_service.list_authors(1, current_app.config['PER_PAGE_ITEMS']),
+    'authors keyset pages': _keyset_pages(author_service.list_authors_after),
+    'author version': _latest_object(Authors, author_service.author_version),
+    'author choices': author_choices,
+    'community landing page': _landing_page,
+    'thread posts': _thread_posts,
+}
+
+
+def seed(count: int):
+    """
+    Insert generated users, threads, posts, authors, series and books into the current transaction, so the planner
+    sees tables of a realistic size. The rows bypass the ORM events, they are neither indexed nor counted.
+    :param count: Number of rows per table.
+    """
+    def first_id(column) -> int:
+        return (db.session.scalar(sa.select(sa.func.max(column))) or 0) + 1
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    user_id, thread_id, post_id = first_id(Users.user_id), first_id(Threads.thread_id), first_id(Posts.post_id)
+    author_id, series_id, book_id = first_id(Authors.author_id), first_id(Series.series_id), first_id(Books.book_id)
+    db.session.execute(sa.insert(Users), [
+        {'user_id': user_id + i, 'username': f'seed{user_id + i}', 'password': '',
+         'email': f'seed{user_id + i}@example.com', 'last_login': now - timedelta(minutes=i), 'created_at': now}
+        for i in range(count)])
+    db.session.execute(sa.insert(Threads), [
+        {'thread_id': thread_id + i, 'title': f'Thread {i}', 'created': now - timedelta(minutes=i),
+         'last_updated': now - timedelta(minutes=i), 'views': i % 200, 'author_id': user_id + i} for i in range(count)])
+    db.session.execute(sa.insert(Posts), [
+        {'post_id': post_id + i, 'content': f'Post {i}', 'thread_id': thread_id + i % 10,
+         'created': now - timedelta(minutes=i), 'author_id': user_id + i} for i in range(count)])
+    db.session.execute(sa.insert(Authors), [
+        {'author_id': author_id + i, 'first_name': f'First {i}', 'last_name': f'Last {i}'} for i in range(count)])
+    db.session.execute(sa.insert(Series), [{'series_id': series_id + i, 'title': f'Series {i}'} for i in range(count)])
+    db.session.execute(sa.insert(Books), [
+        {'book_id': book_id + i, 'title': f'Book {i}', 'synopsis': f'Synopsis of book {i}',
+         'release_date': date(2000, 1, 1) + timedelta(days=i), 'read_status': False, 'series_id': series_id + i // 3,
+         'volume_nr': i % 3 + 1} for i in range(count)])
+    db.session.execute(sa.insert(BooksAuthors), [
+        {'book_id': book_id + i, 'author_id': author_id + i // 2} for i in range(count)])
+
+
+@contextmanager
+def recorded_statements(connection: sa.Connection) -> Iterator[list[tuple[str, object]]]:
+    """
+    Record the ``SELECT`` statements executed on a connection.
+    :param connection: Database connection.
+    :return: List of statements and their parameters, filled while the context is active.
+    """
+    statements = []
+
+    def record(_connection, _cursor, statement, parameters, _context, executemany):
+        if not executemany and statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    sa.event.listen(connection, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        sa.event.remove(connection, 'before_cursor_execute', record)
+
+
+def plan_problems(connection: sa.Connection, statement: str, parameters) -> list[str]:
+    """
+    Explain a statement and describe the problems of its plan.
+
+    :raises ValueError: When the database is neither SQLite nor MySQL.
+
+    :param connection: Database connection.
+    :param statement: SQL statement as sent to the database.
+    :param parameters: Parameters of the statement.
+    :return: Problems, empty if the plan uses indexes for all filters and sort orders.
+    """
+    bounded = BOUNDED.search(statement) is not None
+    problems = []
+    if connection.dialect.name == 'sqlite':
+        tables = set(db.metadata.tables)
+        for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters):
+            detail = row[-1]
+            if 'TEMP B-TREE FOR' in detail and 'ORDER BY' in detail:
+                problems.append(detail)
+            elif bounded and (match := SQLITE_FULL_SCAN.match(detail)) and match.group(1) in tables:
+                problems.append(f'full scan of {match.group(1)}')
+    elif connection.dialect.name == 'mysql':
+        for row in connection.exec_driver_sql(f'EXPLAIN {statement}', parameters).mappings():
+            if 'Using filesort' in (row['Extra'] or ''):
+                problems.append(f'filesort of {row["table"]}')
+            if bounded and row['type'] == 'ALL':
+                problems.append(f'full scan of {row["table"]}')
+    else:
+        raise ValueError(f'Query plans of {connection.dialect.name} are not supported')
+    return problems
+
+
+def check_query_plans(queries: dict[str, Callable[[], object]] | None = None, seed_rows: int = 0
+                      ) -> list[PlanProblem]:
+    """
+    Run queries and check the plans of all statements they execute. Everything runs in one transaction, which is
+    rolled back at the end.
+
+    :raises ValueError: When the database is neither SQLite nor MySQL.
+
+    :param queries: Functions running the queries by name, :data:`HOT_QUERIES` by default.
+    :param seed_rows: Number of generated rows per table inserted before the queries run.
+    :return: Problems found, empty if all plans are fine.
+    """
+    problems = []
+    # Some queries render templates, which need a request context
+    with current_app.test_request_context():
+        try:
+            if seed_rows:
+                seed(seed_rows)
+            connection = db.session.connection()
+            for name, query in (queries or HOT_QUERIES).items():
+                with recorded_statements(connection) as statements:
+                    query()
+                for statement, parameters in statements:
+                    problems += [PlanProblem(name, statement, detail)
+                                 for detail in plan_problems(connection, statement, parameters)]
+        finally:
+            db.session.rollback()
+    return problems
+
+
+@click.command('check-query-plans')
+@with_appcontext
+@click.option('--seed', 'seed_rows', type=click.IntRange(min=0), default=1000, show_default=True,
+              help='Generated rows per table inserted for the check, they are rolled back afterwards.')
+def check_query_plans_command(seed_rows):
+    """Check that the hot queries use indexes, exits with status 1 if a query sorts or scans a whole table."""
+    try:
+        problems = check_query_plans(seed_rows=seed_rows)
+    except ValueError as exception:
+        raise click.ClickException(str(exception)) from exception
+
+    for problem in problems:
+        click.echo(f'{problem.query}: {problem.detail}\n    {" ".join(problem.statement.split())}', err=True)
+    if problems:
+        raise click.exceptions.Exit(1)
+    click.echo(f'All {len(HOT_QUERIES)} hot queries use indexes.')
@@ -1,16 +1,24 @@
 """Global routes and context injections"""
 import os
+import time
 from hashlib import md5
 
-from flask import current_app, render_template, send_from_directory, request, g, redirect, url_for, session
+from flask import current_app, render_template, request, g, redirect, url_for, session, make_response
+from flask_babel import get_locale
 from flask_login import current_user, login_required
 from werkzeug.exceptions import HTTPException
 
 from pika.api import BookData, SeriesData, AuthorData
+from pika.assets import send_static
 from pika.auth.forms import LoginForm
-from pika.models import Books, Series, Authors
+from pika.covers import cover_srcset
+from pika.fragments import cached_fragment
+from pika.models import Books, Series, Authors, BooksAuthors, SearchableMixin
+from pika.services.loaders import loader_options
 from .forms import SearchForm
 
+current_app.add_template_global(cover_srcset)
+
 
 @current_app.context_processor
 def inject_login_form() -> dict[str, LoginForm]:
@@ -65,12 +73,52 @@ def before_request():
         g.search_form = SearchForm()
 
 
+RECENT_RELEASES_TABLES = (Books.__tablename__, Series.__tablename__, Authors.__tablename__, BooksAuthors.__tablename__)
+
+
+def _render_recent_releases() -> str:
+    """Render the recent releases carousel of the home page."""
+    recent_releases = (Books.query
+                       .options(*loader_options(BookData))
+                       .order_by(Books.release_date.desc())
+                       .limit(10)
+                       .all())
+    recent_releases = [BookData.from_orm(book) for book in recent_releases]
+    return render_template("recent_releases.html", recent_releases=recent_releases)
+
+
+def _login_form_version() -> str:
+    """
+    Version of the CSRF token in the navbar login form. It changes with the token of the session and halfway through
+    the time limit of tokens, so a revalidated page never keeps a token of another session or one about to expire.
+    """
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    period = int(time.time() // (time_limit / 2)) if time_limit else 0
+    return f"{session.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))}-{period}"
+
+
 @current_app.route('/')
 def index():
-    """Redirect root path to home page"""
-    recent_releases = Books.query.order_by(Books.release_date.desc()).limit(10).all()
-    recent_releases = [BookData.from_orm(book) for book in recent_releases]
-    return render_template("index.html", recent_releases=recent_releases)
+    """
+    Home page. The recent releases are served from the fragment cache, browsers can revalidate the page with the ETag
+    or Last-Modified header of the fragment.
+    """
+    fragment = cached_fragment('recent_releases', RECENT_RELEASES_TABLES, _render_recent_releases)
+    # The rest of the page depends on the user and the language, anonymous users get the login form
+    user = current_user.get_id() if current_user.is_authenticated else f'anonymous-{_login_form_version()}'
+    etag = md5(f'{fragment.etag}-{user}-{get_locale()}'.encode()).hexdigest()
+
+    # Always render the page if flashed messages are waiting to be shown
+    if request.if_none_match.contains_weak(etag) and '_flashes' not in session:
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(render_template("index.html", recent_releases=fragment.html))
+    response.set_etag(etag, weak=True)
+    response.last_modified = fragment.last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.update(('Cookie', 'Accept-Language'))
+    return response
 
 
 @current_app.route('/search')
@@ -79,23 +127,15 @@ def search():
     """Endpoint to search for library objects and return result page."""
     if not g.search_form.validate():
         return redirect(url_for('index'))
-    results, total = Books.search(g.search_form.q.data, 1, 10)
-    book_results = []
-    if not total == 0:
-        for book in results.all():
-            book_results.append(BookData.from_orm(book))
-
-    results, total = Series.search(g.search_form.q.data, 1, 10)
-    series_results = []
-    if not total == 0:
-        for series in results.all():
-            series_results.append(SeriesData.from_orm(series))
-
-    results, total = Authors.search(g.search_form.q.data, 1, 10)
-    author_results = []
-    if not total == 0:
-        for author in results.all():
-            author_results.append(AuthorData.from_orm(author))
+    results = SearchableMixin.search_many({
+        Books: loader_options(BookData),
+        Series: loader_options(SeriesData),
+        Authors: loader_options(AuthorData),
+    }, g.search_form.q.data, 1, 10)
+    book_results = [BookData.from_orm(book) for book in results[Books][0]]
+    series_results = [SeriesData.from_orm(series) for series in results[Series][0]]
+    author_results = [AuthorData.from_orm(author) for author in results[Authors][0]]
+    total = sum(total for _, total in results.values())
 
     return render_template(
         "search.html",
@@ -109,7 +149,7 @@ def search():
 @current_app.route("/favicon.ico")
 def favicon():
     """Serve the favicon file"""
-    return send_from_directory(os.path.join(current_app.root_path, 'static/img'), "favicon.png")
+    return send_static(os.path.join(current_app.root_path, 'static/img'), "favicon.png")
 
 
 @current_app.route("/icon")
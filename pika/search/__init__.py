@@ -0,0 +1,138 @@
+"""
+Functions to manage the search indices. The indices are stored by the search backend of the app
+(``current_app.search_backend``), either an elasticsearch cluster or the embedded SQLite index.
+"""
+from typing import Iterable, Iterator
+
+from flask import Flask, current_app
+
+from pika import db
+from .backend import SearchBackend, SearchBackendError
+from .elastic import ElasticsearchBackend
+from .local import LocalSearchBackend
+
+__all__ = ['SearchBackend', 'SearchBackendError', 'ElasticsearchBackend', 'LocalSearchBackend', 'create_backend',
+           'add_to_index', 'remove_from_index', 'index_action', 'delete_action', 'bulk_results', 'bulk_index',
+           'query_index', 'query_indices']
+
+
+def create_backend(app: Flask) -> SearchBackend:
+    """
+    Create the search backend configured by ``SEARCH_BACKEND``. Without explicit configuration elasticsearch is used if
+    ``ELASTICSEARCH_URL`` is set, otherwise the embedded index.
+    :param app: Flask app
+    :return: Search backend
+    """
+    backend = app.config['SEARCH_BACKEND'] or ('elasticsearch' if app.config['ELASTICSEARCH_URL'] else 'local')
+    if backend == 'elasticsearch':
+        return ElasticsearchBackend(app.elasticsearch, chunk_size=app.config['ELASTICSEARCH_BULK_CHUNK_SIZE'],
+                                    workers=app.config['ELASTICSEARCH_BULK_WORKERS'])
+    if backend == 'local':
+        return LocalSearchBackend(app.config['SEARCH_LOCAL_PATH'],
+                                  min_similarity=app.config['SEARCH_LOCAL_MIN_SIMILARITY'])
+    raise ValueError(f"Unknown search backend '{backend}'")
+
+
+def add_to_index(index: str, model: db.Model):
+    """
+    Add data to index from searchable fields in ORM models.
+    :param index: Index name
+    :param model: SQLAlchemy model object
+    :return:
+    """
+    bulk_index([index_action(index, model)])
+
+
+def remove_from_index(index: str, model: db.Model):
+    """
+    Remove data to index from searchable fields in ORM models.
+    :param index: Index name
+    :param model: SQLAlchemy model object
+    """
+    bulk_index([delete_action(index, model)])
+
+
+def index_action(index: str, model: db.Model) -> dict:
+    """
+    Generate a bulk action to add data from searchable fields in ORM models to an index.
+    :param index: Index name
+    :param model: SQLAlchemy model object
+    :return: Bulk index action
+    """
+    return {
+        '_op_type': 'index',
+        '_index': index,
+        '_id': model.id,
+        '_source': {field: getattr(model, field) for field in model.__searchable__},
+    }
+
+
+def delete_action(index: str, model: db.Model) -> dict:
+    """
+    Generate a bulk action to remove an ORM model from an index.
+    :param index: Index name
+    :param model: SQLAlchemy model object
+    :return: Bulk delete action
+    """
+    return {'_op_type': 'delete', '_index': index, '_id': model.id}
+
+
+def bulk_results(actions: Iterable[dict]) -> Iterator[tuple[bool, dict]]:
+    """
+    Send index and delete actions to the search backend and yield the result of every action. Deleting a document which
+    is not in the index counts as success.
+
+    :raises SearchBackendError: When the search backend is unavailable.
+
+    :param actions: Bulk actions, see :func:`index_action` and :func:`delete_action`
+    :return: Tuples of success and the response item of each action
+    """
+    return current_app.search_backend.bulk(actions)
+
+
+def bulk_index(actions: Iterable[dict]) -> tuple[int, int]:
+    """
+    Send index and delete actions to the search backend, see :func:`bulk_results`.
+
+    :raises SearchBackendError: When the search backend is unavailable.
+
+    :param actions: Bulk actions, see :func:`index_action` and :func:`delete_action`
+    :return: Number of successful and failed actions
+    """
+    succeeded, failed = 0, 0
+    for success, item in bulk_results(actions):
+        if success:
+            succeeded += 1
+        else:
+            failed += 1
+            current_app.logger.warning('Search: Bulk action failed: %s', item)
+    return succeeded, failed
+
+
+def query_index(index: str, query: str, page: int, per_page: int):
+    """
+    Query search index with given query.
+    :param index: Index name
+    :param query: Search query
+    :param page: Page number
+    :param per_page: Items per page
+    :return:
+    """
+    return query_indices([index], query, page, per_page)[index]
+
+
+def query_indices(indices: list[str], query: str, page: int, per_page: int) -> dict[str, tuple[list[int], int]]:
+    """
+    Query several search indices with one request. Each index is paginated separately. If the search backend is
+    unavailable the error is logged and no hits are returned.
+    :param indices: Index names
+    :param query: Search query
+    :param page: Page number
+    :param per_page: Items per page of each index
+    :return: IDs and total number of hits per index name
+    """
+    try:
+        return current_app.search_backend.search(indices, query, page, per_page)
+    except SearchBackendError as exception:
+        current_app.logger.warning('Search: Query failed: %s', exception)
+        return {index: ([], 0) for index in indices}
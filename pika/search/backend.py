@@ -0,0 +1,53 @@
+"""Interface of the search backends."""
+from typing import Iterable, Iterator
+
+
+class SearchBackendError(Exception):
+    """Raised when the search backend is unavailable or rejects a request as a whole."""
+
+
+class SearchBackend:
+    """
+    Base class for search backends. A backend stores documents in named indices and returns the IDs of documents
+    matching a query. Documents are added and removed with bulk actions, see :func:`pika.search.index_action` and
+    :func:`pika.search.delete_action`.
+    """
+
+    def bulk(self, actions: Iterable[dict]) -> Iterator[tuple[bool, dict]]:
+        """
+        Apply index and delete actions.
+
+        :raises SearchBackendError: When the backend is unavailable.
+
+        :param actions: Bulk actions.
+        :return: Tuples of success and the response item of each action, in the form of the elasticsearch bulk API.
+        """
+        raise NotImplementedError
+
+    def search(self, indices: list[str], query: str, page: int,
+               per_page: int) -> dict[str, tuple[list[int], int]]:
+        """
+        Query several indices. Each index is paginated separately.
+
+        :raises SearchBackendError: When the backend is unavailable.
+
+        :param indices: Index names
+        :param query: Search query
+        :param page: Page number
+        :param per_page: Items per page of each index
+        :return: IDs and total number of hits per index name
+        """
+        raise NotImplementedError
+
+    def refresh(self, index: str):
+        """
+        Make all changes to an index visible to searches.
+        :param index: Index name
+        """
+
+    def delete_index(self, index: str):
+        """
+        Delete an index and all of its documents. Deleting an index which does not exist is not an error.
+        :param index: Index name
+        """
+        raise NotImplementedError
@@ -0,0 +1,95 @@
+"""Elasticsearch search backend."""
+from itertools import batched
+from typing import Iterable, Iterator
+
+from elasticsearch import Elasticsearch, ApiError, NotFoundError, TransportError, helpers
+
+from .backend import SearchBackend, SearchBackendError
+
+
+def _is_missing_delete(item: dict) -> bool:
+    """Check if a failed bulk item is a delete of a document which is not in the index."""
+    return item.get('delete', {}).get('status') == 404
+
+
+def _search_body(query: str, page: int, per_page: int) -> dict:
+    """
+    Generate the search request body for a query.
+    :param query: Search query
+    :param page: Page number
+    :param per_page: Items per page
+    :return: Search request body
+    """
+    return {
+        'query': {'multi_match': {'query': query, 'fields': ['*'], "fuzziness": "AUTO", "prefix_length": 2}},
+        'from': (page - 1) * per_page,
+        'size': per_page,
+    }
+
+
+class ElasticsearchBackend(SearchBackend):
+    """
+    Search backend using an elasticsearch cluster.
+
+    Bulk actions are taken in batches of ``chunk_size * workers`` in the calling thread, so generators reading from
+    the database are only consumed inside the app context. Each batch is split into chunks of ``chunk_size`` which are
+    sent by ``workers`` parallel threads.
+    """
+
+    def __init__(self, client: Elasticsearch, chunk_size: int = 500, workers: int = 4):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.workers = workers
+
+    def bulk(self, actions: Iterable[dict]) -> Iterator[tuple[bool, dict]]:
+        try:
+            for batch in batched(actions, self.chunk_size * self.workers):
+                if self.workers > 1 and len(batch) > self.chunk_size:
+                    results = helpers.parallel_bulk(self.client, batch, thread_count=self.workers,
+                                                    chunk_size=self.chunk_size, raise_on_error=False)
+                else:
+                    results = helpers.streaming_bulk(self.client, batch, chunk_size=self.chunk_size,
+                                                     raise_on_error=False)
+                for success, item in results:
+                    yield success or _is_missing_delete(item), item
+        except (ApiError, TransportError) as exception:
+            raise SearchBackendError(str(exception)) from exception
+
+    def search(self, indices: list[str], query: str, page: int,
+               per_page: int) -> dict[str, tuple[list[int], int]]:
+        if not indices:
+            return {}
+        body = _search_body(query, page, per_page)
+        searches = []
+        for index in indices:
+            searches.extend(({'index': index}, body))
+        try:
+            responses = self.client.msearch(searches=searches)['responses']
+        except (ApiError, TransportError) as exception:
+            raise SearchBackendError(str(exception)) from exception
+
+        results = {}
+        for index, response in zip(indices, responses):
+            if 'error' in response:
+                # Missing indices are expected before the first document is indexed
+                if response['error'].get('type') != 'index_not_found_exception':
+                    raise SearchBackendError(f"Search in {index} failed: {response['error']}")
+                results[index] = ([], 0)
+                continue
+            ids = [int(hit['_id']) for hit in response['hits']['hits']]
+            results[index] = (ids, response['hits']['total']['value'])
+        return results
+
+    def refresh(self, index: str):
+        try:
+            self.client.indices.refresh(index=index)
+        except (ApiError, TransportError) as exception:
+            raise SearchBackendError(str(exception)) from exception
+
+    def delete_index(self, index: str):
+        try:
+            self.client.indices.delete(index=index)
+        except NotFoundError:
+            pass
+        except (ApiError, TransportError) as exception:
+            raise SearchBackendError(str(exception)) from exception
@@ -0,0 +1,145 @@
+"""
+Embedded search backend using a SQLite FTS5 index with the trigram tokenizer. Needs no external service and is meant
+for small deployments, development and benchmarking search without a cluster.
+
+Queries are split into trigrams, documents containing any of them are fetched from the FTS index and ranked by the
+share of query trigrams they contain, so small typos still match. Queries without any word of three or more characters
+fall back to a substring match.
+"""
+import re
+import sqlite3
+import threading
+from typing import Iterable, Iterator
+
+from .backend import SearchBackend, SearchBackendError
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    index_name TEXT NOT NULL,
+    object_id TEXT NOT NULL,
+    content TEXT NOT NULL,
+    UNIQUE (index_name, object_id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    content, content='documents', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO documents_fts (rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+_WORD = re.compile(r'\w+')
+
+
+def _trigrams(text: str) -> set[str]:
+    """
+    Split a text into the trigrams of its words.
+    :param text: Text to split.
+    :return: Set of lower case trigrams.
+    """
+    trigrams = set()
+    for word in _WORD.findall(text.casefold()):
+        trigrams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return trigrams
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+    Search backend storing all indices in one SQLite database. The database file can be shared by several processes,
+    use ``:memory:`` for a throwaway index.
+    """
+
+    def __init__(self, path: str = ':memory:', min_similarity: float = 0.5):
+        """
+        :param path: Path of the SQLite database.
+        :param min_similarity: Minimum share of query trigrams a document has to contain to be a hit.
+        """
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        try:
+            self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+            if path != ':memory:':
+                self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(_SCHEMA)
+        except sqlite3.Error as exception:
+            raise SearchBackendError(str(exception)) from exception
+
+    def bulk(self, actions: Iterable[dict]) -> Iterator[tuple[bool, dict]]:
+        results = []
+        with self._lock:
+            try:
+                self._connection.execute('BEGIN')
+                for action in actions:
+                    operation, index, object_id = action['_op_type'], action['_index'], str(action['_id'])
+                    if operation == 'delete':
+                        self._connection.execute('DELETE FROM documents WHERE index_name = ? AND object_id = ?',
+                                                 (index, object_id))
+                    else:
+                        content = ' '.join(str(value) for value in action['_source'].values() if value is not None)
+                        self._connection.execute(
+                            'INSERT INTO documents (index_name, object_id, content) VALUES (?, ?, ?) '
+                            'ON CONFLICT (index_name, object_id) DO UPDATE SET content = excluded.content',
+                            (index, object_id, content))
+                    results.append((True, {operation: {'_index': index, '_id': object_id, 'status': 200}}))
+                self._connection.execute('COMMIT')
+            except sqlite3.Error as exception:
+                if self._connection.in_transaction:
+                    self._connection.execute('ROLLBACK')
+                raise SearchBackendError(str(exception)) from exception
+        yield from results
+
+    def _candidates(self, index: str, query: str) -> list[tuple[str, str, float]]:
+        """
+        Fetch documents of an index which contain at least one trigram of the query.
+        :param index: Index name
+        :param query: Search query
+        :return: Object ID, content and bm25 rank of each candidate
+        """
+        trigrams = _trigrams(query)
+        if not trigrams:
+            pattern = '%' + query.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            return self._connection.execute(
+                "SELECT object_id, content, 0 FROM documents WHERE index_name = ? AND content LIKE ? ESCAPE '\\'",
+                (index, pattern)).fetchall()
+        match = ' OR '.join('"' + trigram.replace('"', '""') + '"' for trigram in trigrams)
+        return self._connection.execute(
+            'SELECT documents.object_id, documents.content, documents_fts.rank FROM documents_fts '
+            'JOIN documents ON documents.id = documents_fts.rowid '
+            'WHERE documents_fts MATCH ? AND documents.index_name = ?',
+            (match, index)).fetchall()
+
+    def search(self, indices: list[str], query: str, page: int,
+               per_page: int) -> dict[str, tuple[list[int], int]]:
+        query_trigrams = _trigrams(query)
+        results = {}
+        with self._lock:
+            for index in indices:
+                try:
+                    candidates = self._candidates(index, query)
+                except sqlite3.Error as exception:
+                    raise SearchBackendError(str(exception)) from exception
+
+                hits = []
+                for object_id, content, rank in candidates:
+                    similarity = len(query_trigrams & _trigrams(content)) / len(query_trigrams) if query_trigrams else 1
+                    if similarity >= self.min_similarity:
+                        hits.append((-similarity, rank, int(object_id)))
+                hits.sort()
+                start = (page - 1) * per_page
+                results[index] = ([object_id for _, _, object_id in hits[start:start + per_page]], len(hits))
+        return results
+
+    def delete_index(self, index: str):
+        with self._lock:
+            try:
+                self._connection.execute('DELETE FROM documents WHERE index_name = ?', (index,))
+            except sqlite3.Error as exception:
+                raise SearchBackendError(str(exception)) from exception
@@ -0,0 +1,200 @@
+"""
+Worker for the search index outbox. Changes of searchable objects are written to the ``search_index_outbox`` table in
+the same transaction as the changes (see :meth:`pika.models.SearchableMixin.after_flush`). The worker reads pending
+entries, coalesces repeated updates of the same object and sends them to the search backend in bulk. Entries are only
+removed once the search backend accepted them, so no index updates are lost if the search cluster is unavailable.
+
+Entries rejected ``SEARCH_OUTBOX_MAX_ATTEMPTS`` times are kept as failed entries, they are listed with
+``flask search failed`` and queued again with ``flask search retry``.
+"""
+import threading
+
+import click
+import sqlalchemy as sa
+from flask import Flask, current_app
+from flask.cli import AppGroup
+from sqlalchemy.exc import SQLAlchemyError
+
+from pika import db
+from pika.models import SearchableMixin, SearchIndexOutbox
+from pika.search import index_action, bulk_results, SearchBackendError
+
+search_cli = AppGroup('search', help='Manage the search indices.')
+
+_wake_up = threading.Event()
+
+
+def _notify_worker(session):
+    """Wake up the worker of this process after a commit added entries to the outbox."""
+    if session.info.pop('search_outbox_changed', False):
+        _wake_up.set()
+
+
+def _discard_notification(session):
+    """Forget outbox entries of a rolled back transaction."""
+    session.info.pop('search_outbox_changed', None)
+
+
+def _outbox_actions(pending: dict[tuple[str, int], str]) -> list[dict]:
+    """
+    Generate bulk actions for pending index updates. Objects to index are loaded from the database with one query per
+    index, objects which no longer exist are removed from the index instead.
+    :param pending: Operation per index name and object ID.
+    :return: List of bulk actions.
+    """
+    models = {model.__tablename__: model for model in SearchableMixin.__subclasses__()}
+    to_index: dict[str, set[int]] = {}
+    actions = []
+    for (index_name, object_id), operation in pending.items():
+        if operation == 'index' and index_name in models:
+            to_index.setdefault(index_name, set()).add(object_id)
+        else:
+            actions.append({'_op_type': 'delete', '_index': index_name, '_id': object_id})
+
+    for index_name, object_ids in to_index.items():
+        model = models[index_name]
+        for obj in db.session.scalars(sa.select(model).where(model.id.in_(object_ids))):
+            actions.append(index_action(index_name, obj))
+            object_ids.discard(obj.id)
+        actions.extend({'_op_type': 'delete', '_index': index_name, '_id': object_id} for object_id in object_ids)
+    return actions
+
+
+def drain_outbox(batch_size: int | None = None) -> int:
+    """
+    Send a batch of pending outbox entries to the search backend. Entries are locked while they are processed, so
+    several workers can drain the outbox concurrently. Entries the backend rejected stay in the outbox and are retried
+    until ``SEARCH_OUTBOX_MAX_ATTEMPTS`` is reached.
+    :param batch_size: Maximum number of entries to process, defaults to ``SEARCH_OUTBOX_BATCH_SIZE``.
+    :return: Number of processed entries.
+    """
+    batch_size = batch_size or current_app.config['SEARCH_OUTBOX_BATCH_SIZE']
+    query = (sa.select(SearchIndexOutbox)
+             .where(SearchIndexOutbox.attempts < current_app.config['SEARCH_OUTBOX_MAX_ATTEMPTS'])
+             .order_by(SearchIndexOutbox.id)
+             .limit(batch_size)
+             .with_for_update(skip_locked=True))
+    entries = db.session.scalars(query).all()
+    if not entries:
+        db.session.rollback()
+        return 0
+
+    # Entries are ordered by ID, so the latest operation of an object wins
+    pending = {(entry.index_name, entry.object_id): entry.operation for entry in entries}
+    try:
+        failed = {(item[operation]['_index'], str(item[operation]['_id']))
+                  for success, item in bulk_results(_outbox_actions(pending)) if not success
+                  for operation in item}
+    except SearchBackendError as exception:
+        db.session.rollback()
+        current_app.logger.warning('Search: Unable to send search index outbox: %s', exception)
+        return 0
+
+    for entry in entries:
+        if (entry.index_name, str(entry.object_id)) in failed:
+            entry.attempts += 1
+            if entry.attempts >= current_app.config['SEARCH_OUTBOX_MAX_ATTEMPTS']:
+                current_app.logger.error('Search: Indexing %s/%s failed %s times, giving up', entry.index_name,
+                                         entry.object_id, entry.attempts)
+            else:
+                current_app.logger.warning('Search: Indexing %s/%s failed (attempt %s)', entry.index_name,
+                                           entry.object_id, entry.attempts)
+        else:
+            db.session.delete(entry)
+    db.session.commit()
+    return len(entries)
+
+
+def failed_entries() -> list[SearchIndexOutbox]:
+    """Get the outbox entries which reached ``SEARCH_OUTBOX_MAX_ATTEMPTS``, in order of creation."""
+    return db.session.scalars(
+        sa.select(SearchIndexOutbox)
+        .where(SearchIndexOutbox.attempts >= current_app.config['SEARCH_OUTBOX_MAX_ATTEMPTS'])
+        .order_by(SearchIndexOutbox.id)).all()
+
+
+def retry_failed(entry_ids: list[int] | None = None) -> int:
+    """
+    Queue failed outbox entries again by resetting their attempts.
+    :param entry_ids: IDs of the entries to retry, all failed entries if None.
+    :return: Number of queued entries.
+    """
+    statement = (sa.update(SearchIndexOutbox)
+                 .where(SearchIndexOutbox.attempts >= current_app.config['SEARCH_OUTBOX_MAX_ATTEMPTS'])
+                 .values(attempts=0))
+    if entry_ids is not None:
+        statement = statement.where(SearchIndexOutbox.id.in_(entry_ids))
+    count = db.session.execute(statement).rowcount
+    db.session.commit()
+    _wake_up.set()
+    return count
+
+
+def run_worker(app: Flask, stop: threading.Event | None = None):
+    """
+    Drain the outbox until ``stop`` is set. Waits ``SEARCH_OUTBOX_INTERVAL`` seconds or until a commit of this process
+    adds new entries whenever the outbox is empty.
+    :param app: Flask app
+    :param stop: Event to stop the worker, runs forever if None.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        _wake_up.clear()
+        with app.app_context():
+            try:
+                processed = drain_outbox()
+            except SQLAlchemyError as exception:
+                db.session.rollback()
+                app.logger.warning('Search index outbox: %s', exception)
+                processed = 0
+            batch_size = app.config['SEARCH_OUTBOX_BATCH_SIZE']
+            interval = app.config['SEARCH_OUTBOX_INTERVAL']
+        if processed < batch_size:
+            _wake_up.wait(interval)
+
+
+def start_worker(app: Flask) -> threading.Thread:
+    """
+    Start the outbox worker in a daemon thread.
+    :param app: Flask app
+    :return: Worker thread.
+    """
+    worker = threading.Thread(target=run_worker, args=(app,), name='search-index-outbox', daemon=True)
+    worker.start()
+    return worker
+
+
+@search_cli.command('drain')
+@click.option('--watch', is_flag=True, help='Keep draining the outbox until interrupted.')
+def drain_command(watch: bool):
+    """Send pending search index updates to the search backend."""
+    if watch:
+        # noinspection PyProtectedMember
+        run_worker(current_app._get_current_object())  # pylint: disable=protected-access
+        return
+    total = 0
+    while processed := drain_outbox():
+        total += processed
+    click.echo(f'Processed {total} search index updates.')
+
+
+@search_cli.command('failed')
+def failed_command():
+    """List search index updates which failed too often."""
+    entries = failed_entries()
+    for entry in entries:
+        click.echo(f'{entry.id}\t{entry.operation} {entry.index_name}/{entry.object_id}\t'
+                   f'{entry.attempts} attempts\t{entry.created_at:%Y-%m-%d %H:%M:%S}')
+    click.echo(f'{len(entries)} failed search index updates.')
+
+
+@search_cli.command('retry')
+@click.argument('entry_ids', nargs=-1, type=int)
+def retry_command(entry_ids: tuple[int, ...]):
+    """Queue failed search index updates again, all of them if no IDs are given."""
+    count = retry_failed(list(entry_ids) or None)
+    click.echo(f'Queued {count} search index updates again.')
+
+
+db.event.listen(db.session, 'after_commit', _notify_worker)
+db.event.listen(db.session, 'after_rollback', _discard_notification)
@@ -0,0 +1,11 @@
+"""
+In-process services for library data. Used by the REST API and the library pages, so the pages do not have to call
+the API over HTTP.
+"""
+# pylint: disable=cyclic-import
+from .exceptions import ServiceError, ObjectNotFound, BookNotFound, SeriesNotFound, AuthorNotFound, DeleteFailed, \
+    BatchFailed, InvalidCursor
+from . import books, series, authors, choices, generations
+
+__all__ = ['books', 'series', 'authors', 'choices', 'generations', 'ServiceError', 'ObjectNotFound', 'BookNotFound',
+           'SeriesNotFound', 'AuthorNotFound', 'DeleteFailed', 'BatchFailed', 'InvalidCursor']
@@ -0,0 +1,195 @@
+"""Service functions for author data."""
+from typing import Iterator
+
+import sqlalchemy as sa
+from sqlalchemy import exc
+
+from pika import db
+from pika.api.data import ApiAuthorDTO, AuthorBase, AuthorData, AuthorsPage
+from pika.models import Authors, Books, Series, BooksAuthors
+from .exceptions import AuthorNotFound, DeleteFailed
+from .loaders import loader_options
+from .util import new_books_list, encode_cursor, iter_chunks, keyset_page, page_count, version_digest
+
+
+def _reloaded(author_id: int) -> AuthorData:
+    """
+    Load a changed author again after the commit expired it. Loads the books and their relations in a few queries
+    instead of lazy loading them one book at a time.
+    :param author_id: ID of the author.
+    :return: Author data.
+    """
+    obj = db.session.get(Authors, author_id, options=loader_options(AuthorData), populate_existing=True)
+    return AuthorData.from_orm(obj)
+
+
+def get_author(author_id: int) -> AuthorData:
+    """
+    Get a single author.
+
+    :raises AuthorNotFound: When the author does not exist.
+
+    :param author_id: ID of the author.
+    :return: Author data.
+    """
+    author = db.session.get(Authors, author_id, options=loader_options(AuthorData))
+    if author is None:
+        raise AuthorNotFound(author_id)
+    return AuthorData.from_orm(author)
+
+
+def author_version(author_id: int) -> str | None:
+    """
+    Get the version of an author's data, including their books and the series of the books.
+    :param author_id: ID of the author.
+    :return: Version string or None if the author does not exist.
+    """
+    query = (sa.select(Authors.revision, Books.book_id, Books.revision, Series.series_id, Series.revision)
+             .select_from(Authors)
+             .outerjoin(BooksAuthors, BooksAuthors.author_id == Authors.author_id)
+             .outerjoin(Books, Books.book_id == BooksAuthors.book_id)
+             .outerjoin(Series, Series.series_id == Books.series_id)
+             .where(Authors.author_id == author_id)
+             .order_by(BooksAuthors.book_id))
+    rows = db.session.execute(query).all()
+    return version_digest(rows) if rows else None
+
+
+def list_authors(page: int, per_page: int) -> AuthorsPage:
+    """
+    Get a page of authors ordered by last name.
+
+    :param page: Page number.
+    :param per_page: Number of authors per page.
+    :return: Paginated list of authors.
+    """
+    query = (Authors.query
+             .options(*loader_options(AuthorData))
+             .order_by(Authors.last_name, Authors.author_id)
+             .paginate(page=page, per_page=per_page))
+    items = query.items
+    return AuthorsPage(
+        first=1,
+        last=query.pages,
+        has_previous=query.has_prev,
+        has_next=query.has_next,
+        next_cursor=encode_cursor(items[-1].last_name, items[-1].id) if query.has_next else None,
+        authors=[AuthorData.from_orm(a) for a in items]
+    )
+
+
+def list_authors_after(after: str | None, per_page: int, with_total: bool = False) -> AuthorsPage:
+    """
+    Get a page of authors ordered by last name using keyset pagination.
+
+    :raises InvalidCursor: When the ``after`` cursor is malformed.
+
+    :param after: Cursor of the previous page or None for the first page.
+    :param per_page: Number of authors per page.
+    :param with_total: Count the pages. Skipped by default, because the count query scans the whole table.
+    :return: Paginated list of authors.
+    """
+    items, next_cursor = keyset_page(Authors, Authors.last_name, after, per_page, loader_options(AuthorData))
+    return AuthorsPage(
+        first=1,
+        last=page_count(Authors, per_page) if with_total else None,
+        has_previous=after is not None,
+        has_next=next_cursor is not None,
+        next_cursor=next_cursor,
+        authors=[AuthorData.from_orm(a) for a in items]
+    )
+
+
+def all_authors() -> list[AuthorData]:
+    """Get all authors. Please use sparingly."""
+    return [AuthorData.from_orm(a) for a in Authors.query.options(*loader_options(AuthorData)).all()]
+
+
+def iter_authors(chunk_size: int) -> Iterator[AuthorData]:
+    """
+    Iterate over all authors without loading the whole table into memory. Authors are loaded in chunks of ``chunk_size``
+    ordered by ID, see :func:`iter_chunks`.
+
+    :param chunk_size: Number of authors loaded per chunk.
+    :return: Iterator of author data.
+    """
+    for chunk in iter_chunks(Authors, chunk_size, loader_options(AuthorData)):
+        for author in chunk:
+            yield AuthorData.from_orm(author)
+
+
+def create_author(author: ApiAuthorDTO) -> AuthorData:
+    """
+    Add a new author.
+
+    :raises BookNotFound: When any referenced book does not exist.
+
+    :param author: Validated author DTO.
+    :return: Data of the new author.
+    """
+    new_author = Authors(**author.model_dump(exclude={"books"}))
+    if author.books:
+        new_author.books = new_books_list(author.books)
+
+    db.session.add(new_author)
+    db.session.commit()
+    return _reloaded(new_author.author_id)
+
+
+def update_author(author_id: int, author: ApiAuthorDTO) -> AuthorData:
+    """
+    Update an existing author.
+
+    :raises AuthorNotFound: When the author does not exist.
+    :raises BookNotFound: When any referenced book does not exist.
+
+    :param author_id: ID of the author to update.
+    :param author: Validated author DTO.
+    :return: Data of the updated author.
+    """
+    target_author: Authors = Authors.query.get(author_id)
+    if target_author is None:
+        raise AuthorNotFound(author_id)
+
+    book_update = new_books_list(author.books) if author.books else None
+
+    for key, value in author.model_dump(exclude={"books"}).items():
+        setattr(target_author, key, value)
+    if book_update is not None:
+        target_author.books = book_update
+
+    db.session.commit()
+    return _reloaded(author_id)
+
+
+def delete_author(author_id: int) -> AuthorBase:
+    """
+    Delete an author.
+
+    :raises AuthorNotFound: When the author does not exist.
+    :raises DeleteFailed: When books are still assigned to the author.
+
+    :param author_id: ID of the author to delete.
+    :return: Data of the deleted author.
+    """
+    target_author: Authors = Authors.query.get(author_id)
+    if target_author is None:
+        raise AuthorNotFound(author_id)
+
+    msg = f"Failed to delete author '{author_id}'. Authors cannot be deleted when books are still assigned to them."
+
+    # Manually prevent deletion of authors with assigned books, SQLAlchemy does not handle it correctly. Possibly due
+    # to a bug. When trying to manually delete an author with SQL statement the deletion is correctly prevented.
+    if len(target_author.books) != 0:
+        raise DeleteFailed(msg)
+
+    deleted_author = AuthorBase.from_orm(target_author)
+
+    try:
+        db.session.delete(target_author)
+        db.session.commit()
+    except exc.SQLAlchemyError as exception:
+        db.session.rollback()
+        raise DeleteFailed(msg) from exception
+
+    return deleted_author
@@ -0,0 +1,293 @@
+"""Service functions for book data."""
+from typing import Iterator
+
+import sqlalchemy as sa
+from sqlalchemy import exc, orm as so
+
+from pika import db
+from pika.api.data import ApiBookDTO, ApiBookOperationDTO, BatchResult, BookBase, BookData, BookPage
+from pika.models import Books, Series, Authors, BooksAuthors
+from .exceptions import BookNotFound, SeriesNotFound, AuthorNotFound, DeleteFailed, BatchFailed
+from .loaders import loader_options
+from .util import encode_cursor, iter_chunks, keyset_page, page_count, version_digest, objects_by_id, resolve_ids
+
+
+def _get_series(book: ApiBookDTO) -> Series | None:
+    """
+    Query the series referenced by the book DTO.
+
+    :raises SeriesNotFound: When the referenced series does not exist.
+
+    :param book: Book DTO.
+    :return: ORM series object or None if the book has no series.
+    """
+    if not book.series:
+        return None
+    series = db.session.get(Series, book.series.series_id)
+    if series is None:
+        raise SeriesNotFound(book.series.series_id)
+    return series
+
+
+def _get_authors(book: ApiBookDTO) -> list[Authors]:
+    """
+    Query all authors referenced by the book DTO.
+
+    :raises AuthorNotFound: When *any* referenced author does not exist, with all missing IDs.
+
+    :param book: Book DTO.
+    :return: List of ORM author objects.
+    """
+    return resolve_ids(Authors, [author.author_id for author in book.authors], AuthorNotFound)
+
+
+def get_book(book_id: int) -> BookData:
+    """
+    Get a single book.
+
+    :raises BookNotFound: When the book does not exist.
+
+    :param book_id: ID of the book.
+    :return: Book data.
+    """
+    book = db.session.get(Books, book_id, options=loader_options(BookData))
+    if book is None:
+        raise BookNotFound(book_id)
+    return BookData.from_orm(book)
+
+
+def book_version(book_id: int) -> str | None:
+    """
+    Get the version of a book's data, including its series and authors.
+    :param book_id: ID of the book.
+    :return: Version string or None if the book does not exist.
+    """
+    query = (sa.select(Books.revision, Series.series_id, Series.revision, Authors.author_id, Authors.revision)
+             .select_from(Books)
+             .outerjoin(Series, Books.series_id == Series.series_id)
+             .outerjoin(BooksAuthors, BooksAuthors.book_id == Books.book_id)
+             .outerjoin(Authors, Authors.author_id == BooksAuthors.author_id)
+             .where(Books.book_id == book_id)
+             .order_by(BooksAuthors.author_id))
+    rows = db.session.execute(query).all()
+    return version_digest(rows) if rows else None
+
+
+def list_books(page: int, per_page: int) -> BookPage:
+    """
+    Get a page of books ordered by title.
+
+    :param page: Page number.
+    :param per_page: Number of books per page.
+    :return: Paginated list of books.
+    """
+    query = (Books.query
+             .options(*loader_options(BookData))
+             .order_by(Books.title, Books.book_id)
+             .paginate(page=page, per_page=per_page))
+    items = query.items
+    return BookPage(
+        first=1,
+        last=query.pages,
+        has_previous=query.has_prev,
+        has_next=query.has_next,
+        next_cursor=encode_cursor(items[-1].title, items[-1].id) if query.has_next else None,
+        books=[BookData.from_orm(b) for b in items]
+    )
+
+
+def list_books_after(after: str | None, per_page: int, with_total: bool = False) -> BookPage:
+    """
+    Get a page of books ordered by title using keyset pagination.
+
+    :raises InvalidCursor: When the ``after`` cursor is malformed.
+
+    :param after: Cursor of the previous page or None for the first page.
+    :param per_page: Number of books per page.
+    :param with_total: Count the pages. Skipped by default, because the count query scans the whole table.
+    :return: Paginated list of books.
+    """
+    items, next_cursor = keyset_page(Books, Books.title, after, per_page, loader_options(BookData))
+    return BookPage(
+        first=1,
+        last=page_count(Books, per_page) if with_total else None,
+        has_previous=after is not None,
+        has_next=next_cursor is not None,
+        next_cursor=next_cursor,
+        books=[BookData.from_orm(b) for b in items]
+    )
+
+
+def all_books() -> list[BookData]:
+    """Get all books. Please use sparingly."""
+    return [BookData.from_orm(b) for b in Books.query.options(*loader_options(BookData)).all()]
+
+
+def iter_books(chunk_size: int) -> Iterator[BookData]:
+    """
+    Iterate over all books without loading the whole table into memory. Books are loaded in chunks of ``chunk_size``
+    ordered by ID, see :func:`iter_chunks`.
+
+    :param chunk_size: Number of books loaded per chunk.
+    :return: Iterator of book data.
+    """
+    for chunk in iter_chunks(Books, chunk_size, loader_options(BookData)):
+        for book in chunk:
+            yield BookData.from_orm(book)
+
+
+def create_book(book: ApiBookDTO) -> BookData:
+    """
+    Add a new book.
+
+    :raises SeriesNotFound: When the referenced series does not exist.
+    :raises AuthorNotFound: When any referenced author does not exist.
+
+    :param book: Validated book DTO.
+    :return: Data of the new book.
+    """
+    series = _get_series(book)
+    authors = _get_authors(book)
+
+    new_book = Books(**book.model_dump(exclude={"volume_nr_as_string", "series", "authors"}))
+    new_book.series = series
+    new_book.authors = authors
+
+    db.session.add(new_book)
+    db.session.commit()
+    return BookData.from_orm(new_book)
+
+
+def update_book(book_id: int, book: ApiBookDTO) -> BookData:
+    """
+    Update an existing book.
+
+    :raises BookNotFound: When the book does not exist.
+    :raises SeriesNotFound: When the referenced series does not exist.
+    :raises AuthorNotFound: When any referenced author does not exist.
+
+    :param book_id: ID of the book to update.
+    :param book: Validated book DTO.
+    :return: Data of the updated book.
+    """
+    target_book: Books = Books.query.get(book_id)
+    if target_book is None:
+        raise BookNotFound(book_id)
+
+    series = _get_series(book)
+    authors = _get_authors(book)
+
+    for key, value in book.model_dump(exclude={"authors", "series"}).items():
+        setattr(target_book, key, value)
+    target_book.series = series
+    target_book.authors = authors
+
+    db.session.commit()
+    return BookData.from_orm(target_book)
+
+
+def delete_book(book_id: int) -> BookBase:
+    """
+    Delete a book.
+
+    :raises BookNotFound: When the book does not exist.
+    :raises DeleteFailed: When the database refuses the deletion.
+
+    :param book_id: ID of the book to delete.
+    :return: Data of the deleted book.
+    """
+    target_book: Books = Books.query.get(book_id)
+    if target_book is None:
+        raise BookNotFound(book_id)
+
+    deleted_book = BookBase.from_orm(target_book)
+
+    try:
+        db.session.delete(target_book)
+        db.session.commit()
+    except exc.SQLAlchemyError as exception:
+        db.session.rollback()
+        raise DeleteFailed(f"Failed to delete book '{book_id}'.") from exception
+
+    return deleted_book
+
+
+def set_cover_variants(variants: dict[int, tuple[str, dict]]):
+    """
+    Store the cover variants of books, see :mod:`pika.covers`. Books which no longer exist or got another cover while
+    the variants were created are skipped.
+    :param variants: Cover the variants were created from and the variants by book ID.
+    """
+    for book_id, book in objects_by_id(Books, variants).items():
+        cover, cover_variants = variants[book_id]
+        if book.cover == cover:
+            book.cover_variants = cover_variants
+    db.session.commit()
+
+
+def batch_books(operations: list[ApiBookOperationDTO]) -> list[BatchResult]:
+    """
+    Create, update and delete books in a single transaction. All referenced books, series and authors are loaded with
+    one ``IN`` query per type up front, the changes are written in one flush. Operations referencing missing objects
+    are skipped and reported in their result, all other operations are applied.
+
+    :raises BatchFailed: When the database refuses the changes, no operation is applied then.
+
+    :param operations: Validated book operations, applied in order.
+    :return: Result of each operation in the same order.
+    """
+    references = [operation.book for operation in operations if operation.book]
+    books = objects_by_id(Books, (operation.book_id for operation in operations if operation.book_id is not None),
+                          options=(so.selectinload(Books.authors),))
+    series = objects_by_id(Series, (book.series.series_id for book in references if book.series))
+    authors = objects_by_id(Authors, (author.author_id for book in references for author in book.authors))
+
+    results = []
+    changed: list[tuple[BatchResult, Books]] = []
+    deleted_ids = set()
+    for index, operation in enumerate(operations):
+        result = BatchResult(index=index, object_id=operation.book_id)
+        results.append(result)
+
+        target_book = None
+        if operation.operation != 'create':
+            target_book = books.get(operation.book_id)
+            if target_book is None or operation.book_id in deleted_ids:
+                result.success, result.status_code, result.message = False, 404, "Book not found"
+                continue
+        if operation.operation == 'delete':
+            db.session.delete(target_book)
+            deleted_ids.add(operation.book_id)
+            continue
+
+        book = operation.book
+        missing = []
+        if book.series and book.series.series_id not in series:
+            missing.append(f"Series with ID {book.series.series_id} does not exist")
+        missing += [f"Author with ID {author.author_id} does not exist"
+                    for author in book.authors if author.author_id not in authors]
+        if missing:
+            result.success, result.status_code, result.message = False, 404, "Referenced object not found"
+            result.details = missing
+            continue
+
+        if target_book is None:
+            target_book = Books(**book.model_dump(exclude={"volume_nr_as_string", "series", "authors"}))
+            db.session.add(target_book)
+        else:
+            for key, value in book.model_dump(exclude={"authors", "series"}).items():
+                setattr(target_book, key, value)
+        target_book.series = series[book.series.series_id] if book.series else None
+        target_book.authors = [authors[author.author_id] for author in book.authors]
+        changed.append((result, target_book))
+
+    try:
+        # The new books get their IDs in the flush, read them before the commit expires the objects
+        db.session.flush()
+        for result, target_book in changed:
+            result.object_id = target_book.book_id
+        db.session.commit()
+    except exc.SQLAlchemyError as exception:
+        db.session.rollback()
+        raise BatchFailed("Failed to apply the book batch.") from exception
+    return results
@@ -0,0 +1,67 @@
+"""
+Cached choice lists (ID and label only) for series and author select fields. Each cached list is tied to the
+generation of its table (see :mod:`pika.services.generations`), which is incremented whenever a commit changes rows of
+that table. The cache lives in the worker process and is shared by all requests of that worker,
+``CHOICES_CACHE_TIMEOUT`` limits how long a list may be served before it is reloaded, so changes made by other workers
+show up eventually.
+"""
+import time
+from typing import Callable
+
+import sqlalchemy as sa
+from flask import current_app
+
+from pika import db
+from pika.models import Series, Authors
+from .generations import generation
+
+Choices = list[tuple[int, str]]
+
+_cache: dict[str, tuple[int, float, Choices]] = {}
+
+
+def _cached(table: str, load: Callable[[], Choices]) -> Choices:
+    """
+    Return the cached choice list of a table, reload it if the table changed or the cached list expired.
+    :param table: Table name used as cache key.
+    :param load: Function to load the choice list from the database.
+    :return: List of (ID, label) tuples.
+    """
+    now = time.monotonic()
+    cached = _cache.get(table)
+    if cached:
+        cached_generation, loaded_at, choices = cached
+        if cached_generation == generation(table) and now - loaded_at < current_app.config['CHOICES_CACHE_TIMEOUT']:
+            return choices
+
+    current_generation = generation(table)
+    choices = load()
+    _cache[table] = (current_generation, now, choices)
+    return choices
+
+
+def series_choices() -> Choices:
+    """
+    Get (ID, title) tuples of all series ordered by title.
+    :return: List of series choices.
+    :rtype: list[tuple[int, str]]
+    """
+    def load():
+        query = sa.select(Series.series_id, Series.title).order_by(Series.title)
+        return [tuple(row) for row in db.session.execute(query)]
+
+    return _cached(Series.__tablename__, load)
+
+
+def author_choices() -> Choices:
+    """
+    Get (ID, name) tuples of all authors ordered by last name.
+    :return: List of author choices.
+    :rtype: list[tuple[int, str]]
+    """
+    def load():
+        query = sa.select(Authors.author_id, Authors.first_name, Authors.last_name).order_by(Authors.last_name)
+        return [(author_id, f"{last_name}, {first_name or ""}")
+                for author_id, first_name, last_name in db.session.execute(query)]
+
+    return _cached(Authors.__tablename__, load)
@@ -0,0 +1,59 @@
+"""Exceptions raised by the library services."""
+
+
+class ServiceError(Exception):
+    """Base exception for errors raised by the library services."""
+
+
+class ObjectNotFound(ServiceError):
+    """Raised when a library object is not found in the database."""
+    object_type = "Object"
+
+    def __init__(self, object_id, missing_ids=None) -> None:
+        self.missing_ids = list(missing_ids) if missing_ids else [object_id]
+        super().__init__(f"{self.object_type} {', '.join(str(missing) for missing in self.missing_ids)} not found.")
+        self.object_id = object_id
+
+
+class BookNotFound(ObjectNotFound):
+    """Raised when a book is not found in the database."""
+    object_type = "Book"
+
+    def __init__(self, book_id, book_title=None, missing_ids=None) -> None:
+        super().__init__(book_id, missing_ids)
+        self.book_id = book_id
+        self.book_title = book_title
+
+
+class SeriesNotFound(ObjectNotFound):
+    """Raised when a series is not found in the database."""
+    object_type = "Series"
+
+    def __init__(self, series_id, missing_ids=None) -> None:
+        super().__init__(series_id, missing_ids)
+        self.series_id = series_id
+
+
+class AuthorNotFound(ObjectNotFound):
+    """Raised when an author is not found in the database."""
+    object_type = "Author"
+
+    def __init__(self, author_id, missing_ids=None) -> None:
+        super().__init__(author_id, missing_ids)
+        self.author_id = author_id
+
+
+class DeleteFailed(ServiceError):
+    """Raised when a library object cannot be deleted, e.g. because other objects still reference it."""
+
+
+class BatchFailed(ServiceError):
+    """Raised when the database refuses the changes of a batch, none of its operations are applied."""
+
+
+class InvalidCursor(ServiceError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+    def __init__(self, cursor) -> None:
+        super().__init__(f"Invalid cursor '{cursor}'.")
+        self.cursor = cursor
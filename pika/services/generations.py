@@ -0,0 +1,49 @@
+"""
+Generation counters of database tables for in-process caches. The generation of a table is incremented whenever a
+commit of this worker process changes rows of that table, so a cache can tell if its data is outdated by comparing the
+generation it was built with. Changes made by other worker processes are not seen, caches using the counters should
+also expire after a timeout.
+"""
+import threading
+from collections import defaultdict
+
+from pika import db
+
+_generations: dict[str, int] = defaultdict(int)
+_generations_lock = threading.Lock()
+
+
+def _collect_changed_tables(session, _flush_context):
+    """Remember the tables of all objects changed in a flush until the transaction is committed."""
+    changed = session.info.setdefault('changed_tables', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        changed.add(obj.__tablename__)
+
+
+def _bump_generations(session):
+    """Increment the generation of every table changed in the committed transaction."""
+    # Commits of several request threads must not lose an increment, a cache could keep outdated data otherwise
+    with _generations_lock:
+        for table in session.info.pop('changed_tables', ()):
+            _generations[table] += 1
+
+
+def _discard_changed_tables(session):
+    """Forget changed tables of a rolled back transaction."""
+    session.info.pop('changed_tables', None)
+
+
+def generation(table: str) -> int:
+    """
+    Get the current generation of a table.
+    :param table: Table name.
+    :type table: str
+    :return: Generation counter.
+    :rtype: int
+    """
+    return _generations[table]
+
+
+db.event.listen(db.session, 'after_flush', _collect_changed_tables)
+db.event.listen(db.session, 'after_commit', _bump_generations)
+db.event.listen(db.session, 'after_rollback', _discard_changed_tables)
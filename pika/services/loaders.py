@@ -0,0 +1,37 @@
+"""
+Eager loading strategies for the library data models. Each DTO shape has an option set that loads all relationships
+the DTO serializes, so converting query results into DTOs needs a constant number of queries.
+"""
+from pydantic import BaseModel
+from sqlalchemy import orm as so
+from sqlalchemy.orm.interfaces import ORMOption
+
+from pika.api.data import BookData, SeriesData, AuthorData, BookBase, SeriesBase, AuthorBase
+from pika.models import Books, Series, Authors
+
+LOADERS: dict[type[BaseModel], tuple[ORMOption, ...]] = {
+    BookBase: (),
+    SeriesBase: (),
+    AuthorBase: (),
+    BookData: (
+        so.joinedload(Books.series),
+        so.selectinload(Books.authors),
+    ),
+    SeriesData: (
+        so.selectinload(Series.books).selectinload(Books.authors),
+    ),
+    AuthorData: (
+        so.selectinload(Authors.books).joinedload(Books.series),
+    ),
+}
+
+
+def loader_options(dto: type[BaseModel]) -> tuple[ORMOption, ...]:
+    """
+    Get the eager loading options needed to serialize ORM objects into a DTO.
+    :param dto: DTO class the query results are converted into.
+    :type dto: type[BaseModel]
+    :return: Loader options to pass to ``.options()``.
+    :rtype: tuple[ORMOption, ...]
+    """
+    return LOADERS[dto]
@@ -0,0 +1,189 @@
+"""Service functions for series data."""
+from typing import Iterator
+
+import sqlalchemy as sa
+from sqlalchemy import exc
+
+from pika import db
+from pika.api.data import ApiSeriesDTO, SeriesBase, SeriesData, SeriesPage
+from pika.models import Series, Books, Authors, BooksAuthors
+from .exceptions import SeriesNotFound, DeleteFailed
+from .loaders import loader_options
+from .util import new_books_list, encode_cursor, iter_chunks, keyset_page, page_count, version_digest
+
+
+def _reloaded(series_id: int) -> SeriesData:
+    """
+    Load a changed series again after the commit expired it. Loads the books and their relations in a few queries
+    instead of lazy loading them one book at a time.
+    :param series_id: ID of the series.
+    :return: Series data.
+    """
+    obj = db.session.get(Series, series_id, options=loader_options(SeriesData), populate_existing=True)
+    return SeriesData.from_orm(obj)
+
+
+def get_series(series_id: int) -> SeriesData:
+    """
+    Get a single series.
+
+    :raises SeriesNotFound: When the series does not exist.
+
+    :param series_id: ID of the series.
+    :return: Series data.
+    """
+    series = db.session.get(Series, series_id, options=loader_options(SeriesData))
+    if series is None:
+        raise SeriesNotFound(series_id)
+    return SeriesData.from_orm(series)
+
+
+def series_version(series_id: int) -> str | None:
+    """
+    Get the version of a series' data, including its books and their authors.
+    :param series_id: ID of the series.
+    :return: Version string or None if the series does not exist.
+    """
+    query = (sa.select(Series.revision, Books.book_id, Books.revision, Authors.author_id, Authors.revision)
+             .select_from(Series)
+             .outerjoin(Books, Books.series_id == Series.series_id)
+             .outerjoin(BooksAuthors, BooksAuthors.book_id == Books.book_id)
+             .outerjoin(Authors, Authors.author_id == BooksAuthors.author_id)
+             .where(Series.series_id == series_id)
+             .order_by(Books.book_id, BooksAuthors.author_id))
+    rows = db.session.execute(query).all()
+    return version_digest(rows) if rows else None
+
+
+def list_series(page: int, per_page: int) -> SeriesPage:
+    """
+    Get a page of series ordered by title.
+
+    :param page: Page number.
+    :param per_page: Number of series per page.
+    :return: Paginated list of series.
+    """
+    query = (Series.query
+             .options(*loader_options(SeriesData))
+             .order_by(Series.title, Series.series_id)
+             .paginate(page=page, per_page=per_page))
+    items = query.items
+    return SeriesPage(
+        first=1,
+        last=query.pages,
+        has_previous=query.has_prev,
+        has_next=query.has_next,
+        next_cursor=encode_cursor(items[-1].title, items[-1].id) if query.has_next else None,
+        series=[SeriesData.from_orm(s) for s in items]
+    )
+
+
+def list_series_after(after: str | None, per_page: int, with_total: bool = False) -> SeriesPage:
+    """
+    Get a page of series ordered by title using keyset pagination.
+
+    :raises InvalidCursor: When the ``after`` cursor is malformed.
+
+    :param after: Cursor of the previous page or None for the first page.
+    :param per_page: Number of series per page.
+    :param with_total: Count the pages. Skipped by default, because the count query scans the whole table.
+    :return: Paginated list of series.
+    """
+    items, next_cursor = keyset_page(Series, Series.title, after, per_page, loader_options(SeriesData))
+    return SeriesPage(
+        first=1,
+        last=page_count(Series, per_page) if with_total else None,
+        has_previous=after is not None,
+        has_next=next_cursor is not None,
+        next_cursor=next_cursor,
+        series=[SeriesData.from_orm(s) for s in items]
+    )
+
+
+def all_series() -> list[SeriesData]:
+    """Get all series. Please use sparingly."""
+    return [SeriesData.from_orm(s) for s in Series.query.options(*loader_options(SeriesData)).all()]
+
+
+def iter_series(chunk_size: int) -> Iterator[SeriesData]:
+    """
+    Iterate over all series without loading the whole table into memory. Series are loaded in chunks of ``chunk_size``
+    ordered by ID, see :func:`iter_chunks`.
+
+    :param chunk_size: Number of series loaded per chunk.
+    :return: Iterator of series data.
+    """
+    for chunk in iter_chunks(Series, chunk_size, loader_options(SeriesData)):
+        for series in chunk:
+            yield SeriesData.from_orm(series)
+
+
+def create_series(series: ApiSeriesDTO) -> SeriesData:
+    """
+    Add a new series.
+
+    :raises BookNotFound: When any referenced book does not exist.
+
+    :param series: Validated series DTO.
+    :return: Data of the new series.
+    """
+    new_series = Series(**series.model_dump(exclude={"books"}))
+    if series.books:
+        new_series.books = new_books_list(series.books)
+
+    db.session.add(new_series)
+    db.session.commit()
+    return _reloaded(new_series.series_id)
+
+
+def update_series(series_id: int, series: ApiSeriesDTO) -> SeriesData:
+    """
+    Update an existing series.
+
+    :raises SeriesNotFound: When the series does not exist.
+    :raises BookNotFound: When any referenced book does not exist.
+
+    :param series_id: ID of the series to update.
+    :param series: Validated series DTO.
+    :return: Data of the updated series.
+    """
+    target_series: Series = Series.query.get(series_id)
+    if target_series is None:
+        raise SeriesNotFound(series_id)
+
+    book_update = new_books_list(series.books) if series.books else None
+
+    for key, value in series.model_dump(exclude={"books"}).items():
+        setattr(target_series, key, value)
+    if book_update is not None:
+        target_series.books = book_update
+
+    db.session.commit()
+    return _reloaded(series_id)
+
+
+def delete_series(series_id: int) -> SeriesBase:
+    """
+    Delete a series.
+
+    :raises SeriesNotFound: When the series does not exist.
+    :raises DeleteFailed: When books are still assigned to the series.
+
+    :param series_id: ID of the series to delete.
+    :return: Data of the deleted series.
+    """
+    target_series: Series = Series.query.get(series_id)
+    if target_series is None:
+        raise SeriesNotFound(series_id)
+
+    deleted_series = SeriesBase.from_orm(target_series)
+
+    try:
+        db.session.delete(target_series)
+        db.session.commit()
+    except exc.SQLAlchemyError as exception:
+        db.session.rollback()
+        raise DeleteFailed(f"Failed to delete series '{series_id}'. "
+                           f"Series cannot be deleted when books are still assigned to it.") from exception
+
+    return deleted_series
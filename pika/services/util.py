@@ -0,0 +1,205 @@
+"""Helper functions shared by the library services."""
+import base64
+import binascii
+import hashlib
+import json
+import math
+from datetime import datetime
+from typing import Iterator
+
+import sqlalchemy as sa
+from sqlalchemy import orm as so
+
+from pika import db
+from pika.api.data import BaseApiBookDTO
+from pika.models import Books, CollectionVersions, RevisionMixin
+from .exceptions import ObjectNotFound, BookNotFound, InvalidCursor
+
+
+def new_books_list(books: list[BaseApiBookDTO]) -> list[Books]:
+    """
+    Generate a list of ORM book objects from the API input data. Queries the database for all books at once and raises
+    an exception if an error occurs.
+
+    :raises BookNotFound: When *any* book in the list is not found in the database, with all missing IDs.
+
+    :param books: A list of DTO book objects.
+    :return: A list of ORM book objects.
+    """
+    return resolve_ids(Books, [book.book_id for book in books], BookNotFound)
+
+
+def objects_by_id(model: type[db.Model], ids, options: tuple = (), chunk_size: int = 500) -> dict[int, db.Model]:
+    """
+    Load the objects with the given primary keys using ``IN`` queries instead of one query per object.
+    :param model: ORM model class.
+    :param ids: Primary keys of the objects, duplicates are ignored.
+    :param options: Loader options applied to the queries.
+    :param chunk_size: Maximum number of primary keys per query, keeps the number of bound parameters low.
+    :return: Found objects by primary key. Missing objects are not contained.
+    """
+    mapper = sa.inspect(model)
+    primary_key = mapper.primary_key[0]
+    key = mapper.get_property_by_column(primary_key).key
+    ids = list(dict.fromkeys(ids))
+    objects = {}
+    for start in range(0, len(ids), chunk_size):
+        query = sa.select(model).options(*options).where(primary_key.in_(ids[start:start + chunk_size]))
+        for obj in db.session.scalars(query):
+            objects[getattr(obj, key)] = obj
+    return objects
+
+
+def iter_chunks(model: type[db.Model], chunk_size: int, options: tuple = ()) -> Iterator[list]:
+    """
+    Iterate over all objects of a model in chunks ordered by primary key. Every chunk is an ordinary buffered query
+    continuing after the last primary key of the previous chunk, so loader options may run their own queries. Objects of
+    a chunk are expunged from the session before the next chunk is loaded.
+    :param model: ORM model class.
+    :param chunk_size: Maximum number of objects per chunk.
+    :param options: Loader options applied to the queries.
+    :return: Iterator of lists of ORM objects.
+    """
+    mapper = sa.inspect(model)
+    primary_key = mapper.primary_key[0]
+    key = mapper.get_property_by_column(primary_key).key
+    query = sa.select(model).options(*options).order_by(primary_key).limit(chunk_size)
+    last_id = None
+    while True:
+        chunk_query = query if last_id is None else query.where(primary_key > last_id)
+        objects = db.session.scalars(chunk_query).all()
+        if not objects:
+            return
+        yield objects
+        if len(objects) < chunk_size:
+            return
+        last_id = getattr(objects[-1], key)
+        db.session.expunge_all()
+
+
+def resolve_ids(model: type[db.Model], ids, not_found: type[ObjectNotFound], options: tuple = ()) -> list:
+    """
+    Get the objects with the given primary keys in the given order, loaded with ``IN`` queries.
+
+    :raises ObjectNotFound: The ``not_found`` exception with all missing IDs, when any object does not exist.
+
+    :param model: ORM model class.
+    :param ids: Primary keys of the objects.
+    :param not_found: Exception type raised for missing objects.
+    :param options: Loader options applied to the queries.
+    :return: List of ORM objects.
+    """
+    ids = list(ids)
+    objects = objects_by_id(model, ids, options)
+    missing = [object_id for object_id in dict.fromkeys(ids) if object_id not in objects]
+    if missing:
+        raise not_found(missing[0], missing_ids=missing)
+    return [objects[object_id] for object_id in ids]
+
+
+def encode_cursor(sort_value, object_id: int) -> str:
+    """
+    Encode the position of an object in a sorted list as an opaque cursor.
+    :param sort_value: Value of the sort column of the object.
+    :param object_id: Primary key of the object.
+    :return: URL safe cursor string.
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([sort_value, object_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decode a cursor generated by :func:`encode_cursor`.
+
+    :raises InvalidCursor: When the cursor is malformed or its values have unexpected types.
+
+    :param cursor: Cursor string.
+    :return: Tuple of sort value and primary key.
+    """
+    try:
+        sort_value, object_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError, TypeError) as exception:
+        raise InvalidCursor(cursor) from exception
+    # JSON booleans are ints in Python, lists and objects can't be compared with a column
+    if (isinstance(sort_value, bool) or not isinstance(sort_value, (str, int, float, type(None)))
+            or isinstance(object_id, bool) or not isinstance(object_id, int)):
+        raise InvalidCursor(cursor)
+    return sort_value, object_id
+
+
+def page_count(model: type[db.Model], per_page: int) -> int:
+    """
+    Count the pages needed to list all objects of a model.
+    :param model: ORM model class.
+    :param per_page: Number of objects per page.
+    :return: Number of pages.
+    """
+    total = db.session.scalar(sa.select(sa.func.count()).select_from(model))
+    return math.ceil(total / per_page) if per_page else 0
+
+
+def keyset_page(model: type[db.Model], sort_column: so.QueryableAttribute, after: str | None, per_page: int,
+                options: tuple = (), criteria: tuple = ()) -> tuple[list, str | None]:
+    """
+    Query a page of objects with keyset pagination. Objects are sorted by ``sort_column`` and the primary key, the
+    page starts right after the object encoded in the ``after`` cursor. Unlike ``OFFSET`` the cost of a page does not
+    depend on how deep into the list it is.
+
+    :raises InvalidCursor: When the ``after`` cursor is malformed.
+
+    :param model: ORM model class.
+    :param sort_column: Column to sort by.
+    :param after: Cursor of the last object of the previous page or None for the first page.
+    :param per_page: Number of objects per page.
+    :param options: Loader options applied to the query.
+    :param criteria: Additional WHERE criteria, e.g. to list the objects of one parent only.
+    :return: Objects of the page and the cursor of the next page (None if this is the last page).
+    """
+    mapper = sa.inspect(model)
+    primary_key = mapper.primary_key[0]
+    query = sa.select(model).options(*options).where(*criteria).order_by(sort_column, primary_key)
+    if after is not None:
+        sort_value, object_id = decode_cursor(after)
+        if isinstance(sort_column.type, sa.DateTime) and isinstance(sort_value, str):
+            try:
+                sort_value = datetime.fromisoformat(sort_value)
+            except ValueError as exception:
+                raise InvalidCursor(after) from exception
+        if sort_value is None:
+            # NULLs sort first in MySQL and SQLite, they are followed by all other values
+            query = query.where(sa.or_(sort_column.is_not(None),
+                                       sa.and_(sort_column.is_(None), primary_key > object_id)))
+        else:
+            query = query.where(sa.or_(sort_column > sort_value,
+                                       sa.and_(sort_column == sort_value, primary_key > object_id)))
+
+    # Fetch one more row than requested to find out if there is a next page
+    rows = db.session.scalars(query.limit(per_page + 1)).all()
+    if len(rows) <= per_page:
+        return rows, None
+    rows = rows[:per_page]
+    return rows, encode_cursor(getattr(rows[-1], sort_column.key),
+                               getattr(rows[-1], mapper.get_property_by_column(primary_key).key))
+
+
+def version_digest(rows) -> str:
+    """
+    Generate a version string from query result rows, e.g. IDs and revisions of objects.
+    :param rows: Result rows.
+    :return: Hex digest of the rows.
+    """
+    return hashlib.sha1(repr([tuple(row) for row in rows]).encode()).hexdigest()
+
+
+def library_version() -> str | None:
+    """
+    Get a version of all library data, which changes whenever a book, series or author is added, changed or deleted.
+    Used as version of lists, because the objects in a list embed objects of the other types. The version is a counter
+    maintained by :meth:`pika.models.RevisionMixin.after_flush`, so reading it costs a primary key lookup.
+    :return: Version string or None if the library was never changed.
+    """
+    version = db.session.scalar(sa.select(CollectionVersions.version)
+                                .where(CollectionVersions.name == RevisionMixin.__collection__))
+    return None if version is None else str(version)
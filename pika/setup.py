@@ -1,6 +1,7 @@
 """Application setup scripts"""
 # pylint: disable=import-outside-toplevel,unused-import
 import sys
+import threading
 
 import tzlocal
 from elasticsearch import Elasticsearch
@@ -73,10 +74,19 @@ def setup_elasticsearch(app: Flask):
                 [app.config['ELASTICSEARCH_URL']],
                 basic_auth=("elastic", app.config['ELASTICSEARCH_PASSWORD']),
                 ca_certs=app.config['ELASTICSEARCH_CERT_PATH'],
+                # The client is shared by all threads of the process, each request borrows a pooled connection
+                connections_per_node=app.config['ELASTICSEARCH_CONNECTIONS_PER_NODE'],
                 # verify_certs=False
             )
 
 
+def setup_search(app: Flask):
+    """Setup for the search backend"""
+    from pika.search import create_backend
+    app.search_backend = create_backend(app)
+    app.logger.info("Search backend: %s", type(app.search_backend).__name__)
+
+
 def setup_babel(app: Flask, babel: Babel):
     def locale_selector():
         if session.get('lang'):
@@ -95,3 +105,26 @@ def setup_babel(app: Flask, babel: Babel):
 
     # babel.init_app(app, locale_selector=locale_selector)
 
+
+def setup_background_threads(app: Flask):
+    """
+    Start the background threads of the app with the first request, so they only run in processes of a web server and
+    not in CLI commands (``flask db upgrade``, ``setup_script.py``, ...). Each gunicorn worker starts its own threads
+    after it was forked.
+    """
+    lock = threading.Lock()
+    started = threading.Event()
+
+    @app.before_request
+    def start_background_threads():
+        if started.is_set():
+            return
+        with lock:
+            if started.is_set():
+                return
+            started.set()
+            from pika.community.util import start_view_flusher
+            start_view_flusher(app)
+            if app.config['SEARCH_OUTBOX_WORKER']:
+                from pika.search_outbox import start_worker
+                start_worker(app)
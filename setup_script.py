@@ -1,13 +1,12 @@
 import logging
 import sys
 
-import elasticsearch
 from werkzeug.security import generate_password_hash
 
 from pika import create_app
 from pika import db
 from pika.config import DefaultConfig, DevelopmentConfig, ProductionConfig
-from pika.models import Users, Posts, Threads, Books, Series, Authors
+from pika.models import Users, Posts, Threads, Books, Series, Authors, SearchIndexOutbox
 
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)8s in %(filename)15s:%(lineno)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -134,13 +133,13 @@ def setup(log_level="DEBUG"):
 
     # Generating Elasticsearch indices
     with app.app_context():
+        # Pending outbox entries are covered by the full reindex
+        SearchIndexOutbox.query.delete()
+        db.session.commit()
         for indexable in [Books, Series, Authors]:
-            try:
-                app.elasticsearch.indices.delete(index=indexable.__tablename__)
-            except elasticsearch.NotFoundError:
-                pass
-            indexable.reindex()
-            logger.info(f"Elastic: Indexing {indexable.__tablename__}")
+            app.search_backend.delete_index(indexable.__tablename__)
+            indexed, failed = indexable.reindex()
+            logger.info(f"Search: Indexed {indexed} objects in {indexable.__tablename__}, {failed} failed")
 
     logger.info(f"{' Setup Script End ':=^80}")
 